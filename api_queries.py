@@ -0,0 +1,299 @@
+"""
+SQL yang dijalankan endpoint main_api.py.
+
+Setiap fungsi mengembalikan (query, params) persis seperti yang dieksekusi
+endpoint. Dipakai bersama oleh main_api.py dan pemeriksaan rencana query
+(`schema.py --explain`, `benchmarks/plan_check.py`), sehingga yang di-EXPLAIN
+adalah query yang benar-benar berjalan, bukan salinan yang bisa menyimpang.
+
+Endpoint yang membaca listing menerima `storage`: "rows" membaca tabel
+`product` (satu baris per observasi), "changes" membaca `listing` +
+`listing_price_interval` (price_history.py) dan agregat harian, dengan kolom
+respons yang sama.
+"""
+from typing import List, Optional
+
+LOCAL_TZ = "Asia/Jakarta"  # Batas hari untuk filter tanggal pada created_at
+STORAGE_MODES = ("rows", "changes")
+
+# Mode `changes`: satu baris per listing dengan harga interval terbukanya (harga terkini),
+# `created_at` = observasi terakhir. Kolom sama dengan tabel product.
+CURRENT_LISTING_ROWS = """
+    SELECT id, name, price, original_price, discount_percentage, detail, platform, product_master_id, created_at
+    FROM (
+        SELECT l.id, l.name, i.price, i.original_price::text AS original_price,
+               i.discount_percentage::text AS discount_percentage, l.detail, l.platform,
+               l.product_master_id, i.last_observed_at AS created_at
+        FROM listing l
+        JOIN listing_price_interval i ON i.listing_id = l.id AND i.valid_to IS NULL
+    ) current_listing"""
+
+
+def build_keyset_query(base_query: str, conditions: list, params: list,
+                       after_id: Optional[int], limit: Optional[int]):
+    """Menambahkan filter keyset (`id > after_id`), ORDER BY id, dan LIMIT ke query dasar."""
+    conditions = list(conditions)
+    params = list(params)
+    if after_id is not None:
+        conditions.append("id > %s")
+        params.append(after_id)
+    query = base_query
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    query += " ORDER BY id"
+    if limit is not None:
+        query += " LIMIT %s"
+        params.append(limit)
+    return query, tuple(params)
+
+
+def product_masters_page(after_id: Optional[int], limit: Optional[int]):
+    """GET /product-masters."""
+    return build_keyset_query("SELECT id, type, name, detail FROM product_master", [], [], after_id, limit)
+
+
+def products_page(master_id: Optional[int], after_id: Optional[int], limit: Optional[int], storage: str = "rows"):
+    """GET /products. Mode `changes`: satu baris per listing (id = listing.id) dengan harga terkininya."""
+    conditions, params = [], []
+    if master_id:
+        conditions.append("product_master_id = %s")
+        params.append(master_id)
+    base_query = CURRENT_LISTING_ROWS if storage == "changes" else "SELECT * FROM product"
+    return build_keyset_query(base_query, conditions, params, after_id, limit)
+
+
+def product_masters_search(q: str, limit: int):
+    """GET /product-masters/search."""
+    # `<%%` = operator word similarity pg_trgm `<%` (di-escape untuk parameter psycopg2)
+    query = """
+        SELECT id, type, name, detail, ROUND(word_similarity(%s, name)::numeric, 4)::float AS score
+        FROM product_master
+        WHERE %s <%% name
+        ORDER BY score DESC, id
+        LIMIT %s;
+    """
+    return query, (q, q, limit)
+
+
+def products_search(q: str, platform: Optional[str], limit: int, storage: str = "rows"):
+    """GET /products/search."""
+    if storage == "changes":
+        return _listing_search(q, platform, limit)
+    # Dicari di tabel listing (sudah unik per platform, name, detail), jadi LIMIT
+    # langsung berlaku per listing; observasi terbarunya diambil lewat natural key
+    # product (created_at = last_seen_at), cukup satu partisi per hasil.
+    conditions = ["%s <%% l.name"]
+    params = [q, q]
+    if platform:
+        conditions.append("l.platform = %s")
+        params.append(platform)
+    params.append(limit)
+    query = f"""
+        SELECT p.id, p.name, p.price, p.original_price, p.discount_percentage, p.detail, p.platform,
+               p.product_master_id, p.created_at, ROUND(m.score::numeric, 4)::float AS score
+        FROM (
+            SELECT l.id, l.platform, l.name, l.detail, l.last_seen_at,
+                   word_similarity(%s, l.name) AS score
+            FROM listing l
+            WHERE {" AND ".join(conditions)}
+            ORDER BY score DESC, l.id
+            LIMIT %s
+        ) m
+        CROSS JOIN LATERAL (
+            SELECT *
+            FROM product p
+            WHERE p.platform = m.platform
+              AND p.name = m.name
+              AND p.detail IS NOT DISTINCT FROM m.detail
+              AND p.created_at = m.last_seen_at
+            LIMIT 1
+        ) p
+        ORDER BY m.score DESC, m.id;
+    """
+    return query, tuple(params)
+
+
+def _listing_search(q: str, platform: Optional[str], limit: int):
+    """GET /products/search mode `changes`: tabel listing sudah unik per (platform, name, detail)."""
+    conditions = ["%s <%% l.name"]
+    params = [q, q]
+    if platform:
+        conditions.append("l.platform = %s")
+        params.append(platform)
+    query = f"""
+        SELECT l.id, l.name, i.price, i.original_price::text AS original_price,
+               i.discount_percentage::text AS discount_percentage, l.detail, l.platform,
+               l.product_master_id, i.last_observed_at AS created_at,
+               ROUND(word_similarity(%s, l.name)::numeric, 4)::float AS score
+        FROM listing l
+        JOIN listing_price_interval i ON i.listing_id = l.id AND i.valid_to IS NULL
+        WHERE {" AND ".join(conditions)}
+        ORDER BY score DESC, l.id
+        LIMIT %s;
+    """
+    params.append(limit)
+    return query, tuple(params)
+
+
+def recommendations_today():
+    """GET /recommendations/today."""
+    query = """
+        SELECT
+            pr.product_master_id,
+            pm.name,
+            pr.price,
+            pr.date
+        FROM
+            price_recommendation pr
+        JOIN
+            product_master pm ON pr.product_master_id = pm.id
+        WHERE
+            pr.date = CURRENT_DATE
+        ORDER BY
+            pr.product_master_id;
+    """
+    return query, None
+
+
+def price_series(master_id: int, from_date, to_date, platform: Optional[str], bucket: str, storage: str = "rows"):
+    """
+    GET /product-masters/{master_id}/price-series.
+    Mode `changes` membaca agregat product_price_platform_daily, jadi bucket terkecilnya hari.
+    """
+    if storage == "changes":
+        return _daily_price_series(master_id, from_date, to_date, platform, bucket)
+    conditions = [
+        "product_master_id = %s",
+        f"created_at >= (%s::timestamp AT TIME ZONE '{LOCAL_TZ}')",
+        f"created_at < ((%s::date + 1)::timestamp AT TIME ZONE '{LOCAL_TZ}')",
+        "price > 0",
+    ]
+    params = [bucket, master_id, from_date, to_date]
+    if platform:
+        conditions.append("platform = %s")
+        params.append(platform)
+    query = f"""
+        SELECT
+            date_trunc(%s, created_at AT TIME ZONE '{LOCAL_TZ}') AS bucket,
+            platform,
+            MIN(price) AS min_price,
+            ROUND(AVG(price), 2)::float AS avg_price,
+            MAX(price) AS max_price,
+            COUNT(*) AS observations
+        FROM product
+        WHERE {" AND ".join(conditions)}
+        GROUP BY 1, 2
+        ORDER BY 1, 2;
+    """
+    return query, tuple(params)
+
+
+def _daily_price_series(master_id: int, from_date, to_date, platform: Optional[str], bucket: str):
+    conditions = ["product_master_id = %s", "day BETWEEN %s AND %s"]
+    params = [bucket, master_id, from_date, to_date]
+    if platform:
+        conditions.append("platform = %s")
+        params.append(platform)
+    query = f"""
+        SELECT
+            date_trunc(%s, day::timestamp) AS bucket,
+            NULLIF(platform, '') AS platform,
+            MIN(min_price) AS min_price,
+            ROUND(SUM(price_sum)::numeric / SUM(price_count), 2)::float AS avg_price,
+            MAX(max_price) AS max_price,
+            SUM(price_count) AS observations
+        FROM product_price_platform_daily
+        WHERE {" AND ".join(conditions)}
+        GROUP BY 1, 2
+        ORDER BY 1, 2;
+    """
+    return query, tuple(params)
+
+
+def recommendation_history(master_id: int, from_date, to_date, bucket: str):
+    """GET /product-masters/{master_id}/recommendation-history."""
+    query = """
+        SELECT
+            date_trunc(%s, date)::date AS bucket,
+            MIN(price) AS min_price,
+            ROUND(AVG(price), 2)::float AS avg_price,
+            MAX(price) AS max_price,
+            COUNT(*) AS days
+        FROM price_recommendation
+        WHERE product_master_id = %s AND date BETWEEN %s AND %s
+        GROUP BY 1
+        ORDER BY 1;
+    """
+    return query, (bucket, master_id, from_date, to_date)
+
+
+def products_batch(master_ids: List[int], from_date, to_date, limit_per_master: int, storage: str = "rows"):
+    """
+    POST /products:batchGet.
+    LATERAL per master: setiap master membaca paling banyak `limit_per_master`
+    baris terbaru di rentangnya lewat index (product_master_id, created_at),
+    sehingga satu master yang sangat ramai tidak membuat respons membengkak.
+    """
+    if storage == "changes":
+        return _interval_batch(master_ids, from_date, to_date, limit_per_master)
+    query = f"""
+        SELECT p.*
+        FROM unnest(%s::int[]) AS m(product_master_id)
+        CROSS JOIN LATERAL (
+            SELECT *
+            FROM product
+            WHERE product_master_id = m.product_master_id
+              AND created_at >= (%s::timestamp AT TIME ZONE '{LOCAL_TZ}')
+              AND created_at < ((%s::date + 1)::timestamp AT TIME ZONE '{LOCAL_TZ}')
+            ORDER BY created_at DESC, id DESC
+            LIMIT %s
+        ) p
+        ORDER BY p.product_master_id, p.created_at, p.id;
+    """
+    return query, (master_ids, from_date, to_date, limit_per_master)
+
+
+def _interval_batch(master_ids: List[int], from_date, to_date, limit_per_master: int):
+    """
+    POST /products:batchGet mode `changes`: satu baris per interval harga yang
+    beririsan dengan rentang (id = listing.id, created_at = valid_from).
+    """
+    query = f"""
+        SELECT p.*
+        FROM unnest(%s::int[]) AS m(product_master_id)
+        CROSS JOIN LATERAL (
+            SELECT l.id, l.name, i.price, i.original_price::text AS original_price,
+                   i.discount_percentage::text AS discount_percentage, l.detail, l.platform,
+                   l.product_master_id, i.valid_from AS created_at
+            FROM listing l
+            JOIN listing_price_interval i ON i.listing_id = l.id
+            WHERE l.product_master_id = m.product_master_id
+              AND i.last_observed_at >= (%s::timestamp AT TIME ZONE '{LOCAL_TZ}')
+              AND i.valid_from < ((%s::date + 1)::timestamp AT TIME ZONE '{LOCAL_TZ}')
+            ORDER BY i.valid_from DESC, l.id DESC
+            LIMIT %s
+        ) p
+        ORDER BY p.product_master_id, p.created_at, p.id;
+    """
+    return query, (master_ids, from_date, to_date, limit_per_master)
+
+
+def recommendations_batch(master_ids: List[int], from_date, to_date):
+    """POST /recommendations:batchGet."""
+    query = """
+        SELECT
+            pr.product_master_id,
+            pm.name,
+            pr.price,
+            pr.date
+        FROM
+            price_recommendation pr
+        JOIN
+            product_master pm ON pr.product_master_id = pm.id
+        WHERE
+            pr.product_master_id = ANY(%s)
+            AND pr.date BETWEEN %s AND %s
+        ORDER BY
+            pr.product_master_id, pr.date;
+    """
+    return query, (master_ids, from_date, to_date)
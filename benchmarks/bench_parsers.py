@@ -0,0 +1,74 @@
+"""
+Benchmark backend parser kartu produk terhadap snapshot halaman yang disimpan
+(mis. `debug_indomaret.html` yang ditulis scraping/indomaret.py).
+
+Contoh (dari root proyek):
+    python -m benchmarks.bench_parsers debug_indomaret.html --platform indomaret --repeat 5
+"""
+import argparse
+import os
+import time
+
+from scraping.parsers import PLATFORM_SELECTORS, available_backends, parse_cards
+
+
+def guess_platform(path):
+    """Menebak platform dari nama file snapshot (mis. debug_indomaret.html)."""
+    name = os.path.basename(path).lower()
+    for platform in PLATFORM_SELECTORS:
+        if platform in name:
+            return platform
+    if "tokped" in name:
+        return "tokopedia"
+    raise ValueError(f"Tidak bisa menebak platform dari '{path}', gunakan --platform.")
+
+
+def bench_file(path, platform, backends, repeat):
+    """Mengukur waktu parse satu snapshot untuk setiap backend; mengembalikan list hasil."""
+    with open(path, encoding="utf-8") as f:
+        html = f.read()
+    results = []
+    for backend in backends:
+        timings = []
+        cards = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            cards = parse_cards(html, platform, backend)
+            timings.append(time.perf_counter() - start)
+        results.append({
+            "file": path,
+            "platform": platform,
+            "backend": backend,
+            "html_bytes": len(html.encode("utf-8")),
+            "cards": len(cards),
+            "best_ms": min(timings) * 1000,
+            "mean_ms": sum(timings) / len(timings) * 1000,
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bandingkan backend parser pada snapshot HTML.")
+    parser.add_argument("snapshots", nargs="+", help="File HTML hasil simpanan page_source.")
+    parser.add_argument("--platform", choices=list(PLATFORM_SELECTORS), default=None)
+    parser.add_argument("--backends", nargs="+", default=None,
+                        help=f"Default: semua yang tersedia ({', '.join(available_backends())}).")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    backends = args.backends or available_backends()
+    print(f"{'file':<28} {'backend':<12} {'cards':>6} {'best ms':>10} {'mean ms':>10}")
+    for path in args.snapshots:
+        platform = args.platform or guess_platform(path)
+        results = bench_file(path, platform, backends, args.repeat)
+        baseline = results[-1]["best_ms"] if results else 0
+        for r in results:
+            speedup = baseline / r["best_ms"] if r["best_ms"] else float("inf")
+            print(f"{os.path.basename(r['file']):<28} {r['backend']:<12} {r['cards']:>6} "
+                  f"{r['best_ms']:>10.1f} {r['mean_ms']:>10.1f}  x{speedup:.1f}")
+        if len({r["cards"] for r in results}) > 1:
+            print("WARNING: backend menghasilkan jumlah kartu berbeda, periksa selector.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Benchmark serialisasi respons API: jalur Pydantic (dict per baris -> validasi
+response_model -> jsonable_encoder -> json) dibandingkan jalur cepat
+`main_api.select_json` (tuple -> dict -> orjson/json) pada data sintetis.
+Tidak butuh database.
+
+Contoh (dari root proyek):
+    python -m benchmarks.bench_serialization --rows 100000 --repeat 3
+"""
+import argparse
+import json
+import time
+from datetime import date, datetime, timedelta, timezone
+from typing import List
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from main_api import PriceRecommendation, Product, dumps_json, orjson
+
+PRODUCT_COLUMNS = ['id', 'name', 'price', 'original_price', 'discount_percentage',
+                   'detail', 'platform', 'product_master_id', 'created_at']
+RECOMMENDATION_COLUMNS = ['product_master_id', 'name', 'price', 'date']
+
+
+def synthetic_product_rows(n):
+    """Baris tuple seperti hasil cursor psycopg2 untuk `SELECT * FROM product`."""
+    wib = timezone(timedelta(hours=7))
+    start = datetime(2025, 9, 1, 8, 0, tzinfo=wib)
+    platforms = ['tokopedia', 'blibli', 'indomaret']
+    return [
+        (i, f"Produk contoh {i} 700ml isi 6", 10000 + i % 5000, str(12000 + i % 5000), str(i % 40),
+         "700ml", platforms[i % 3], i % 2000 + 1, start + timedelta(seconds=i))
+        for i in range(1, n + 1)
+    ]
+
+
+def synthetic_recommendation_rows(n):
+    today = date.today()
+    return [(i, f"Produk contoh {i}", 9500 + i % 5000, today) for i in range(1, n + 1)]
+
+
+def pydantic_path(colnames, rows, model):
+    """Meniru FastAPI: dict per baris, validasi List[model], encode by_alias, json.dumps."""
+    dicts = [dict(zip(colnames, row)) for row in rows]
+    validated = TypeAdapter(List[model]).validate_python(dicts)
+    return json.dumps(jsonable_encoder(validated, by_alias=True)).encode("utf-8")
+
+
+def fast_path(colnames, rows):
+    """Sama dengan main_api.select_json setelah fetch."""
+    return dumps_json([dict(zip(colnames, row)) for row in rows])
+
+
+def timed(func, repeat):
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bandingkan jalur serialisasi Pydantic vs jalur cepat.")
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    cases = [
+        ("products", PRODUCT_COLUMNS, synthetic_product_rows(args.rows), Product),
+        ("recommendations", RECOMMENDATION_COLUMNS, synthetic_recommendation_rows(args.rows), PriceRecommendation),
+    ]
+    encoder = "orjson" if orjson is not None else "json"
+    print(f"{args.rows} rows, best of {args.repeat}, fast path encoder: {encoder}")
+    print(f"{'endpoint':<16} {'pydantic ms':>12} {'fast ms':>10} {'speedup':>8} {'same json':>10}")
+    for name, colnames, rows, model in cases:
+        slow_s, slow_body = timed(lambda: pydantic_path(colnames, rows, model), args.repeat)
+        fast_s, fast_body = timed(lambda: fast_path(colnames, rows), args.repeat)
+        same = json.loads(slow_body) == json.loads(fast_body)
+        print(f"{name:<16} {slow_s * 1000:>12.1f} {fast_s * 1000:>10.1f} {slow_s / fast_s:>7.1f}x {str(same):>10}")
+
+
+if __name__ == "__main__":
+    main()
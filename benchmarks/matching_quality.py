@@ -0,0 +1,92 @@
+"""
+Kualitas pencocokan master (master_matching.py) terhadap ground truth katalog sintetis.
+
+Katalog dibuat di memori dengan benchmarks.synthetic_data, productmasterid-nya
+dihapus, lalu dicocokkan ulang. Skor dihitung per pasangan listing:
+presisi = pasangan yang digabung dan memang satu master / semua pasangan yang
+digabung, recall = pasangan satu master yang ikut digabung / semua pasangan
+satu master. Master sintetis dengan nama dasar identik dianggap satu produk,
+karena tidak mungkin dibedakan dari namanya. Exit code 1 jika presisi di bawah
+`--min-precision`, sehingga bisa dipakai sebagai gate CI.
+
+Contoh (dari root proyek):
+    python -m benchmarks.matching_quality --rows 50000 --min-precision 0.95
+"""
+import argparse
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic_data import build_masters, generate_chunk
+from master_matching import DEFAULT_THRESHOLD, assign_master_ids
+
+DEFAULT_ROWS = 20000
+DEFAULT_MIN_PRECISION = 0.95
+
+
+def _pair_count(sizes):
+    sizes = np.asarray(sizes, dtype=np.int64)
+    return int((sizes * (sizes - 1) // 2).sum())
+
+
+def pair_scores(truth, predicted):
+    """Presisi & recall per pasangan dari dua label cluster sepanjang sama."""
+    frame = pd.DataFrame({'truth': np.asarray(truth), 'predicted': np.asarray(predicted)})
+    true_positive = _pair_count(frame.value_counts(['truth', 'predicted']).values)
+    predicted_pairs = _pair_count(frame['predicted'].value_counts().values)
+    true_pairs = _pair_count(frame['truth'].value_counts().values)
+    return {
+        "precision": true_positive / predicted_pairs if predicted_pairs else 1.0,
+        "recall": true_positive / true_pairs if true_pairs else 1.0,
+        "predicted_pairs": predicted_pairs,
+        "true_pairs": true_pairs,
+    }
+
+
+def synthetic_listings(rows, masters=None, seed=42):
+    """Listing sintetis tanpa productmasterid + label ground truth (nama dasar master)."""
+    rng = np.random.default_rng(seed)
+    master_table = build_masters(masters or max(1, rows // 20), rng)
+    listings = generate_chunk(master_table, rows, 1, rng)
+    base_name = master_table.set_index('productmasterid')['base_name']
+    truth = pd.factorize(listings['productmasterid'].map(base_name))[0]
+    return listings.drop(columns=['productmasterid']), truth
+
+
+def evaluate(rows=DEFAULT_ROWS, masters=None, seed=42, threshold=DEFAULT_THRESHOLD):
+    """Mencocokkan katalog sintetis dan mengembalikan skor pasangan + waktu."""
+    listings, truth = synthetic_listings(rows, masters, seed)
+    start = time.perf_counter()
+    predicted = assign_master_ids(listings, threshold=threshold)
+    scores = pair_scores(truth, predicted.values)
+    scores.update({
+        "rows": rows,
+        "true_masters": int(len(np.unique(truth))),
+        "predicted_masters": int(predicted.nunique()),
+        "seconds": time.perf_counter() - start,
+    })
+    return scores
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Presisi/recall pencocokan master pada katalog sintetis.")
+    parser.add_argument("--rows", type=int, default=DEFAULT_ROWS)
+    parser.add_argument("--masters", type=int, default=None, help="Jumlah product master (default rows/20).")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument("--min-precision", type=float, default=DEFAULT_MIN_PRECISION)
+    args = parser.parse_args()
+
+    scores = evaluate(args.rows, args.masters, args.seed, args.threshold)
+    print(f"{scores['rows']} listings: {scores['predicted_masters']} predicted masters "
+          f"({scores['true_masters']} true) in {scores['seconds']:.2f}s")
+    print(f"precision={scores['precision']:.4f} recall={scores['recall']:.4f}")
+    if scores["precision"] < args.min_precision:
+        print(f"Precision below {args.min_precision}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+Pemeriksaan rencana query API terhadap data berukuran produksi.
+
+Membuat database sementara (`<DB_NAME>_plan_check`) di server PostgreSQL lokal,
+membangun skema lewat schema.py, mengisi data sintetis langsung di server
+(`generate_series`, tanpa CSV) sampai ~10^7 baris `product`, menjalankan ANALYZE,
+lalu EXPLAIN untuk setiap query API (schema.api_query_samples, yang memakai
+fungsi query yang sama dengan main_api.py). Exit code 1 jika ada Seq Scan pada
+tabel besar, sehingga bisa dipakai sebagai gate CI. Database produksi tidak disentuh;
+database sementara dihapus di akhir kecuali `--keep`.
+
+Contoh (dari root proyek):
+    python -m benchmarks.plan_check --rows 10000000
+    python -m benchmarks.plan_check --rows 200000 --keep
+"""
+import argparse
+import sys
+import time
+from datetime import date, timedelta
+
+import psycopg2
+from psycopg2 import sql
+
+import schema
+from benchmarks.synthetic_data import BRANDS, PACK_SIZES, PLATFORMS, PRODUCT_TYPES, VARIANTS
+
+DEFAULT_ROWS = 10_000_000
+DEFAULT_DAYS = 90
+INSERT_CHUNK_ROWS = 1_000_000   # Baris product per INSERT ... SELECT generate_series
+
+
+def connect(dbname):
+    return psycopg2.connect(dbname=dbname, user=schema.DB_USER, password=schema.DB_PASS,
+                            host=schema.DB_HOST, port=schema.DB_PORT)
+
+
+def recreate_database(name, drop_only=False):
+    """DROP/CREATE DATABASE harus di luar transaksi: pakai koneksi autocommit ke database utama."""
+    conn = connect(schema.DB_NAME)
+    conn.autocommit = True
+    try:
+        with conn.cursor() as cur:
+            cur.execute(sql.SQL("DROP DATABASE IF EXISTS {};").format(sql.Identifier(name)))
+            if not drop_only:
+                cur.execute(sql.SQL("CREATE DATABASE {};").format(sql.Identifier(name)))
+    finally:
+        conn.close()
+
+
+def seed(conn, rows, masters, days, today):
+    """Mengisi semua tabel yang dibaca API dengan data sintetis yang tersebar merata per master."""
+    start_day = today - timedelta(days=days - 1)
+    schema.ensure_month_partitions(conn, start_day, today)
+    with conn.cursor() as cur:
+        print(f"Seeding {masters} product masters...")
+        cur.execute("""
+            INSERT INTO product_master (id, type, name, detail)
+            SELECT i, (%(types)s)[1 + i %% cardinality(%(types)s)],
+                   (%(brands)s)[1 + i %% cardinality(%(brands)s)] || ' '
+                       || (%(types)s)[1 + i %% cardinality(%(types)s)] || ' '
+                       || (%(variants)s)[1 + (i / 7) %% cardinality(%(variants)s)] || ' '
+                       || (%(packs)s)[1 + (i / 3) %% cardinality(%(packs)s)],
+                   (%(packs)s)[1 + (i / 3) %% cardinality(%(packs)s)]
+            FROM generate_series(1, %(masters)s) AS g(i);
+        """, {"types": PRODUCT_TYPES, "brands": BRANDS, "variants": VARIANTS, "packs": PACK_SIZES,
+              "masters": masters})
+
+        seconds = days * 86400
+        for chunk_start in range(1, rows + 1, INSERT_CHUNK_ROWS):
+            chunk_end = min(chunk_start + INSERT_CHUNK_ROWS - 1, rows)
+            cur.execute("""
+                INSERT INTO product (id, name, price, original_price, discount_percentage,
+                                     detail, platform, product_master_id, created_at)
+                SELECT g.i, pm.name, 1000 + (g.i::bigint * 37) %% 90000, NULL, NULL, pm.detail,
+                       (%(platforms)s)[1 + g.i %% cardinality(%(platforms)s)], pm.id,
+                       %(start)s::timestamptz + make_interval(secs => (g.i::bigint * 7919) %% %(seconds)s)
+                FROM generate_series(%(first)s, %(last)s) AS g(i)
+                JOIN product_master pm ON pm.id = 1 + g.i %% %(masters)s
+                ON CONFLICT DO NOTHING;
+            """, {"platforms": PLATFORMS, "start": f"{start_day.isoformat()} 00:00:00+07",
+                  "seconds": seconds, "first": chunk_start, "last": chunk_end, "masters": masters})
+            conn.commit()
+            print(f"  product rows {chunk_end:,}/{rows:,}")
+
+        print("Seeding price recommendations, listings and price intervals...")
+        cur.execute("""
+            INSERT INTO price_recommendation (product_master_id, price, date)
+            SELECT pm.id, 1000 + (pm.id * 13 + d) %% 90000, %(today)s::date - d
+            FROM product_master pm CROSS JOIN generate_series(0, %(days)s - 1) AS d;
+        """, {"today": today, "days": days})
+        cur.execute("""
+            INSERT INTO listing (platform, name, detail, product_master_id, first_seen_at, last_seen_at)
+            SELECT p, pm.name, pm.detail, pm.id, %(start)s::timestamptz, now()
+            FROM product_master pm CROSS JOIN unnest(%(platforms)s) AS p
+            ON CONFLICT DO NOTHING;
+        """, {"platforms": PLATFORMS, "start": f"{start_day.isoformat()} 00:00:00+07"})
+        cur.execute("""
+            INSERT INTO listing_price_interval (listing_id, valid_from, valid_to, price, original_price,
+                                                discount_percentage, observation_count, last_observed_at)
+            SELECT l.id, l.first_seen_at + (k || ' days')::interval,
+                   CASE WHEN k < 3 THEN l.first_seen_at + ((k + 1) || ' days')::interval END,
+                   1000 + (l.id * 17 + k) %% 90000, NULL, NULL, 1,
+                   l.first_seen_at + (k || ' days')::interval
+            FROM listing l CROSS JOIN generate_series(0, 3) AS k;
+        """)
+    conn.commit()
+    with conn.cursor() as cur:
+        cur.execute("ANALYZE;")
+
+
+def run_check(rows, masters, days, min_rows, keep=False):
+    """Membuat database sementara, mengisi data, dan mengembalikan laporan explain_api_queries."""
+    name = f"{schema.DB_NAME}_plan_check"
+    today = date.today()
+    print(f"Creating scratch database '{name}'...")
+    recreate_database(name)
+    conn = connect(name)
+    try:
+        schema.create_schema(conn, drop_existing=False)
+        conn.commit()
+        start = time.perf_counter()
+        seed(conn, rows, masters, days, today)
+        print(f"Seeded in {time.perf_counter() - start:.1f}s.")
+        master_ids = [1, masters // 2 or 1, masters]
+        report = schema.explain_api_queries(conn, schema.api_query_samples(master_ids, today), min_rows)
+        conn.rollback()
+    finally:
+        conn.close()
+        if not keep:
+            recreate_database(name, drop_only=True)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Isi database sementara lalu gagal jika query API memakai seq scan.")
+    parser.add_argument("--rows", type=int, default=DEFAULT_ROWS, help="Jumlah baris product sintetis.")
+    parser.add_argument("--masters", type=int, default=None, help="Jumlah product master (default rows/20).")
+    parser.add_argument("--days", type=int, default=DEFAULT_DAYS, help="Rentang hari created_at sampai hari ini.")
+    parser.add_argument("--min-rows", type=int, default=schema.DEFAULT_MIN_ROWS,
+                        help="Seq scan pada tabel yang lebih kecil dari ini diabaikan.")
+    parser.add_argument("--keep", action="store_true", help="Jangan hapus database sementara setelah selesai.")
+    args = parser.parse_args()
+
+    masters = args.masters or max(1, args.rows // 20)
+    report = run_check(args.rows, masters, args.days, args.min_rows, args.keep)
+    failed = False
+    for name, result in report.items():
+        status = "OK" if not result["seq_scans"] else f"SEQ SCAN on {', '.join(result['seq_scans'])}"
+        failed = failed or bool(result["seq_scans"])
+        print(f"{name:<26} {status:<40} {result['scans']}")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+"""
+Benchmark end-to-end terhadap PostgreSQL lokal (docker-compose).
+
+Tahapan: membuat katalog sintetis, lalu mengukur `load_to_db.main`,
+`process_data.main`, `ml_recommender.main`, dan endpoint main_api.py
+(`/product-masters`, `/products`, `/recommendations/today`) di bawah beban
+konkuren lewat server uvicorn terpisah. Hasilnya ditulis sebagai JSON
+(commit git, ukuran data, detik per tahap, latensi p50/p95/p99 per endpoint)
+agar regresi bisa dibandingkan antar commit. Tahap yang gagal ditandai
+`"status": "failed"` di JSON, tahap sesudahnya dilewati, dan exit code 1.
+
+PERINGATAN: `load_to_db.main` menghapus dan membuat ulang tabel. Jangan
+jalankan terhadap database yang datanya perlu dipertahankan.
+
+Contoh (dari root proyek):
+    python -m benchmarks.run_suite --rows 100000 --output bench_results/100k.json
+    python -m benchmarks.run_suite --rows 10000 --stages load recommend api
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import numpy as np
+
+import load_to_db
+import main_api
+import ml_recommender
+import process_data
+from benchmarks.synthetic_data import generate_catalog
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STAGES = ["generate", "load", "process", "recommend", "api"]
+API_ENDPOINTS = {
+    "product_masters": "/product-masters?limit=1000",
+    "products": "/products?limit=1000",
+    "recommendations_today": "/recommendations/today",
+}
+DEFAULT_API_PORT = 8765
+DEFAULT_CONCURRENCY = 16
+DEFAULT_REQUESTS = 200      # Jumlah request per endpoint
+
+
+@contextmanager
+def working_directory(path):
+    """Skrip loader mencari '*_cleaned.csv' di direktori kerja."""
+    previous = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=REPO_ROOT, text=True).strip()
+    except Exception:
+        return None
+
+
+def timed_stage(name, func, rows=None):
+    """
+    Menjalankan satu tahap dan mengembalikan hasil ukurnya beserta `status`.
+    Tahap gagal jika func melempar exception atau mengembalikan status selain
+    "ok" (main() loader/recommender mengembalikan status RunReport-nya).
+    """
+    print(f"\n=== {name} ===")
+    start = time.perf_counter()
+    status, error = "ok", None
+    try:
+        returned = func()
+        if isinstance(returned, str) and returned != "ok":
+            status = returned
+    except Exception as e:
+        status, error = "failed", str(e)
+    seconds = time.perf_counter() - start
+    result = {"seconds": round(seconds, 3), "status": status}
+    if error:
+        result["error"] = error
+    if status != "ok":
+        print(f"--- {name}: {status} after {seconds:.2f}s")
+        return result
+    if rows:
+        result["rows_per_second"] = round(rows / seconds, 1) if seconds else None
+    print(f"--- {name}: {seconds:.2f}s")
+    return result
+
+
+def _request(url, api_key):
+    request = urllib.request.Request(url, headers={"x-api-key": api_key})
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=60) as response:
+            size = len(response.read())
+            ok = response.status == 200
+    except Exception:
+        size, ok = 0, False
+    return time.perf_counter() - start, size, ok
+
+
+def load_test(base_url, path, concurrency, total_requests, api_key=main_api.SECRET_API_KEY):
+    """Mengirim `total_requests` GET secara konkuren; mengembalikan ringkasan latensi."""
+    url = base_url + path
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(lambda _: _request(url, api_key), range(total_requests)))
+    wall = time.perf_counter() - start
+    latencies = np.array([r[0] for r in results if r[2]]) * 1000
+    errors = sum(1 for r in results if not r[2])
+    summary = {
+        "path": path,
+        "requests": total_requests,
+        "concurrency": concurrency,
+        "errors": errors,
+        "requests_per_second": round(total_requests / wall, 1) if wall else None,
+        "response_bytes": max((r[1] for r in results), default=0),
+    }
+    if len(latencies):
+        summary.update({
+            "p50_ms": round(float(np.percentile(latencies, 50)), 2),
+            "p95_ms": round(float(np.percentile(latencies, 95)), 2),
+            "p99_ms": round(float(np.percentile(latencies, 99)), 2),
+            "max_ms": round(float(latencies.max()), 2),
+        })
+    return summary
+
+
+@contextmanager
+def api_server(port, cache=False):
+    """Menjalankan uvicorn main_api:app di subprocess sampai endpoint root menjawab."""
+    env = dict(os.environ)
+    if not cache:
+        env["API_CACHE_TTL"] = "0"
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main_api:app", "--port", str(port), "--log-level", "warning"],
+        cwd=REPO_ROOT, env=env,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                urllib.request.urlopen(base_url + "/", timeout=2).read()
+                break
+            except Exception:
+                if time.monotonic() > deadline or process.poll() is not None:
+                    raise RuntimeError("API server did not start")
+                time.sleep(0.5)
+        yield base_url
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+
+def run_suite(rows, data_dir, stages=None, concurrency=DEFAULT_CONCURRENCY,
+              requests_per_endpoint=DEFAULT_REQUESTS, port=DEFAULT_API_PORT, api_cache=False):
+    """Menjalankan tahapan yang dipilih dan mengembalikan dict hasil (siap ditulis ke JSON)."""
+    stages = stages or STAGES
+    report = {
+        "commit": git_commit(),
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "machine": platform.platform(),
+        "rows": rows,
+        "status": "ok",
+        "stages": {},
+        "api": {},
+    }
+
+    def run_stage(key, name, func, stage_rows=None):
+        """Tahap berikutnya bergantung pada data tahap sebelumnya: berhenti setelah tahap pertama yang gagal."""
+        if report["status"] != "ok":
+            report["stages"][key] = {"status": "skipped"}
+            return
+        report["stages"][key] = timed_stage(name, func, stage_rows)
+        if report["stages"][key]["status"] != "ok":
+            report["status"] = "failed"
+
+    if "generate" in stages:
+        summary = {}
+        run_stage("generate", "generate", lambda: summary.update(generate_catalog(data_dir, rows)), rows)
+        report["masters"] = summary.get("masters")
+
+    with working_directory(data_dir):
+        if "load" in stages:
+            run_stage("load_to_db", "load_to_db.main", load_to_db.main, rows)
+        if "process" in stages:
+            run_stage("process_data", "process_data.main", process_data.main, rows)
+    if "recommend" in stages:
+        run_stage("ml_recommender", "ml_recommender.main", ml_recommender.main)
+
+    if "api" in stages and report["status"] == "ok":
+        print("\n=== api ===")
+        with api_server(port, cache=api_cache) as base_url:
+            for name, path in API_ENDPOINTS.items():
+                _request(base_url + path, main_api.SECRET_API_KEY)  # Pemanasan pool & cache
+                report["api"][name] = load_test(base_url, path, concurrency, requests_per_endpoint)
+                r = report["api"][name]
+                print(f"{name:<24} {r['requests_per_second']} req/s  p95 {r.get('p95_ms')} ms  errors {r['errors']}")
+        report["api_cache"] = api_cache
+
+    report["finished_at"] = datetime.now(timezone.utc).isoformat()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark end-to-end dengan data sintetis (MENGHAPUS data DB).")
+    parser.add_argument("--rows", type=int, default=10000, help="Jumlah listing sintetis (10^4 .. 10^7).")
+    parser.add_argument("--data-dir", default="bench_data")
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=STAGES)
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument("--requests", type=int, default=DEFAULT_REQUESTS, help="Request per endpoint.")
+    parser.add_argument("--port", type=int, default=DEFAULT_API_PORT)
+    parser.add_argument("--api-cache", action="store_true", help="Ukur API dengan cache respons aktif.")
+    parser.add_argument("--output", default=None, help="File JSON hasil (default bench_results/<waktu>.json).")
+    args = parser.parse_args()
+
+    data_dir = os.path.abspath(args.data_dir)
+    os.makedirs(data_dir, exist_ok=True)
+    report = run_suite(args.rows, data_dir, args.stages, args.concurrency, args.requests, args.port, args.api_cache)
+
+    output = args.output or os.path.join("bench_results", datetime.now().strftime("%Y%m%d_%H%M%S") + ".json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {output}")
+    if report["status"] != "ok":
+        failed = [name for name, stage in report["stages"].items() if stage["status"] not in ("ok", "skipped")]
+        print(f"Suite failed at stage(s): {', '.join(failed)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Generator katalog sintetis multi-platform dengan kolom yang sama seperti
+`*_cleaned.csv` (id, name, price, original_price, discount_percentage, detail,
+platform, productmasterid, createdat).
+
+Setiap product master punya merek, varian, dan ukuran kemasan; listing-nya
+muncul di beberapa platform dengan variasi nama (teks promo, huruf besar,
+"isi N") dan harga per platform yang berfluktuasi antar hari scrape. Data
+dibuat dan ditulis per potongan sehingga 10^7 baris tidak perlu muat di memori.
+
+Contoh (dari root proyek):
+    python -m benchmarks.synthetic_data --rows 1000000 --output-dir bench_data
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+PLATFORMS = ['tokopedia', 'blibli', 'indomaret']
+PLATFORM_PRICE_FACTOR = {'tokopedia': 1.0, 'blibli': 1.03, 'indomaret': 0.98}
+BRANDS = ['Rinso', 'Molto', 'Sunlight', 'Dove', 'Vaseline', 'Pepsodent', 'Biskuat', 'Aquviva',
+          'Larisst', 'Campina', 'Indomie', 'Sania', 'Bimoli', 'Lifebuoy', 'Pantene', 'Sariwangi']
+PRODUCT_TYPES = ['Deterjen Cair', 'Pewangi Pakaian', 'Sabun Cuci Piring', 'Shampoo', 'Lotion',
+                 'Pasta Gigi', 'Biskuit', 'Air Mineral', 'Garam', 'Es Krim', 'Mie Instan', 'Minyak Goreng']
+VARIANTS = ['Original', 'Soft', 'Fresh', 'Lemon', 'Sakura', 'Extra', 'Gold', 'Lite']
+PACK_SIZES = ['35G', '55mL', '125 mL', '190 g', '225 g', '250mL', '300ml', '500G', '700ml', '1 L', '2 L', '4500ml']
+PROMO_PREFIXES = ['', '', '', '[Gratis Gantungan Baju] ', '[Promo] ', '[Gratis Ongkir] ']
+DEFAULT_CHUNK_ROWS = 500000
+DEFAULT_DAYS = 30
+
+
+def build_masters(n_masters, rng):
+    """Tabel master sintetis: nama dasar, ukuran kemasan, dan harga dasar."""
+    brand = rng.integers(0, len(BRANDS), n_masters)
+    kind = rng.integers(0, len(PRODUCT_TYPES), n_masters)
+    variant = rng.integers(0, len(VARIANTS), n_masters)
+    pack = rng.integers(0, len(PACK_SIZES), n_masters)
+    names = [
+        f"{BRANDS[b]} {PRODUCT_TYPES[k]} {VARIANTS[v]} {PACK_SIZES[p]}"
+        for b, k, v, p in zip(brand, kind, variant, pack)
+    ]
+    return pd.DataFrame({
+        'productmasterid': np.arange(1, n_masters + 1),
+        'base_name': names,
+        'detail': [PACK_SIZES[p] for p in pack],
+        'base_price': (rng.lognormal(mean=10.0, sigma=0.8, size=n_masters) // 100 * 100).clip(1000, 2_000_000),
+    })
+
+
+def generate_chunk(masters, n_rows, start_id, rng, days=DEFAULT_DAYS, start_date="2025-09-01"):
+    """Satu potongan listing sintetis (DataFrame berformat *_cleaned.csv)."""
+    picks = rng.integers(0, len(masters), n_rows)
+    m = masters.iloc[picks].reset_index(drop=True)
+    platform = np.array(PLATFORMS)[rng.integers(0, len(PLATFORMS), n_rows)]
+
+    promo = np.array(PROMO_PREFIXES)[rng.integers(0, len(PROMO_PREFIXES), n_rows)]
+    multiplier = rng.choice([0, 0, 0, 2, 6, 12], n_rows)
+    suffix = np.where(multiplier > 0, np.char.add(" isi ", multiplier.astype(str)), "")
+    name = pd.Series(promo).str.cat(m['base_name']).str.cat(pd.Series(suffix))
+    upper = rng.random(n_rows) < 0.1
+    name[upper] = name[upper].str.upper()
+
+    factor = pd.Series(platform).map(PLATFORM_PRICE_FACTOR).values
+    noise = rng.normal(1.0, 0.05, n_rows)
+    original = (m['base_price'].values * factor * np.maximum(multiplier, 1) // 100 * 100).astype(np.int64)
+    discount = np.where(rng.random(n_rows) < 0.6, rng.integers(1, 45, n_rows), 0)
+    price = (original * (100 - discount) / 100 * noise // 100 * 100).clip(100).astype(np.int64)
+    discount_pct = np.round((original - price) / original * 100).clip(0).astype(np.int64)
+    has_original = platform != 'indomaret'  # Indomaret tidak menampilkan harga coret
+
+    offsets = pd.to_timedelta(rng.integers(0, days * 86400, n_rows), unit='s')
+    created = pd.Timestamp(start_date, tz='Asia/Jakarta') + offsets
+
+    return pd.DataFrame({
+        'id': np.arange(start_id, start_id + n_rows),
+        'name': name.values,
+        'price': price,
+        'original_price': pd.Series(original, dtype='Int64').where(has_original).values,
+        'discount_percentage': pd.Series(discount_pct, dtype='Int64').where(has_original).values,
+        'detail': m['detail'].values,
+        'platform': platform,
+        'productmasterid': m['productmasterid'].values,
+        'createdat': created,
+    })
+
+
+def generate_catalog(output_dir, rows, masters=None, chunk_rows=DEFAULT_CHUNK_ROWS, days=DEFAULT_DAYS, seed=42):
+    """
+    Menulis <platform>_cleaned.csv di `output_dir` dengan total `rows` baris.
+    Default jumlah master = rows / 20 (rata-rata 20 observasi per master).
+    Mengembalikan dict ringkasan (rows, masters, files, seconds).
+    """
+    rng = np.random.default_rng(seed)
+    n_masters = masters or max(1, rows // 20)
+    master_table = build_masters(n_masters, rng)
+    os.makedirs(output_dir, exist_ok=True)
+    paths = {p: os.path.join(output_dir, f"{p}_cleaned.csv") for p in PLATFORMS}
+    for path in paths.values():
+        if os.path.exists(path):
+            os.remove(path)
+
+    start = time.perf_counter()
+    written = {p: 0 for p in PLATFORMS}
+    for chunk_start in range(0, rows, chunk_rows):
+        n = min(chunk_rows, rows - chunk_start)
+        chunk = generate_chunk(master_table, n, chunk_start + 1, rng, days=days)
+        for platform, part in chunk.groupby('platform'):
+            part = part.assign(id=np.arange(written[platform] + 1, written[platform] + len(part) + 1))
+            part.to_csv(paths[platform], mode='a', header=written[platform] == 0, index=False, encoding='utf-8')
+            written[platform] += len(part)
+    return {
+        "rows": rows,
+        "masters": n_masters,
+        "files": {p: {"path": paths[p], "rows": written[p]} for p in PLATFORMS},
+        "seconds": time.perf_counter() - start,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Buat katalog sintetis berformat *_cleaned.csv.")
+    parser.add_argument("--rows", type=int, default=10000, help="Jumlah listing (10^4 .. 10^7).")
+    parser.add_argument("--masters", type=int, default=None, help="Jumlah product master (default rows/20).")
+    parser.add_argument("--days", type=int, default=DEFAULT_DAYS, help="Rentang hari created_at.")
+    parser.add_argument("--output-dir", default="bench_data")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    summary = generate_catalog(args.output_dir, args.rows, masters=args.masters, days=args.days, seed=args.seed)
+    print(f"Generated {summary['rows']} rows for {summary['masters']} masters in {summary['seconds']:.1f}s:")
+    for platform, info in summary["files"].items():
+        print(f"  {info['path']}: {info['rows']} rows")
+
+
+if __name__ == "__main__":
+    main()
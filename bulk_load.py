@@ -0,0 +1,186 @@
+"""
+Helper bulk insert DataFrame ke PostgreSQL.
+
+Jalur utama memakai `COPY ... FROM STDIN` yang di-stream langsung dari
+DataFrame (tanpa membuat satu string CSV raksasa di memori). Jika COPY tidak
+tersedia (bukan karena data/constraint yang salah), dipakai fallback
+`execute_values` yang mengirim baris per batch.
+"""
+import io
+import time
+
+import pandas as pd
+import psycopg2
+from psycopg2 import errors as pg_errors
+from psycopg2 import sql
+from psycopg2.extras import execute_values
+
+COPY_CHUNK_ROWS = 50000   # Jumlah baris DataFrame yang diubah ke CSV per potongan
+VALUES_PAGE_SIZE = 5000   # Jumlah baris per statement INSERT pada fallback execute_values
+
+# Error yang berarti COPY memang tidak tersedia (proxy/server tanpa dukungan COPY,
+# hak akses). Error data/constraint TIDAK termasuk: diulang di jalur lambat pun tetap gagal.
+COPY_UNAVAILABLE_ERRORS = (psycopg2.NotSupportedError, pg_errors.InsufficientPrivilege)
+
+
+def _prepare_frame(df, columns):
+    """
+    Memilih kolom dan merapikan tipe: kolom float yang isinya bilangan bulat
+    (float hanya karena ada NaN) dikembalikan ke integer agar tidak tertulis "123.0".
+    """
+    frame = df[list(columns)].copy()
+    for col in frame.columns:
+        series = frame[col]
+        if pd.api.types.is_float_dtype(series):
+            non_null = series.dropna()
+            if (non_null == non_null.round()).all():
+                frame[col] = series.astype("Int64")
+    return frame
+
+
+class _DataFrameCsvReader(io.TextIOBase):
+    """File-like object yang menghasilkan CSV potong demi potong untuk `copy_expert`."""
+
+    def __init__(self, frame, chunk_rows):
+        self._frame = frame
+        self._chunk_rows = chunk_rows
+        self._offset = 0
+        self._buffer = ""   # Potongan CSV aktif
+        self._pos = 0       # Posisi baca di dalam _buffer (tanpa memotong ulang string)
+
+    def readable(self):
+        return True
+
+    def _next_chunk(self):
+        if self._offset >= len(self._frame):
+            return ""
+        chunk = self._frame.iloc[self._offset:self._offset + self._chunk_rows]
+        self._offset += self._chunk_rows
+        # NULL ditulis sebagai field kosong tanpa kutip (default FORMAT csv)
+        return chunk.to_csv(header=False, index=False, na_rep="")
+
+    def _fill(self):
+        """Memuat potongan berikutnya jika buffer aktif sudah habis; False jika data habis."""
+        if self._pos >= len(self._buffer):
+            self._buffer = self._next_chunk()
+            self._pos = 0
+        return self._pos < len(self._buffer)
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            parts = [self._buffer[self._pos:]]
+            self._buffer, self._pos = "", 0
+            while True:
+                chunk = self._next_chunk()
+                if not chunk:
+                    break
+                parts.append(chunk)
+            return "".join(parts)
+        parts = []
+        while size > 0 and self._fill():
+            piece = self._buffer[self._pos:self._pos + size]
+            self._pos += len(piece)
+            size -= len(piece)
+            parts.append(piece)
+        return "".join(parts)
+
+    def readline(self, size=-1):
+        parts = []
+        while self._fill():
+            end = self._buffer.find("\n", self._pos)
+            if end >= 0:
+                parts.append(self._buffer[self._pos:end + 1])
+                self._pos = end + 1
+                break
+            parts.append(self._buffer[self._pos:])
+            self._pos = len(self._buffer)
+        return "".join(parts)
+
+
+def copy_dataframe(conn, df, table, columns, chunk_rows=COPY_CHUNK_ROWS):
+    """Memasukkan DataFrame ke `table` lewat COPY FROM STDIN. Mengembalikan jumlah baris."""
+    frame = _prepare_frame(df, columns)
+    query = sql.SQL("COPY {} ({}) FROM STDIN WITH (FORMAT csv)").format(
+        sql.Identifier(table),
+        sql.SQL(", ").join(sql.Identifier(col) for col in columns),
+    )
+    with conn.cursor() as cur:
+        cur.copy_expert(query.as_string(conn), _DataFrameCsvReader(frame, chunk_rows))
+    return len(frame)
+
+
+def iter_row_tuples(frame, chunk_rows=COPY_CHUNK_ROWS):
+    """Menghasilkan tuple baris dengan NaN/NA diganti None, per potongan agar hemat memori."""
+    for start in range(0, len(frame), chunk_rows):
+        chunk = frame.iloc[start:start + chunk_rows].astype(object)
+        chunk = chunk.where(pd.notna(chunk), None)
+        yield from chunk.itertuples(index=False, name=None)
+
+
+def insert_values_dataframe(conn, df, table, columns, page_size=VALUES_PAGE_SIZE):
+    """Fallback: INSERT multi-baris per batch memakai `execute_values`."""
+    frame = _prepare_frame(df, columns)
+    query = sql.SQL("INSERT INTO {} ({}) VALUES %s").format(
+        sql.Identifier(table),
+        sql.SQL(", ").join(sql.Identifier(col) for col in columns),
+    )
+    with conn.cursor() as cur:
+        execute_values(cur, query.as_string(conn), iter_row_tuples(frame), page_size=page_size)
+    return len(frame)
+
+
+def bulk_insert(conn, df, table, columns, method="auto"):
+    """
+    Memasukkan DataFrame ke tabel dan mengembalikan statistik throughput.
+
+    method: "copy" (COPY saja), "values" (execute_values saja), atau "auto"
+    (COPY, lalu fallback ke execute_values hanya jika COPY tidak tersedia;
+    error data/constraint dilempar ulang apa adanya).
+    """
+    if method not in ("auto", "copy", "values"):
+        raise ValueError(f"Metode bulk insert tidak dikenal: {method}")
+
+    start = time.perf_counter()
+    used = method
+    if method == "values":
+        rows = insert_values_dataframe(conn, df, table, columns)
+    elif method == "copy":
+        rows = copy_dataframe(conn, df, table, columns)
+    else:
+        with conn.cursor() as cur:
+            cur.execute("SAVEPOINT bulk_copy;")
+        try:
+            rows = copy_dataframe(conn, df, table, columns)
+            used = "copy"
+        except COPY_UNAVAILABLE_ERRORS as e:
+            print(f"COPY into '{table}' unavailable ({e}); falling back to execute_values.")
+            with conn.cursor() as cur:
+                cur.execute("ROLLBACK TO SAVEPOINT bulk_copy;")
+            rows = insert_values_dataframe(conn, df, table, columns)
+            used = "values"
+        with conn.cursor() as cur:
+            cur.execute("RELEASE SAVEPOINT bulk_copy;")
+
+    seconds = time.perf_counter() - start
+    return {
+        "table": table,
+        "method": used,
+        "rows": rows,
+        "seconds": seconds,
+        "rows_per_second": rows / seconds if seconds > 0 else float("inf"),
+    }
+
+
+def print_throughput_report(stats):
+    """Mencetak ringkasan throughput (rows/s) untuk setiap tabel yang dimuat."""
+    print("\n--- Throughput Report ---")
+    total_rows = 0
+    total_seconds = 0.0
+    for s in stats:
+        total_rows += s["rows"]
+        total_seconds += s["seconds"]
+        print(f"{s['table']:<24} {s['method']:<7} {s['rows']:>12,} rows "
+              f"{s['seconds']:>9.2f}s {s['rows_per_second']:>14,.0f} rows/s")
+    if total_seconds > 0:
+        print(f"{'TOTAL':<32} {total_rows:>12,} rows {total_seconds:>9.2f}s "
+              f"{total_rows / total_seconds:>14,.0f} rows/s")
@@ -0,0 +1,199 @@
+"""
+Penyimpanan dataset listing dalam format kolumnar (Parquet via pyarrow).
+
+Dataset dipartisi per platform dan tanggal scrape (hari WIB) dengan layout
+hive, mis. `dataset/platform=tokopedia/scrape_date=2025-09-01/part-....parquet`.
+Skemanya eksplisit: harga dan diskon integer (nullable), `createdat` timestamp
+ber-timezone, dan `platform` dibaca sebagai kategori pandas. Loader tidak perlu
+lagi mem-parse ulang teks harga atau menebak tipe seperti pada CSV.
+
+Pembacaan memakai projeksi kolom dan filter partisi, sehingga membaca satu
+platform untuk satu hari hanya menyentuh file di partisi tersebut. Setiap
+penulisan membuat file baru (tidak menimpa), jadi manifest checksum
+load_to_db.py tetap berlaku per file.
+
+Contoh (dari root proyek):
+    python dataset_store.py import tokopedia_cleaned.csv blibli_cleaned.csv indomaret_cleaned.csv
+    python dataset_store.py show --platform tokopedia --date 2025-09-01
+"""
+import argparse
+import os
+import uuid
+from datetime import date
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+except ImportError:  # opsional: tanpa pyarrow hanya jalur CSV yang tersedia
+    pa = None
+    ds = None
+
+from normalization import extract_pack_size, normalize_price_columns
+
+DEFAULT_DATASET_DIR = os.getenv("DATASET_DIR", "dataset")
+LOCAL_TZ = "Asia/Jakarta"   # Batas hari untuk partisi scrape_date
+
+if pa is not None:
+    DATASET_SCHEMA = pa.schema([
+        ('id', pa.int64()),
+        ('name', pa.string()),
+        ('price', pa.int64()),
+        ('original_price', pa.int64()),
+        ('discount_percentage', pa.int32()),
+        ('detail', pa.string()),
+        ('productmasterid', pa.int64()),
+        ('createdat', pa.timestamp('us', tz=LOCAL_TZ)),
+        ('platform', pa.string()),
+        ('scrape_date', pa.date32()),
+    ])
+    PARTITIONING = ds.partitioning(
+        pa.schema([('platform', pa.string()), ('scrape_date', pa.date32())]), flavor='hive'
+    )
+    # Integer Parquet dibaca sebagai Int64/Int32 nullable, bukan float64 dengan NaN
+    _PANDAS_TYPES = {pa.int64(): pd.Int64Dtype(), pa.int32(): pd.Int32Dtype()}
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise ImportError("Dataset Parquet membutuhkan paket pyarrow (pip install pyarrow).")
+
+
+def to_table(df):
+    """
+    Mengubah DataFrame berformat *_cleaned.csv (atau record scraper yang sudah
+    punya `platform`) menjadi pyarrow.Table sesuai DATASET_SCHEMA.
+    Kolom yang tidak ada diisi NULL; `detail` diambil dari nama jika kosong.
+    """
+    _require_pyarrow()
+    frame = normalize_price_columns(df)
+    for column in ('id', 'productmasterid'):
+        if column in frame.columns:
+            frame[column] = pd.to_numeric(frame[column], errors='coerce').astype('Int64')
+        else:
+            frame[column] = pd.array([pd.NA] * len(frame), dtype='Int64')
+    if 'detail' not in frame.columns:
+        frame['detail'] = extract_pack_size(frame['name']).values
+    created = pd.to_datetime(frame['createdat'], utc=True).dt.tz_convert(LOCAL_TZ)
+    frame['createdat'] = created.dt.floor('us')
+    frame['scrape_date'] = created.dt.date
+    frame['platform'] = frame['platform'].astype(str)
+    frame['name'] = frame['name'].astype('string')
+    frame['detail'] = frame['detail'].astype('string')
+    frame['discount_percentage'] = frame['discount_percentage'].astype('Int32')
+    return pa.Table.from_pandas(frame[DATASET_SCHEMA.names], schema=DATASET_SCHEMA, preserve_index=False)
+
+
+def write_dataset(df, root=DEFAULT_DATASET_DIR):
+    """
+    Menambahkan DataFrame ke dataset (file baru per partisi yang tersentuh).
+    Mengembalikan daftar path file yang ditulis.
+    """
+    _require_pyarrow()
+    if df.empty:
+        return []
+    written = []
+    ds.write_dataset(
+        to_table(df), root,
+        format='parquet',
+        partitioning=PARTITIONING,
+        basename_template=f"part-{uuid.uuid4().hex}-{{i}}.parquet",
+        existing_data_behavior='overwrite_or_ignore',
+        file_visitor=lambda written_file: written.append(written_file.path),
+    )
+    return sorted(written)
+
+
+def write_records(records, platform, root=DEFAULT_DATASET_DIR):
+    """Menulis record hasil scraper (name, price, original_price, createdat) untuk satu platform."""
+    if not records:
+        return []
+    return write_dataset(pd.DataFrame(records).assign(platform=platform), root)
+
+
+def build_filter(platforms=None, start_date=None, end_date=None):
+    """Ekspresi filter partisi (platform IN ..., start_date <= scrape_date <= end_date)."""
+    _require_pyarrow()
+    conditions = []
+    if platforms:
+        conditions.append(ds.field('platform').isin(list(platforms)))
+    if start_date is not None:
+        conditions.append(ds.field('scrape_date') >= pa.scalar(start_date, pa.date32()))
+    if end_date is not None:
+        conditions.append(ds.field('scrape_date') <= pa.scalar(end_date, pa.date32()))
+    expression = None
+    for condition in conditions:
+        expression = condition if expression is None else expression & condition
+    return expression
+
+
+def open_dataset(source=DEFAULT_DATASET_DIR, root=None):
+    """pyarrow Dataset dari folder dataset atau daftar file di bawah `root`."""
+    _require_pyarrow()
+    if isinstance(source, (list, tuple)):
+        return ds.dataset(list(source), format='parquet', partitioning=PARTITIONING,
+                          partition_base_dir=root or DEFAULT_DATASET_DIR)
+    return ds.dataset(source, format='parquet', partitioning=PARTITIONING)
+
+
+def dataset_files(root=DEFAULT_DATASET_DIR, platforms=None, start_date=None, end_date=None):
+    """Path file Parquet di partisi yang lolos filter (tanpa membuka file lain)."""
+    if not os.path.isdir(root):
+        return []
+    dataset = open_dataset(root)
+    fragments = dataset.get_fragments(filter=build_filter(platforms, start_date, end_date))
+    return sorted(fragment.path for fragment in fragments)
+
+
+def read_dataset(source=DEFAULT_DATASET_DIR, columns=None, platforms=None, start_date=None, end_date=None,
+                 root=None):
+    """
+    Membaca dataset ke DataFrame bertipe: harga Int64, `platform` kategori,
+    `createdat` datetime ber-timezone. `columns` membatasi kolom yang dibaca dari
+    file; filter platform/tanggal memangkas partisi sebelum file dibuka.
+    `source` boleh folder dataset atau daftar file (dengan `root` sebagai folder dasarnya).
+    """
+    dataset = open_dataset(source, root)
+    table = dataset.to_table(columns=columns, filter=build_filter(platforms, start_date, end_date))
+    df = table.to_pandas(types_mapper=_PANDAS_TYPES.get)
+    if 'platform' in df.columns:
+        df['platform'] = df['platform'].astype('category')
+    return df
+
+
+def import_csv(paths, root=DEFAULT_DATASET_DIR):
+    """Migrasi file *_cleaned.csv yang sudah ada ke dataset Parquet."""
+    written = []
+    for path in paths:
+        written.extend(write_dataset(pd.read_csv(path), root))
+        print(f"Imported {path}")
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Kelola dataset listing Parquet (partisi platform/tanggal).")
+    parser.add_argument("--root", default=DEFAULT_DATASET_DIR, help="Folder dataset.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    import_parser = commands.add_parser("import", help="Salin file *_cleaned.csv ke dataset.")
+    import_parser.add_argument("files", nargs="+")
+    show_parser = commands.add_parser("show", help="Ringkasan isi dataset (dengan filter partisi).")
+    show_parser.add_argument("--platform", nargs="+", default=None)
+    show_parser.add_argument("--date", type=date.fromisoformat, default=None, help="Satu tanggal scrape (YYYY-MM-DD).")
+    args = parser.parse_args()
+
+    if args.command == "import":
+        written = import_csv(args.files, args.root)
+        print(f"Wrote {len(written)} Parquet files under {args.root}")
+    else:
+        files = dataset_files(args.root, args.platform, args.date, args.date)
+        df = read_dataset(args.root, columns=['platform', 'scrape_date', 'price'],
+                          platforms=args.platform, start_date=args.date, end_date=args.date)
+        print(f"{len(files)} files, {len(df)} rows")
+        if not df.empty:
+            print(df.groupby(['platform', 'scrape_date'], observed=True)['price']
+                    .agg(['count', 'min', 'max']).to_string())
+
+
+if __name__ == "__main__":
+    main()
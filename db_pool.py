@@ -0,0 +1,132 @@
+"""
+Pool koneksi PostgreSQL bersama untuk API.
+
+Membungkus `psycopg2.pool.ThreadedConnectionPool` dengan batas waktu acquire
+(pool bawaan psycopg2 langsung melempar error saat penuh) dan statistik
+pemakaian agar ukuran pool bisa disesuaikan dengan beban.
+"""
+import threading
+import time
+from contextlib import contextmanager
+
+import psycopg2
+from psycopg2 import pool as pg_pool
+
+
+class PoolTimeoutError(Exception):
+    """Dilempar jika tidak ada koneksi yang tersedia dalam batas waktu acquire."""
+
+
+class DatabasePool:
+    """Pool koneksi thread-safe dengan batas ukuran, timeout, dan statistik."""
+
+    def __init__(self, min_size, max_size, acquire_timeout, acquire_observer=None, **connect_kwargs):
+        """`acquire_observer(seconds)` opsional dipanggil setiap acquire berhasil (mis. histogram latensi)."""
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError("Ukuran pool tidak valid: butuh 0 <= min_size <= max_size dan max_size >= 1.")
+        self.min_size = min_size
+        self.max_size = max_size
+        self.acquire_timeout = acquire_timeout
+        self._connect_kwargs = connect_kwargs
+        self._acquire_observer = acquire_observer
+        self._pool = None
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._lock = threading.Lock()
+        self._in_use = 0
+        self._waiting = 0
+        self._acquired_total = 0
+        self._timeouts_total = 0
+        self._acquire_seconds_total = 0.0
+        self._acquire_seconds_max = 0.0
+
+    def open(self):
+        """Membuka pool dan menyiapkan `min_size` koneksi awal."""
+        if self._pool is None:
+            self._pool = pg_pool.ThreadedConnectionPool(
+                self.min_size, self.max_size, **self._connect_kwargs
+            )
+
+    def close(self):
+        """Menutup semua koneksi di dalam pool."""
+        if self._pool is not None:
+            self._pool.closeall()
+            self._pool = None
+
+    def acquire(self):
+        """Mengambil satu koneksi, menunggu maksimal `acquire_timeout` detik."""
+        if self._pool is None:
+            raise RuntimeError("Pool koneksi belum dibuka.")
+
+        start = time.perf_counter()
+        with self._lock:
+            self._waiting += 1
+        acquired = self._slots.acquire(timeout=self.acquire_timeout)
+        with self._lock:
+            self._waiting -= 1
+            if not acquired:
+                self._timeouts_total += 1
+        if not acquired:
+            raise PoolTimeoutError(
+                f"Tidak ada koneksi database yang tersedia dalam {self.acquire_timeout} detik."
+            )
+
+        try:
+            conn = self._pool.getconn()
+        except Exception:
+            self._slots.release()
+            raise
+
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self._in_use += 1
+            self._acquired_total += 1
+            self._acquire_seconds_total += elapsed
+            self._acquire_seconds_max = max(self._acquire_seconds_max, elapsed)
+        if self._acquire_observer is not None:
+            self._acquire_observer(elapsed)
+        return conn
+
+    def release(self, conn, discard=False):
+        """Mengembalikan koneksi ke pool; koneksi rusak ditutup, bukan dipakai ulang."""
+        try:
+            if not discard and not conn.closed:
+                try:
+                    # Akhiri transaksi baca yang dibuka psycopg2 secara implisit
+                    conn.rollback()
+                except psycopg2.Error:
+                    discard = True
+            self._pool.putconn(conn, close=discard or bool(conn.closed))
+        finally:
+            with self._lock:
+                self._in_use -= 1
+            self._slots.release()
+
+    @contextmanager
+    def connection(self):
+        """Context manager: `with pool.connection() as conn: ...`."""
+        conn = self.acquire()
+        broken = False
+        try:
+            yield conn
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            broken = True
+            raise
+        finally:
+            self.release(conn, discard=broken)
+
+    def stats(self):
+        """Snapshot statistik pool untuk monitoring dan penentuan ukuran."""
+        with self._lock:
+            acquired = self._acquired_total
+            return {
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "acquire_timeout_seconds": self.acquire_timeout,
+                "in_use": self._in_use,
+                "idle": len(self._pool._pool) if self._pool is not None else 0,
+                "waiting": self._waiting,
+                "acquired_total": acquired,
+                "timeouts_total": self._timeouts_total,
+                "acquire_latency_avg_ms": (self._acquire_seconds_total / acquired * 1000) if acquired else 0.0,
+                "acquire_latency_max_ms": self._acquire_seconds_max * 1000,
+            }
@@ -0,0 +1,229 @@
+"""
+Instrumentasi latensi untuk API dan batch job.
+
+- `Histogram`: histogram Prometheus ringan (bucket tetap, thread-safe) yang
+  dirender ke format teks untuk endpoint `/metrics`.
+- `TimedCursor`: cursor psycopg2 (dipasang lewat `cursor_factory`) yang mencatat
+  durasi setiap execute/COPY per jenis statement + tabel.
+- `RunReport`: timer per tahap untuk load_to_db.py, process_data.py, dan
+  ml_recommender.py, dengan laporan JSON (tahap + ringkasan query).
+
+Overhead per observasi hanya satu `perf_counter`, bisect, dan lock singkat,
+sehingga aman dibiarkan aktif di produksi.
+"""
+import bisect
+import json
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from psycopg2.extensions import cursor as _pg_cursor
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+RUN_REPORT_DIR_ENV = "RUN_REPORT_DIR"   # Jika diisi, batch job menulis laporan JSON ke folder ini
+
+_REGISTRY = []
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values)) + (list(extra.items()) if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+class Histogram:
+    """Histogram dengan label; kompatibel dengan format teks Prometheus."""
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}   # label values -> [count per bucket..., count total, sum]
+        self._lock = threading.Lock()
+        _REGISTRY.append(self)
+
+    def observe(self, seconds, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            if index < len(self.buckets):
+                series[index] += 1
+            series[-2] += 1          # count (termasuk +Inf)
+            series[-1] += seconds    # sum
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def summary(self):
+        """{label string: {"count", "sum_seconds", "avg_ms"}} untuk laporan JSON."""
+        with self._lock:
+            items = [(key, series[-2], series[-1]) for key, series in self._series.items()]
+        return {
+            ",".join(key) or self.name: {
+                "count": count,
+                "sum_seconds": round(total, 6),
+                "avg_ms": round(total / count * 1000, 3) if count else None,
+            }
+            for key, count, total in items
+        }
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = {key: list(series) for key, series in self._series.items()}
+        for key, series in sorted(snapshot.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, {"le": repr(float(bound))})
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key, {"le": "+Inf"})
+            lines.append(f"{self.name}_bucket{labels} {series[-2]}")
+            plain = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_count{plain} {series[-2]}")
+            lines.append(f"{self.name}_sum{plain} {series[-1]}")
+        return "\n".join(lines)
+
+
+def render_gauges(prefix, values, documentation=""):
+    """Merender dict angka (mis. db_pool.stats()) sebagai gauge Prometheus."""
+    lines = []
+    for key, value in values.items():
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            continue
+        name = f"{prefix}_{key}"
+        lines.append(f"# HELP {name} {documentation or key}")
+        lines.append(f"# TYPE {name} gauge")
+        lines.append(f"{name} {value}")
+    return "\n".join(lines)
+
+
+def render_metrics(*extra_blocks):
+    """Seluruh histogram terdaftar (+ blok tambahan) dalam format teks Prometheus."""
+    blocks = [h.render() for h in _REGISTRY] + [b for b in extra_blocks if b]
+    return "\n".join(blocks) + "\n"
+
+
+# --- METRIK BERSAMA ---
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "Durasi request HTTP per route.", ("method", "route", "status"))
+API_STAGE_SECONDS = Histogram(
+    "api_stage_duration_seconds", "Durasi tahap di dalam request API (acquire, query, serialize).", ("stage",))
+DB_QUERY_SECONDS = Histogram(
+    "db_query_duration_seconds", "Durasi eksekusi query per jenis statement dan tabel.", ("statement",))
+JOB_STAGE_SECONDS = Histogram(
+    "job_stage_duration_seconds", "Durasi tahap batch job.", ("job", "stage"),
+    buckets=(0.01, 0.1, 0.5, 1, 5, 10, 30, 60, 300, 900, 1800, 3600))
+
+_STATEMENT_PATTERN = re.compile(
+    r"^\s*(\w+)(?:.*?\b(?:FROM|INTO|UPDATE|TABLE)\s+(?:IF\s+(?:NOT\s+)?EXISTS\s+)?([\w.\"]+))?",
+    re.IGNORECASE | re.DOTALL,
+)
+_label_cache = {}
+
+
+def statement_label(query):
+    """Label berkardinalitas rendah dari SQL, mis. 'SELECT product' atau 'COPY staging_product'."""
+    if isinstance(query, bytes):
+        query = query.decode("utf-8", "replace")
+    elif not isinstance(query, str):
+        query = str(query)
+    label = _label_cache.get(query)
+    if label is None:
+        match = _STATEMENT_PATTERN.match(query[:500])
+        if match is None:
+            label = "OTHER"
+        else:
+            label = match.group(1).upper() + (f" {match.group(2).strip(chr(34))}" if match.group(2) else "")
+        if len(_label_cache) < 2048:
+            _label_cache[query] = label
+    return label
+
+
+class TimedCursor(_pg_cursor):
+    """Cursor psycopg2 yang mencatat durasi execute/executemany/copy ke DB_QUERY_SECONDS."""
+
+    def execute(self, query, vars=None):
+        start = time.perf_counter()
+        try:
+            return super().execute(query, vars)
+        finally:
+            DB_QUERY_SECONDS.observe(time.perf_counter() - start, statement=statement_label(query))
+
+    def executemany(self, query, vars_list):
+        start = time.perf_counter()
+        try:
+            return super().executemany(query, vars_list)
+        finally:
+            DB_QUERY_SECONDS.observe(time.perf_counter() - start, statement=statement_label(query))
+
+    def copy_expert(self, sql, file, size=8192):
+        start = time.perf_counter()
+        try:
+            return super().copy_expert(sql, file, size)
+        finally:
+            DB_QUERY_SECONDS.observe(time.perf_counter() - start, statement=statement_label(sql))
+
+
+class RunReport:
+    """Timer tahap untuk batch job, ditulis sebagai laporan JSON di akhir run."""
+
+    def __init__(self, job):
+        self.job = job
+        self.started_at = datetime.now(timezone.utc)
+        self._start = time.perf_counter()
+        self.stages = []
+        self.status = "running"
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            JOB_STAGE_SECONDS.observe(seconds, job=self.job, stage=name)
+            self.stages.append({"stage": name, "seconds": round(seconds, 4)})
+
+    def finish(self, status="ok", path=None):
+        """
+        Menutup laporan dan mencetak ringkasan tahap. Laporan JSON ditulis ke `path`
+        atau ke folder RUN_REPORT_DIR jika diset. Mengembalikan dict laporan.
+        """
+        self.status = status
+        report = {
+            "job": self.job,
+            "status": status,
+            "started_at": self.started_at.isoformat(),
+            "total_seconds": round(time.perf_counter() - self._start, 4),
+            "stages": self.stages,
+            "queries": DB_QUERY_SECONDS.summary(),
+        }
+        print(f"Run report ({self.job}, {status}): " + ", ".join(
+            f"{s['stage']}={s['seconds']:.2f}s" for s in self.stages) + f", total={report['total_seconds']:.2f}s")
+        report_dir = os.environ.get(RUN_REPORT_DIR_ENV)
+        if path is None and report_dir:
+            os.makedirs(report_dir, exist_ok=True)
+            path = os.path.join(report_dir, f"{self.job}_{self.started_at.strftime('%Y%m%d_%H%M%S')}.json")
+        if path:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+            print(f"Run report written to {path}")
+        return report
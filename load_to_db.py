@@ -1,8 +1,22 @@
+import argparse
+import hashlib
+import sys
+from datetime import date
 import pandas as pd
 import psycopg2
 from psycopg2 import sql
 import glob
 
+import dataset_store
+import price_aggregates
+import price_history
+from instrumentation import RunReport, TimedCursor
+from master_matching import MasterAssigner, assign_master_ids
+import schema
+from response_cache import notify_invalidation
+from bulk_load import bulk_insert, print_throughput_report
+from normalization import normalize_price_columns
+
 # --- PENGATURAN KONEKSI DATABASE ---
 DB_NAME = "mydatabase"
 DB_USER = "myuser"
@@ -10,129 +24,361 @@ DB_PASS = "mypassword"
 DB_HOST = "localhost"
 DB_PORT = "5432"
 
-def create_tables(conn):
+def create_tables(conn, drop_existing=True):
     """
     Membuat 3 tabel (product_master, product, price_recommendation)
-    sesuai dengan skema yang diminta.
+    sesuai dengan skema yang diminta, plus tabel manifest file yang sudah dimuat.
+    DDL lengkap (index, partisi bulanan product) ada di schema.py.
+
+    drop_existing=False dipakai mode incremental: tabel yang sudah ada
+    (beserta id dan rekomendasinya) dipertahankan dan di-upgrade bila perlu.
     """
     print("Creating the 3-table schema...")
-    with conn.cursor() as cur:
-        # Hapus tabel lama dengan urutan yang benar untuk menghindari error foreign key
-        cur.execute("DROP TABLE IF EXISTS price_recommendation;")
-        cur.execute("DROP TABLE IF EXISTS product;")
-        cur.execute("DROP TABLE IF EXISTS product_master;")
-
-        # 1. Membuat tabel product_master
-        cur.execute("""
-            CREATE TABLE product_master (
-                id INT PRIMARY KEY,
-                type VARCHAR(100),
-                name VARCHAR(255),
-                detail TEXT
-            );
-        """)
-        
-        # 2. Membuat tabel product
-        cur.execute("""
-            CREATE TABLE product (
-                id INT PRIMARY KEY,
-                name VARCHAR(255),
-                price INT,
-                original_price VARCHAR(50),
-                discount_percentage VARCHAR(50),
-                detail VARCHAR(100),
-                platform VARCHAR(50),
-                product_master_id INT,
-                created_at TIMESTAMPTZ,
-                FOREIGN KEY (product_master_id) REFERENCES product_master (id)
-            );
-        """)
-
-        # 3. Membuat tabel price_recommendation
-        cur.execute("""
-            CREATE TABLE price_recommendation (
-                product_master_id INT,
-                price INT,
-                date DATE,
-                PRIMARY KEY (product_master_id, date),
-                FOREIGN KEY (product_master_id) REFERENCES product_master (id)
-            );
-        """)
+    if drop_existing:
+        schema.create_schema(conn, drop_existing=True)
+    else:
+        schema.migrate(conn)
+        price_history.ensure_listings(conn)
     print("Schema created successfully: product_master, product, price_recommendation.")
 
-def insert_product_master_data(conn, df):
-    """Mengisi tabel product_master dengan data unik."""
+PRODUCT_MASTER_COLUMNS = ['id', 'type', 'name', 'detail']
+PRODUCT_COLUMNS = ['id', 'name', 'price', 'original_price', 'discount_percentage',
+                   'detail', 'platform', 'product_master_id', 'created_at']
+
+def insert_product_master_data(conn, df, method="auto"):
+    """Mengisi tabel product_master dengan data unik secara bulk."""
     print("Inserting data into 'product_master' table...")
     # Ambil baris unik berdasarkan productmasterid
-    df_master = df.drop_duplicates(subset=['productmasterid']).copy()
-    
+    df_master = df.drop_duplicates(subset=['productmasterid'])
+    frame = pd.DataFrame({
+        'id': df_master['productmasterid'].values,
+        'type': 'Consumer Goods',   # Contoh tipe statis
+        'name': df_master['name'].values,  # Ambil nama representatif
+        'detail': ("Master data for product group " + df_master['productmasterid'].astype(str)).values,  # Contoh detail statis
+    })
+    stats = bulk_insert(conn, frame, 'product_master', PRODUCT_MASTER_COLUMNS, method=method)
+    print(f"Inserted {stats['rows']} rows into product_master.")
+    return stats
+
+def insert_product_data(conn, df, method="auto"):
+    """Mengisi tabel product dengan semua data individual secara bulk."""
+    print("Inserting data into 'product' table...")
+    frame = df.rename(columns={'productmasterid': 'product_master_id', 'createdat': 'created_at'})
+    schema.ensure_partitions_for(conn, frame['created_at'])
+    stats = bulk_insert(conn, frame, 'product', PRODUCT_COLUMNS, method=method)
+    print(f"Inserted {stats['rows']} rows into product.")
+    return stats
+
+NATURAL_KEY = ['platform', 'name', 'detail', 'createdat']
+# Kolom yang dibaca dari dataset Parquet (id dibuat ulang / dari sequence)
+SOURCE_COLUMNS = ['name', 'price', 'original_price', 'discount_percentage',
+                  'detail', 'platform', 'productmasterid', 'createdat']
+
+def find_source_files(dataset_dir=None, platforms=None, start_date=None, end_date=None):
+    """
+    File sumber yang akan dimuat: '*_cleaned.csv' di direktori kerja, atau file
+    Parquet di partisi dataset yang lolos filter platform/tanggal jika `dataset_dir` diisi.
+    """
+    if dataset_dir:
+        return dataset_store.dataset_files(dataset_dir, platforms, start_date, end_date)
+    return sorted(glob.glob('*_cleaned.csv'))
+
+def read_source_files(files, dataset_dir=None):
+    """Satu DataFrame per file; Parquet dibaca hanya kolom yang dibutuhkan dengan tipe dari skema dataset."""
+    if dataset_dir:
+        return [dataset_store.read_dataset([f], columns=SOURCE_COLUMNS, root=dataset_dir) for f in files]
+    return [pd.read_csv(f) for f in files]
+
+def file_checksum(path):
+    """Menghitung SHA-256 isi file (dibaca per blok agar hemat memori)."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def find_unloaded_files(conn, files):
+    """Mengembalikan pasangan (file, checksum) yang belum tercatat di load_manifest."""
+    checksums = {f: file_checksum(f) for f in files}
+    with conn.cursor() as cur:
+        cur.execute("SELECT checksum FROM load_manifest WHERE checksum = ANY(%s);", (list(checksums.values()),))
+        loaded = {row[0] for row in cur.fetchall()}
+    return [(f, c) for f, c in checksums.items() if c not in loaded]
+
+def record_loaded_files(conn, entries):
+    """Mencatat file (file, checksum, jumlah baris) yang berhasil dimuat ke load_manifest."""
     with conn.cursor() as cur:
-        for _, row in df_master.iterrows():
+        for file_name, checksum, row_count in entries:
             cur.execute(
                 """
-                INSERT INTO product_master (id, type, name, detail)
-                VALUES (%s, %s, %s, %s)
+                INSERT INTO load_manifest (checksum, file_name, row_count)
+                VALUES (%s, %s, %s)
+                ON CONFLICT (checksum) DO NOTHING;
                 """,
-                (
-                    row['productmasterid'],
-                    'Consumer Goods', # Contoh tipe statis
-                    row['name'],      # Ambil nama representatif
-                    f"Master data for product group {row['productmasterid']}" # Contoh detail statis
-                )
+                (checksum, file_name, row_count)
             )
-    print(f"Inserted {len(df_master)} rows into product_master.")
 
-def insert_product_data(conn, df):
-    """Mengisi tabel product dengan semua data individual."""
-    print("Inserting data into 'product' table...")
+def upsert_product_master_data(conn, df, method="auto"):
+    """Menambahkan product_master baru; master yang sudah ada (dan namanya) dibiarkan."""
+    print("Upserting data into 'product_master' table...")
+    df_master = df.drop_duplicates(subset=['productmasterid'])
+    frame = pd.DataFrame({
+        'id': df_master['productmasterid'].values,
+        'type': 'Consumer Goods',
+        'name': df_master['name'].values,
+        'detail': ("Master data for product group " + df_master['productmasterid'].astype(str)).values,
+    })
     with conn.cursor() as cur:
-        for _, row in df.iterrows():
-            cur.execute(
-                """
-                INSERT INTO product (id, name, price, original_price, discount_percentage, detail, platform, product_master_id, created_at)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-                """,
-                (
-                    row['id'], row['name'], row['price'], row['original_price'],
-                    row['discount_percentage'], row['detail'], row['platform'],
-                    row['productmasterid'], row['createdat']
-                )
+        cur.execute("CREATE TEMP TABLE staging_product_master (LIKE product_master) ON COMMIT DROP;")
+    stats = bulk_insert(conn, frame, 'staging_product_master', PRODUCT_MASTER_COLUMNS, method=method)
+    with conn.cursor() as cur:
+        cur.execute("""
+            INSERT INTO product_master (id, type, name, detail)
+            SELECT id, type, name, detail FROM staging_product_master
+            ON CONFLICT (id) DO NOTHING;
+        """)
+        inserted = cur.rowcount
+    print(f"Inserted {inserted} new rows into product_master ({len(frame) - inserted} already present).")
+    return stats
+
+def upsert_product_data(conn, df, method="auto"):
+    """
+    Upsert listing berdasarkan natural key (platform, name, detail, createdat).
+    Listing baru mendapat id dari sequence; listing lama mempertahankan id-nya
+    dan hanya di-update jika harganya berubah.
+    """
+    print("Upserting data into 'product' table...")
+    frame = (df.drop_duplicates(subset=NATURAL_KEY, keep='last')
+               .rename(columns={'productmasterid': 'product_master_id', 'createdat': 'created_at'}))
+    staging_columns = [c for c in PRODUCT_COLUMNS if c != 'id']
+    schema.ensure_partitions_for(conn, frame['created_at'])
+    with conn.cursor() as cur:
+        cur.execute("CREATE SEQUENCE IF NOT EXISTS product_id_seq OWNED BY product.id;")
+        cur.execute("SELECT setval('product_id_seq', COALESCE((SELECT MAX(id) FROM product), 0) + 1, false);")
+        cur.execute("""
+            CREATE TEMP TABLE staging_product ON COMMIT DROP AS
+            SELECT name, price, original_price, discount_percentage, detail, platform,
+                   product_master_id, created_at
+            FROM product WITH NO DATA;
+        """)
+    stats = bulk_insert(conn, frame, 'staging_product', staging_columns, method=method)
+    # Dicatat sebelum upsert agar master lama dari listing yang pindah master ikut dihitung ulang
+    price_aggregates.collect_touched_keys(conn, 'staging_product')
+    with conn.cursor() as cur:
+        cur.execute("""
+            WITH upserted AS (
+                INSERT INTO product (id, name, price, original_price, discount_percentage,
+                                     detail, platform, product_master_id, created_at)
+                SELECT nextval('product_id_seq'), name, price, original_price, discount_percentage,
+                       detail, platform, product_master_id, created_at
+                FROM staging_product
+                ON CONFLICT ON CONSTRAINT product_natural_key DO UPDATE SET
+                    price = EXCLUDED.price,
+                    original_price = EXCLUDED.original_price,
+                    discount_percentage = EXCLUDED.discount_percentage,
+                    product_master_id = EXCLUDED.product_master_id
+                WHERE (product.price, product.original_price, product.discount_percentage, product.product_master_id)
+                      IS DISTINCT FROM
+                      (EXCLUDED.price, EXCLUDED.original_price, EXCLUDED.discount_percentage, EXCLUDED.product_master_id)
+                RETURNING (xmax = 0) AS inserted
             )
-    print(f"Inserted {len(df)} rows into product.")
+            SELECT COUNT(*) FILTER (WHERE inserted), COUNT(*) FILTER (WHERE NOT inserted) FROM upserted;
+        """)
+        inserted, updated = cur.fetchone()
+    unchanged = len(frame) - inserted - updated
+    print(f"Product upsert: {inserted} inserted, {updated} updated, {unchanged} unchanged.")
+    price_history.upsert_listings(conn, 'staging_product')
+    price_aggregates.refresh_touched(conn)
+    return stats
+
+STORAGE_MODES = ("rows", "changes")
+
+def upsert_price_changes(conn, df, method="auto"):
+    """
+    Mode penyimpanan `changes`: observasi dicatat lewat price_history.py sebagai
+    interval harga per listing (baris baru hanya jika harga/diskon berubah),
+    dan agregat harga diperbarui dengan delta. Tabel product tidak ditulis.
+    """
+    print("Recording price changes into 'listing_price_interval'...")
+    frame = (df.drop_duplicates(subset=NATURAL_KEY, keep='last')
+               .rename(columns={'productmasterid': 'product_master_id', 'createdat': 'created_at'}))
+    staging_columns = [c for c in PRODUCT_COLUMNS if c != 'id']
+    with conn.cursor() as cur:
+        cur.execute("""
+            CREATE TEMP TABLE staging_price_observation ON COMMIT DROP AS
+            SELECT name, price, original_price, discount_percentage, detail, platform,
+                   product_master_id, created_at
+            FROM product WITH NO DATA;
+        """)
+    stats = bulk_insert(conn, frame, 'staging_price_observation', staging_columns, method=method)
+    price_history.record_observations(conn, 'staging_price_observation')
+    with conn.cursor() as cur:
+        cur.execute("DROP TABLE staging_price_observation;")
+    return stats
+
+def fill_master_ids(df, conn=None):
+    """
+    Mengisi productmasterid yang kosong (atau kolomnya tidak ada) lewat master_matching.
+    Tanpa `conn` dicocokkan di dalam data ini saja (mode full); dengan `conn`
+    dicocokkan juga terhadap listing yang sudah ada di database (tabel `listing`,
+    mode incremental). Id yang sudah terisi tidak diubah.
+    """
+    if 'productmasterid' not in df.columns:
+        df = df.assign(productmasterid=pd.NA)
+    missing = pd.to_numeric(df['productmasterid'], errors='coerce').isna()
+    if not missing.any():
+        return df
+    print(f"Matching {int(missing.sum())} listings without productmasterid...")
+    df = df.copy()
+    if conn is None:
+        df['productmasterid'] = assign_master_ids(df).values
+    else:
+        df['productmasterid'] = pd.to_numeric(df['productmasterid'], errors='coerce').astype('Int64')
+        df.loc[missing, 'productmasterid'] = MasterAssigner(conn).assign(df.loc[missing]).values
+        df['productmasterid'] = df['productmasterid'].astype('int64')
+    return df
+
+def load_full(conn, processed_files, method="auto", report=None, dataset_dir=None, storage="rows"):
+    """
+    Mode penuh: hapus semua tabel lalu muat ulang seluruh riwayat dari awal.
+    storage="changes" menyimpan interval harga (price_history.py) alih-alih satu baris per observasi.
+    """
+    report = report or RunReport("load_full")
+    print(f"Menggabungkan file: {', '.join(processed_files)}")
+    with report.stage("read_csv"):
+        frames = read_source_files(processed_files, dataset_dir)
+        df_combined = normalize_price_columns(pd.concat(frames, ignore_index=True))
+    with report.stage("match_masters"):
+        df_combined = fill_master_ids(df_combined)
+    # Observasi duplikat (natural key sama) akan melanggar constraint product_natural_key
+    df_combined = df_combined.drop_duplicates(subset=NATURAL_KEY, keep='last').reset_index(drop=True)
+    # Membuat ulang ID unik untuk data gabungan
+    df_combined['id'] = range(1, len(df_combined) + 1)
+    print(f"Data gabungan dari semua file. Total baris: {len(df_combined)}")
+
+    with report.stage("create_schema"):
+        create_tables(conn)
+    with report.stage("insert"):
+        stats = [insert_product_master_data(conn, df_combined, method=method)]
+        if storage == "changes":
+            # Agregat ikut terisi lewat delta saat observasi dicatat
+            stats.append(upsert_price_changes(conn, df_combined, method=method))
+        else:
+            stats.append(insert_product_data(conn, df_combined, method=method))
+    if storage != "changes":
+        with report.stage("aggregates"):
+            price_aggregates.rebuild_aggregates(conn)
+            price_history.upsert_listings(conn, 'product')
+    record_loaded_files(conn, [(f, file_checksum(f), len(df)) for f, df in zip(processed_files, frames)])
+    return stats
+
+def load_incremental(conn, processed_files, method="auto", report=None, dataset_dir=None, storage="rows"):
+    """Mode incremental: hanya file baru yang dibaca, dan hanya listing baru/berubah yang ditulis."""
+    report = report or RunReport("load_incremental")
+    with report.stage("migrate_schema"):
+        create_tables(conn, drop_existing=False)
+    with report.stage("checksum"):
+        new_files = find_unloaded_files(conn, processed_files)
+    skipped = len(processed_files) - len(new_files)
+    if skipped:
+        print(f"Melewati {skipped} file yang sudah pernah dimuat (checksum sama).")
+    if not new_files:
+        print("Tidak ada file baru untuk dimuat.")
+        return []
 
-def main():
-    """Fungsi utama untuk menjalankan seluruh proses."""
+    print(f"Memuat file baru: {', '.join(f for f, _ in new_files)}")
+    with report.stage("read_csv"):
+        frames = read_source_files([f for f, _ in new_files], dataset_dir)
+        df_delta = normalize_price_columns(pd.concat(frames, ignore_index=True))
+    with report.stage("match_masters"):
+        df_delta = fill_master_ids(df_delta, conn)
+    print(f"Total baris delta: {len(df_delta)}")
+
+    with report.stage("upsert"):
+        stats = [upsert_product_master_data(conn, df_delta, method=method)]
+        if storage == "changes":
+            stats.append(upsert_price_changes(conn, df_delta, method=method))
+        else:
+            stats.append(upsert_product_data(conn, df_delta, method=method))
+    record_loaded_files(conn, [(f, c, len(df)) for (f, c), df in zip(new_files, frames)])
+    return stats
+
+def main(mode="full", method="auto", dataset_dir=None, platforms=None, start_date=None, end_date=None,
+         storage="rows"):
+    """
+    Fungsi utama untuk menjalankan seluruh proses.
+
+    mode: "full" (drop + muat ulang semua) atau "incremental" (upsert delta saja).
+    method: "auto" (COPY dengan fallback), "copy", atau "values" (execute_values).
+    dataset_dir: baca dari dataset Parquet (dataset_store.py) alih-alih '*_cleaned.csv',
+    dengan filter partisi platforms/start_date/end_date (hanya untuk mode incremental).
+    storage: "rows" (satu baris product per observasi) atau "changes" (interval harga, price_history.py).
+    Mengembalikan status run ("ok" / "failed"), sama dengan yang dicatat di laporan run.
+    """
     conn = None
+    report = RunReport(f"load_to_db_{mode}")
+    status = "failed"
     try:
-        # Cari dan gabungkan semua file yang sudah diproses
-        processed_files = glob.glob('*_cleaned.csv')
-        if not processed_files:
-            print("Error: Tidak ada file '*_cleaned.csv' yang ditemukan.")
-            return
+        # Mode full menghapus semua tabel: memuat ulang hanya sebagian partisi akan menghilangkan sisanya
+        if mode == "full" and (platforms or start_date or end_date):
+            print("Error: Filter partisi (--platform/--from/--to) hanya boleh dengan --mode incremental; "
+                  "mode full menghapus dan memuat ulang seluruh data.")
+            return status
 
-        print(f"Menggabungkan file: {', '.join(processed_files)}")
-        df_combined = pd.concat([pd.read_csv(f) for f in processed_files], ignore_index=True)
-        # Membuat ulang ID unik untuk data gabungan
-        df_combined['id'] = range(1, len(df_combined) + 1)
-        print(f"Data gabungan dari semua file. Total baris: {len(df_combined)}")
+        # Cari semua file yang sudah diproses
+        processed_files = find_source_files(dataset_dir, platforms, start_date, end_date)
+        if not processed_files:
+            print(f"Error: Tidak ada file sumber yang ditemukan ({dataset_dir or '*_cleaned.csv'}).")
+            return status
 
-        # Hubungkan ke DB
-        conn = psycopg2.connect(dbname=DB_NAME, user=DB_USER, password=DB_PASS, host=DB_HOST, port=DB_PORT)
+        # Hubungkan ke DB (cursor mencatat durasi setiap query untuk laporan run)
+        with report.stage("connect"):
+            conn = psycopg2.connect(dbname=DB_NAME, user=DB_USER, password=DB_PASS, host=DB_HOST, port=DB_PORT,
+                                    cursor_factory=TimedCursor)
         print("Successfully connected to the database.")
 
         # Jalankan semua fungsi
-        create_tables(conn)
-        insert_product_master_data(conn, df_combined)
-        insert_product_data(conn, df_combined)
+        if mode == "incremental":
+            stats = load_incremental(conn, processed_files, method=method, report=report,
+                                     dataset_dir=dataset_dir, storage=storage)
+        else:
+            stats = load_full(conn, processed_files, method=method, report=report,
+                              dataset_dir=dataset_dir, storage=storage)
 
-        conn.commit()
+        # Cache respons API dikosongkan saat transaksi ini di-commit
+        with report.stage("commit"):
+            notify_invalidation(conn)
+            conn.commit()
         print("Transactions committed to the database.")
+        status = "ok"
+        if stats:
+            print_throughput_report(stats)
 
     except Exception as e:
         print(f"An error occurred: {e}")
         if conn: conn.rollback()
     finally:
         if conn: conn.close(); print("Database connection closed.")
+        report.finish(status)
+    return status
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Memuat file *_cleaned.csv ke PostgreSQL.")
+    parser.add_argument("--mode", choices=["full", "incremental"], default="full",
+                        help="full: drop dan muat ulang semua data; incremental: upsert file/listing baru saja.")
+    parser.add_argument("--method", choices=["auto", "copy", "values"], default="auto",
+                        help="Jalur bulk insert: COPY dengan fallback (auto), COPY saja, atau execute_values saja.")
+    parser.add_argument("--storage", choices=STORAGE_MODES, default="rows",
+                        help="rows: satu baris product per observasi; changes: hanya perubahan harga (interval).")
+    parser.add_argument("--dataset-dir", default=None,
+                        help="Muat dari dataset Parquet (lihat dataset_store.py) alih-alih '*_cleaned.csv'.")
+    parser.add_argument("--platform", nargs="+", default=None, help="Filter partisi platform (dengan --dataset-dir, hanya --mode incremental).")
+    parser.add_argument("--from", dest="start_date", type=date.fromisoformat, default=None,
+                        help="Tanggal scrape awal YYYY-MM-DD (dengan --dataset-dir, hanya --mode incremental).")
+    parser.add_argument("--to", dest="end_date", type=date.fromisoformat, default=None,
+                        help="Tanggal scrape akhir YYYY-MM-DD (dengan --dataset-dir, hanya --mode incremental).")
+    args = parser.parse_args()
+    status = main(mode=args.mode, method=args.method, dataset_dir=args.dataset_dir,
+                  platforms=args.platform, start_date=args.start_date, end_date=args.end_date, storage=args.storage)
+    if status != "ok":
+        sys.exit(1)
\ No newline at end of file
@@ -1,8 +1,28 @@
+import os
+import json
+import time
+import uuid
 import psycopg2
-from fastapi import FastAPI, Depends, HTTPException, Header, Query
+from fastapi import FastAPI, Depends, HTTPException, Header, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.background import BackgroundTask
+from starlette.routing import Match
 from pydantic import BaseModel, Field
-from typing import List, Optional
-from datetime import date, datetime
+from typing import List, Literal, Optional
+from datetime import date, datetime, timedelta
+
+try:
+    import orjson
+except ImportError:  # opsional: tanpa orjson dipakai modul json standar
+    orjson = None
+
+import api_queries
+import price_history
+from db_pool import DatabasePool, PoolTimeoutError
+from instrumentation import (API_STAGE_SECONDS, HTTP_REQUEST_SECONDS, TimedCursor, render_gauges,
+                             render_metrics)
+from response_cache import InvalidationListener, ResponseCache, etag_matches
 
 # --- PENGATURAN KONEKSI DATABASE ---
 DB_NAME = "mydatabase"
@@ -11,6 +31,40 @@ DB_PASS = "mypassword"
 DB_HOST = "localhost"
 DB_PORT = "5432"
 
+# --- PENGATURAN POOL KONEKSI ---
+DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", "2"))
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "10"))
+DB_POOL_ACQUIRE_TIMEOUT = float(os.getenv("DB_POOL_ACQUIRE_TIMEOUT", "5.0"))
+
+# --- PENGATURAN PAGINASI & STREAMING ---
+MAX_PAGE_SIZE = 10000
+STREAM_FETCH_SIZE = 2000  # Jumlah baris per fetch dari server-side cursor
+NEXT_CURSOR_HEADER = "X-Next-After-Id"
+MAX_BATCH_IDS = 1000      # Jumlah master maksimum per permintaan batchGet
+DEFAULT_BATCH_DAYS = 7    # Rentang default batchGet listing jika `from`/`to` tidak diisi
+MAX_BATCH_DAYS = 31       # Rentang tanggal maksimum per permintaan batchGet
+DEFAULT_BATCH_ROWS_PER_MASTER = 100
+MAX_BATCH_ROWS_PER_MASTER = 1000  # Baris listing maksimum per master dalam satu batchGet
+
+# --- PENGATURAN PENCARIAN ---
+DEFAULT_SEARCH_LIMIT = 20
+MAX_SEARCH_LIMIT = 200
+
+# --- PENGATURAN TIME SERIES ---
+DEFAULT_SERIES_DAYS = 30      # Rentang default jika `from` tidak diisi
+MAX_SERIES_POINTS = 5000      # Batas jumlah bucket per platform agar respons tetap kecil
+BUCKET_HOURS = {"hour": 1, "day": 24, "week": 24 * 7, "month": 24 * 30}
+
+# --- PENGATURAN MODE PENYIMPANAN ---
+# rows / changes, atau auto: dideteksi dari isi tabel (price_history.storage_mode) dan dicek ulang berkala
+API_STORAGE_MODE = os.getenv("API_STORAGE_MODE", "auto")
+STORAGE_MODE_TTL = 60.0
+
+# --- PENGATURAN CACHE RESPONS ---
+API_CACHE_TTL = float(os.getenv("API_CACHE_TTL", "300"))
+API_CACHE_MAX_ENTRIES = int(os.getenv("API_CACHE_MAX_ENTRIES", "256"))
+CACHE_STATUS_HEADER = "X-Cache"
+
 # --- PENGATURAN API ---
 app = FastAPI(
     title="Product Price API (3-Table Schema)",
@@ -18,6 +72,65 @@ app = FastAPI(
     version="2.0.0"
 )
 
+db_pool = DatabasePool(
+    DB_POOL_MIN_SIZE, DB_POOL_MAX_SIZE, DB_POOL_ACQUIRE_TIMEOUT,
+    acquire_observer=lambda seconds: API_STAGE_SECONDS.observe(seconds, stage="acquire"),
+    dbname=DB_NAME, user=DB_USER, password=DB_PASS, host=DB_HOST, port=DB_PORT,
+    cursor_factory=TimedCursor
+)
+
+response_cache = ResponseCache(API_CACHE_MAX_ENTRIES, API_CACHE_TTL)
+cache_listener = None
+
+@app.on_event("startup")
+def open_db_pool():
+    """Membuka pool koneksi saat aplikasi mulai."""
+    db_pool.open()
+
+@app.on_event("startup")
+def start_cache_listener():
+    """Mendengarkan NOTIFY dari loader/recommender untuk menginvalidasi cache respons."""
+    global cache_listener
+    if response_cache.enabled:
+        cache_listener = InvalidationListener(response_cache, get_db_connection)
+        cache_listener.start()
+
+@app.on_event("shutdown")
+def close_db_pool():
+    """Menutup semua koneksi pool saat aplikasi berhenti."""
+    if cache_listener is not None:
+        cache_listener.stop()
+    db_pool.close()
+
+def route_label(request: Request) -> str:
+    """Template path route (mis. /product-masters/{master_id}/price-series) agar label metrik tidak meledak."""
+    route = request.scope.get("route")
+    if route is None:
+        for candidate in app.router.routes:
+            if candidate.matches(request.scope)[0] == Match.FULL:
+                route = candidate
+                break
+    return getattr(route, "path", None) or "unmatched"
+
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    """Mencatat durasi setiap request per method/route/status (untuk stream: sampai header terkirim)."""
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        HTTP_REQUEST_SECONDS.observe(
+            time.perf_counter() - start, method=request.method, route=route_label(request), status=status
+        )
+
+@app.exception_handler(PoolTimeoutError)
+async def pool_timeout_handler(request: Request, exc: PoolTimeoutError):
+    """Pool penuh terlalu lama: minta klien mencoba lagi, jangan biarkan menggantung."""
+    return JSONResponse(status_code=503, content={"detail": str(exc)})
+
 # --- MEKANISME AUTENTIKASI ---
 SECRET_API_KEY = "INI_ADALAH_KUNCI_RAHASIA_SAYA_12345"
 
@@ -45,6 +158,12 @@ class Product(BaseModel):
     product_master_id: int
     created_at: Optional[datetime] = None
 
+class ProductMasterSearchResult(ProductMaster):
+    score: float = Field(..., description="word_similarity pg_trgm antara q dan nama (0..1)")
+
+class ProductSearchResult(Product):
+    score: float = Field(..., description="word_similarity pg_trgm antara q dan nama (0..1)")
+
 class PriceRecommendation(BaseModel):
     # Menambahkan nama produk untuk membuatnya lebih informatif
     product_master_id: int
@@ -55,29 +174,217 @@ class PriceRecommendation(BaseModel):
     class Config:
         populate_by_name = True # Mengizinkan penggunaan alias
 
+class BatchGetRequest(BaseModel):
+    master_ids: List[int] = Field(..., min_length=1, max_length=MAX_BATCH_IDS,
+                                  description="Daftar product_master_id yang dicari")
+    from_date: Optional[date] = Field(None, alias='from', description="Tanggal awal (inklusif, WIB)")
+    to_date: Optional[date] = Field(None, alias='to', description="Tanggal akhir (inklusif, WIB)")
+    limit_per_master: int = Field(DEFAULT_BATCH_ROWS_PER_MASTER, ge=1, le=MAX_BATCH_ROWS_PER_MASTER,
+                                  description="Jumlah listing terbaru maksimum per master (products:batchGet)")
+
+    class Config:
+        populate_by_name = True
+
+class ProductBatchItem(BaseModel):
+    product_master_id: int
+    products: List[Product]
+
+class RecommendationBatchItem(BaseModel):
+    product_master_id: int
+    recommendations: List[PriceRecommendation]
+
+class PricePoint(BaseModel):
+    bucket: datetime = Field(..., description="Awal bucket (waktu lokal WIB)")
+    platform: Optional[str] = None
+    min_price: Optional[int] = None
+    avg_price: Optional[float] = None
+    max_price: Optional[int] = None
+    observations: int
+
+class RecommendationPoint(BaseModel):
+    bucket: date
+    min_price: Optional[int] = None
+    avg_price: Optional[float] = None
+    max_price: Optional[int] = None
+    days: int
+
 # --- FUNGSI HELPER ---
 def get_db_connection():
-    """Membuka koneksi baru ke database."""
+    """Membuka koneksi baru ke database di luar pool (untuk koneksi khusus/jangka panjang)."""
     return psycopg2.connect(
         dbname=DB_NAME, user=DB_USER, password=DB_PASS, host=DB_HOST, port=DB_PORT
     )
 
-def fetch_query_results(query: str, params: tuple = None):
-    """Fungsi generik untuk menjalankan query SELECT dan mengembalikan hasilnya."""
-    conn = get_db_connection()
-    with conn.cursor() as cur:
-        cur.execute(query, params)
-        if cur.description is None:
-            return []
-        colnames = [desc[0] for desc in cur.description]
-        results = [dict(zip(colnames, row)) for row in cur.fetchall()]
-    conn.close()
-    return results
+def _json_default(value):
+    """Encoder JSON untuk tipe yang tidak didukung modul json (datetime/date)."""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def dumps_json(value) -> bytes:
+    """Serialisasi ke bytes JSON; orjson jika terpasang (datetime/date ditangani langsung)."""
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, default=_json_default).encode("utf-8")
+
+def fetch_rows(query: str, params: tuple = None):
+    """Menjalankan query di koneksi pool (blocking); mengembalikan (nama kolom, list tuple)."""
+    with db_pool.connection() as conn:
+        with API_STAGE_SECONDS.time(stage="query"), conn.cursor() as cur:
+            cur.execute(query, params)
+            colnames = [desc[0] for desc in cur.description]
+            rows = cur.fetchall()
+    return colnames, rows
+
+def select_json(query: str, params: tuple = None, limit: Optional[int] = None):
+    """
+    Jalur cepat (blocking): baris diambil sebagai tuple dan langsung diserialisasi,
+    tanpa validasi Pydantic per baris (tipe sudah dijamin skema database).
+    Mengembalikan (body JSON bytes, header tambahan seperti cursor halaman berikutnya).
+    """
+    colnames, rows = fetch_rows(query, params)
+    headers = {}
+    if limit is not None and len(rows) == limit:
+        headers[NEXT_CURSOR_HEADER] = str(rows[-1][colnames.index("id")])
+    with API_STAGE_SECONDS.time(stage="serialize"):
+        body = dumps_json([dict(zip(colnames, row)) for row in rows])
+    return body, headers
+
+def select_grouped_json(query: str, params: tuple, master_ids: List[int], items_key: str) -> bytes:
+    """
+    Jalur cepat untuk batchGet: satu query, baris dikelompokkan per product_master_id
+    sesuai urutan `master_ids` (master tanpa data tetap muncul dengan list kosong).
+    """
+    colnames, rows = fetch_rows(query, params)
+    with API_STAGE_SECONDS.time(stage="serialize"):
+        master_index = colnames.index("product_master_id")
+        groups = {master_id: [] for master_id in master_ids}
+        for row in rows:
+            groups[row[master_index]].append(dict(zip(colnames, row)))
+        return dumps_json([
+            {"product_master_id": master_id, items_key: items} for master_id, items in groups.items()
+        ])
+
+async def json_query_response(query: str, params: tuple = None, limit: Optional[int] = None):
+    """Respons JSON dari jalur cepat; `response_model` di endpoint tetap dipakai untuk skema OpenAPI."""
+    body, headers = await run_in_threadpool(select_json, query, params, limit)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+def iter_ndjson(query: str, params: tuple = None):
+    """
+    Generator NDJSON dari server-side cursor: baris dikirim sambil diambil,
+    sehingga memori tetap konstan berapa pun jumlah barisnya.
+    Koneksi diambil di dalam generator; `next()` pertama (priming) hanya
+    mengambil koneksi dan menghasilkan b"". Setelah itu generator sudah berada
+    di dalam try/finally, jadi koneksi selalu kembali ke pool saat stream
+    selesai, dibatalkan klien, atau generator ditutup/di-GC tanpa pernah diiterasi.
+    """
+    conn = db_pool.acquire()
+    broken = False
+    try:
+        yield b""
+        with conn.cursor(name=f"stream_{uuid.uuid4().hex}") as cur:
+            cur.itersize = STREAM_FETCH_SIZE
+            cur.execute(query, params)
+            colnames = None
+            while True:
+                rows = cur.fetchmany(STREAM_FETCH_SIZE)
+                if not rows:
+                    break
+                if colnames is None:
+                    colnames = [desc[0] for desc in cur.description]
+                yield b"".join(dumps_json(dict(zip(colnames, row))) + b"\n" for row in rows)
+    except (psycopg2.OperationalError, psycopg2.InterfaceError):
+        broken = True
+        raise
+    finally:
+        db_pool.release(conn, discard=broken)
+
+def cache_key(request: Request, *extra):
+    """Kunci cache: path endpoint + query params terurut (+ nilai tambahan seperti tanggal)."""
+    query = "&".join(f"{k}={v}" for k, v in sorted(request.query_params.multi_items()))
+    return "|".join([request.url.path + "?" + query, *map(str, extra)])
+
+def cached_response(request: Request, entry, status: str):
+    """Respons dari entri cache; 304 tanpa body jika If-None-Match cocok dengan ETag."""
+    headers = {**entry.headers, "ETag": entry.etag, CACHE_STATUS_HEADER: status}
+    if etag_matches(request.headers.get("if-none-match"), entry.etag):
+        response_cache.record_not_modified()
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry.body, media_type=entry.media_type, headers=headers)
+
+async def cached_query_results(request: Request, key: str, query: str, params: tuple = None,
+                               limit: Optional[int] = None):
+    """
+    Menjalankan query dengan cache respons: body JSON yang sudah diserialisasi
+    disimpan per `key` sampai TTL habis atau diinvalidasi lewat NOTIFY.
+    """
+    entry = response_cache.get(key)
+    if entry is not None:
+        return cached_response(request, entry, "HIT")
+    body, headers = await run_in_threadpool(select_json, query, params, limit)
+    entry = response_cache.set(key, body, headers=headers)
+    return cached_response(request, entry, "MISS")
+
+async def stream_query_results(query: str, params: tuple = None):
+    """
+    Membuat StreamingResponse NDJSON. Generator di-prime sebelum header dikirim
+    agar timeout pool tetap menjadi 503; BackgroundTask menutup generator jika
+    klien putus sebelum stream habis (close() pada generator selesai = no-op).
+    """
+    stream = iter_ndjson(query, params)
+    await run_in_threadpool(next, stream)
+    return StreamingResponse(stream, media_type="application/x-ndjson", background=BackgroundTask(stream.close))
+
+_storage_mode_cache = {"mode": None, "checked_at": 0.0}
+
+def detect_storage_mode() -> str:
+    """
+    Mode penyimpanan listing ("rows" atau "changes") untuk memilih query di api_queries.
+    Dengan API_STORAGE_MODE=auto hasil deteksi di-cache STORAGE_MODE_TTL detik (blocking).
+    """
+    if API_STORAGE_MODE != "auto":
+        return API_STORAGE_MODE
+    now = time.monotonic()
+    if _storage_mode_cache["mode"] is None or now - _storage_mode_cache["checked_at"] > STORAGE_MODE_TTL:
+        with db_pool.connection() as conn:
+            _storage_mode_cache["mode"] = price_history.storage_mode(conn)
+        _storage_mode_cache["checked_at"] = now
+    return _storage_mode_cache["mode"]
+
+async def storage_mode() -> str:
+    return await run_in_threadpool(detect_storage_mode)
+
+def resolve_batch_range(from_date: Optional[date], to_date: Optional[date], default_days: int):
+    """Rentang batchGet: default `default_days` hari sampai `to` (atau hari ini), paling panjang MAX_BATCH_DAYS."""
+    to_date = to_date or date.today()
+    from_date = from_date or to_date - timedelta(days=default_days - 1)
+    if from_date > to_date:
+        raise HTTPException(status_code=422, detail="'from' must not be after 'to'")
+    days = (to_date - from_date).days + 1
+    if days > MAX_BATCH_DAYS:
+        raise HTTPException(status_code=422,
+                            detail=f"Range too large ({days} days > {MAX_BATCH_DAYS}); split the request.")
+    return from_date, to_date
+
+def resolve_series_range(from_date: Optional[date], to_date: Optional[date], bucket: str):
+    """Rentang default (DEFAULT_SERIES_DAYS terakhir) dan validasi jumlah bucket."""
+    to_date = to_date or date.today()
+    from_date = from_date or to_date - timedelta(days=DEFAULT_SERIES_DAYS)
+    if from_date > to_date:
+        raise HTTPException(status_code=422, detail="'from' must not be after 'to'")
+    points = ((to_date - from_date).days + 1) * 24 // BUCKET_HOURS[bucket]
+    if points > MAX_SERIES_POINTS:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Range too large for bucket '{bucket}' ({points} points > {MAX_SERIES_POINTS}); use a larger bucket."
+        )
+    return from_date, to_date
 
 # --- ENDPOINTS API ---
 
 @app.get("/")
-def read_root():
+async def read_root():
     """Endpoint selamat datang."""
     return {"message": "Welcome to the new Product Price API. Access /docs for documentation."}
 
@@ -85,50 +392,192 @@ def read_root():
          response_model=List[ProductMaster],
          summary="Get All Product Masters",
          dependencies=[Depends(verify_api_key)])
-def get_all_product_masters():
-    """Mengambil daftar semua produk master yang unik."""
-    query = "SELECT id, type, name, detail FROM product_master ORDER BY id;"
-    return fetch_query_results(query)
+async def get_all_product_masters(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Jumlah maksimum baris per halaman"),
+    after_id: Optional[int] = Query(None, description="Cursor keyset: ambil baris dengan id > after_id"),
+    stream: bool = Query(False, description="Kirim hasil sebagai NDJSON streaming"),
+):
+    """
+    Mengambil daftar semua produk master yang unik.
+    Mendukung paginasi keyset (`limit`/`after_id`, cursor berikutnya di header
+    X-Next-After-Id) dan mode streaming NDJSON. Respons non-stream di-cache
+    (ETag / If-None-Match didukung).
+    """
+    query, params = api_queries.product_masters_page(after_id, limit)
+    if stream:
+        return await stream_query_results(query, params)
+    return await cached_query_results(request, cache_key(request), query, params, limit)
 
 @app.get("/products", 
          response_model=List[Product],
          summary="Get All Product Listings (Filterable)",
          dependencies=[Depends(verify_api_key)])
-def get_all_products(master_id: Optional[int] = Query(None, description="Filter by product_master_id")):
+async def get_all_products(
+    master_id: Optional[int] = Query(None, description="Filter by product_master_id"),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Jumlah maksimum baris per halaman"),
+    after_id: Optional[int] = Query(None, description="Cursor keyset: ambil baris dengan id > after_id"),
+    stream: bool = Query(False, description="Kirim hasil sebagai NDJSON streaming"),
+):
     """
     Mengambil semua data listing produk individual.
-    Bisa difilter berdasarkan product_master_id.
+    Bisa difilter berdasarkan product_master_id, dipaginasi dengan keyset
+    (`limit`/`after_id`), atau di-stream sebagai NDJSON. Di mode penyimpanan
+    `changes` setiap baris adalah satu listing dengan harga terkininya.
+    """
+    query, params = api_queries.products_page(master_id, after_id, limit, await storage_mode())
+    if stream:
+        return await stream_query_results(query, params)
+    return await json_query_response(query, params, limit)
+
+@app.get("/product-masters/search",
+         response_model=List[ProductMasterSearchResult],
+         summary="Search Product Masters by Name",
+         dependencies=[Depends(verify_api_key)])
+async def search_product_masters(
+    q: str = Query(..., min_length=2, max_length=200, description="Teks pencarian, mis. rinso micellar 700ml"),
+    limit: int = Query(DEFAULT_SEARCH_LIMIT, ge=1, le=MAX_SEARCH_LIMIT, description="Jumlah hasil maksimum"),
+):
+    """
+    Pencarian fuzzy nama product master dengan pg_trgm: kandidat diambil lewat
+    index GIN trigram (operator `<%`), diurutkan berdasarkan `word_similarity`.
     """
-    if master_id:
-        query = "SELECT * FROM product WHERE product_master_id = %s ORDER BY id;"
-        params = (master_id,)
-    else:
-        query = "SELECT * FROM product ORDER BY id;"
-        params = None
-    return fetch_query_results(query, params)
+    return await json_query_response(*api_queries.product_masters_search(q, limit))
+
+@app.get("/products/search",
+         response_model=List[ProductSearchResult],
+         summary="Search Product Listings by Name",
+         dependencies=[Depends(verify_api_key)])
+async def search_products(
+    q: str = Query(..., min_length=2, max_length=200, description="Teks pencarian, mis. rinso micellar 700ml"),
+    platform: Optional[str] = Query(None, description="Filter platform, mis. tokopedia"),
+    limit: int = Query(DEFAULT_SEARCH_LIMIT, ge=1, le=MAX_SEARCH_LIMIT, description="Jumlah hasil maksimum"),
+):
+    """
+    Pencarian fuzzy nama listing dengan pg_trgm (index GIN trigram pada
+    listing.name, operator `<%`). Hasilnya satu per listing (platform, name,
+    detail) berisi observasi terbarunya.
+    """
+    return await json_query_response(*api_queries.products_search(q, platform, limit, await storage_mode()))
 
 @app.get("/recommendations/today", 
          response_model=List[PriceRecommendation],
          summary="Get Today's Price Recommendations with Product Names",
          dependencies=[Depends(verify_api_key)])
-def get_today_recommendations():
+async def get_today_recommendations(request: Request):
     """
     Mengambil rekomendasi harga untuk hari ini, digabungkan (JOIN) dengan
     nama produk dari tabel product_master untuk membuatnya lebih informatif.
+    Respons di-cache per tanggal dan diinvalidasi saat recommender selesai.
+    """
+    query, params = api_queries.recommendations_today()
+    return await cached_query_results(request, cache_key(request, date.today()), query, params)
+
+@app.get("/product-masters/{master_id}/price-series",
+         response_model=List[PricePoint],
+         summary="Get Downsampled Price Series for a Product Master",
+         dependencies=[Depends(verify_api_key)])
+async def get_price_series(
+    master_id: int,
+    from_date: Optional[date] = Query(None, alias="from", description="Tanggal awal (inklusif, WIB)"),
+    to_date: Optional[date] = Query(None, alias="to", description="Tanggal akhir (inklusif, WIB)"),
+    platform: Optional[str] = Query(None, description="Filter platform, mis. tokopedia"),
+    bucket: Literal["hour", "day", "week"] = Query("day", description="Ukuran bucket agregasi"),
+):
+    """
+    Riwayat harga satu master, diagregasi di SQL per bucket (`date_trunc`) dan
+    per platform: harga min/rata-rata/max dan jumlah observasi. Memakai index
+    (product_master_id, created_at) dan hanya partisi bulan dalam rentang.
+    Di mode penyimpanan `changes` dibaca dari agregat harian, sehingga bucket `hour` tidak tersedia.
+    """
+    from_date, to_date = resolve_series_range(from_date, to_date, bucket)
+    storage = await storage_mode()
+    if storage == "changes" and bucket == "hour":
+        raise HTTPException(status_code=422,
+                            detail="bucket 'hour' is not available in changes storage mode; use 'day' or 'week'.")
+    return await json_query_response(
+        *api_queries.price_series(master_id, from_date, to_date, platform, bucket, storage)
+    )
+
+@app.get("/product-masters/{master_id}/recommendation-history",
+         response_model=List[RecommendationPoint],
+         summary="Get Recommendation History for a Product Master",
+         dependencies=[Depends(verify_api_key)])
+async def get_recommendation_history(
+    master_id: int,
+    from_date: Optional[date] = Query(None, alias="from", description="Tanggal awal (inklusif)"),
+    to_date: Optional[date] = Query(None, alias="to", description="Tanggal akhir (inklusif)"),
+    bucket: Literal["day", "week", "month"] = Query("day", description="Ukuran bucket agregasi"),
+):
+    """
+    Riwayat rekomendasi harga satu master per bucket, dibaca lewat primary key
+    (product_master_id, date) price_recommendation.
+    """
+    from_date, to_date = resolve_series_range(from_date, to_date, bucket)
+    return await json_query_response(
+        *api_queries.recommendation_history(master_id, from_date, to_date, bucket)
+    )
+
+@app.post("/products:batchGet",
+          response_model=List[ProductBatchItem],
+          summary="Get Product Listings for Many Masters",
+          dependencies=[Depends(verify_api_key)])
+async def batch_get_products(body: BatchGetRequest):
     """
-    query = """
-        SELECT
-            pr.product_master_id,
-            pm.name,
-            pr.price,
-            pr.date
-        FROM
-            price_recommendation pr
-        JOIN
-            product_master pm ON pr.product_master_id = pm.id
-        WHERE
-            pr.date = CURRENT_DATE
-        ORDER BY
-            pr.product_master_id;
-    """
-    return fetch_query_results(query)
\ No newline at end of file
+    Mengambil listing untuk banyak product_master_id sekaligus dengan satu query,
+    dikelompokkan per master. `from`/`to` membatasi created_at (WIB; default
+    DEFAULT_BATCH_DAYS hari terakhir, maksimum MAX_BATCH_DAYS hari) dan setiap
+    master berisi paling banyak `limit_per_master` listing terbaru.
+    """
+    from_date, to_date = resolve_batch_range(body.from_date, body.to_date, DEFAULT_BATCH_DAYS)
+    master_ids = list(dict.fromkeys(body.master_ids))
+    query, params = api_queries.products_batch(master_ids, from_date, to_date, body.limit_per_master,
+                                               await storage_mode())
+    content = await run_in_threadpool(select_grouped_json, query, params, master_ids, "products")
+    return Response(content=content, media_type="application/json")
+
+@app.post("/recommendations:batchGet",
+          response_model=List[RecommendationBatchItem],
+          summary="Get Price Recommendations for Many Masters",
+          dependencies=[Depends(verify_api_key)])
+async def batch_get_recommendations(body: BatchGetRequest):
+    """
+    Mengambil rekomendasi harga untuk banyak product_master_id dengan satu query,
+    dikelompokkan per master. Tanpa `from`/`to` hanya rekomendasi hari ini;
+    rentangnya paling panjang MAX_BATCH_DAYS hari (satu rekomendasi per master per hari).
+    """
+    from_date, to_date = resolve_batch_range(body.from_date, body.to_date or body.from_date, 1)
+    master_ids = list(dict.fromkeys(body.master_ids))
+    query, params = api_queries.recommendations_batch(master_ids, from_date, to_date)
+    content = await run_in_threadpool(select_grouped_json, query, params, master_ids, "recommendations")
+    return Response(content=content, media_type="application/json")
+
+@app.get("/stats/db-pool",
+         summary="Get Database Connection Pool Statistics",
+         dependencies=[Depends(verify_api_key)])
+async def get_db_pool_stats():
+    """Statistik pool koneksi (in-use, waiting, latensi acquire) untuk menentukan ukuran pool."""
+    return db_pool.stats()
+
+@app.get("/metrics",
+         summary="Prometheus Latency Metrics",
+         response_class=PlainTextResponse,
+         dependencies=[Depends(verify_api_key)])
+async def get_metrics():
+    """Histogram latensi (request, tahap acquire/query/serialize, query per statement) + gauge pool & cache."""
+    body = render_metrics(
+        render_gauges("db_pool", db_pool.stats()),
+        render_gauges("api_cache", response_cache.stats()),
+    )
+    return PlainTextResponse(body, media_type="text/plain; version=0.0.4")
+
+@app.get("/stats/cache",
+         summary="Get Response Cache Statistics",
+         dependencies=[Depends(verify_api_key)])
+async def get_cache_stats():
+    """Counter hit/miss/304 cache respons dan status listener invalidasi."""
+    return {
+        **response_cache.stats(),
+        "listener_connected": bool(cache_listener and cache_listener.connected),
+        "notifications_received": cache_listener.notifications_total if cache_listener else 0,
+    }
@@ -0,0 +1,358 @@
+"""
+Pencocokan listing lintas platform ke product master.
+
+Nama listing dinormalisasi (huruf kecil, tanpa teks promo [..], tanpa tanda
+baca) dan ukuran kemasan diubah ke satuan dasar. Kandidat pasangan hanya dicari
+di dalam blok (merek = token pertama + ukuran kemasan + kata varian seperti
+"soft"/"lemon"), lalu kemiripan dihitung sebagai cosine TF-IDF n-gram karakter
+lewat perkalian matriks sparse per jendela blok. Tidak ada perbandingan
+semua-pasangan.
+
+Id master yang sudah ada dipertahankan. Listing tanpa id ikut master yang
+centroid-nya (di blok yang sama) paling mirip di atas ambang. Sisanya dibentuk
+menjadi cluster bintang: setiap anggota harus mirip langsung dengan medoid
+cluster-nya, sehingga rantai A~B~C tidak menggabungkan A dan C yang berbeda SKU.
+Cluster tanpa id mendapat id baru.
+
+Presisi terhadap ground truth katalog sintetis: `python -m benchmarks.matching_quality`.
+
+Contoh (dari root proyek):
+    python master_matching.py tokopedia_cleaned.csv blibli_cleaned.csv indomaret_cleaned.csv --reassign
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.preprocessing import normalize
+
+from normalization import extract_pack_size, pack_size_to_base_units
+
+DEFAULT_THRESHOLD = 0.7      # Cosine similarity minimum agar dua listing dianggap master yang sama
+BLOCK_WINDOW_ROWS = 2000     # Blok kecil digabung per jendela sebesar ini untuk satu perkalian sparse
+
+# Kata promosi/kemasan yang tidak membedakan produk
+NOISE_PATTERN = r'\b(?:gratis|free|promo|bundle|termurah|original|ori|karton|dus|pack|value)\b'
+
+# Kata varian (aroma/rasa/seri) yang membedakan SKU bermerek dan berukuran sama.
+# Ikut menjadi kunci blok: "Soft" dan "Fresh" tidak pernah dibandingkan sama sekali.
+VARIANT_WORDS = [
+    'soft', 'fresh', 'lemon', 'lime', 'jeruk', 'nipis', 'sakura', 'extra', 'gold', 'lite', 'light',
+    'mint', 'strawberry', 'coklat', 'cokelat', 'chocolate', 'vanila', 'vanilla', 'apel', 'anggur',
+    'melon', 'mangga', 'pandan', 'pedas', 'sensitive', 'whitening', 'herbal', 'blue', 'pink',
+    'violet', 'rose', 'lavender', 'jasmine', 'aloe', 'ultra', 'kids', 'men',
+]
+VARIANT_PATTERN = r'\b(' + '|'.join(VARIANT_WORDS) + r')\b'
+
+
+def normalize_names(names):
+    """Nama untuk pencocokan: huruf kecil, tanpa [promo]/(..), tanpa tanda baca & kata promosi."""
+    text = pd.Series(names).astype('string').fillna('').str.lower()
+    text = text.str.replace(r'\[[^\]]*\]|\([^)]*\)', ' ', regex=True)
+    text = text.str.replace(r'[^0-9a-z.,]+', ' ', regex=True)
+    text = text.str.replace(NOISE_PATTERN, ' ', regex=True)
+    return text.str.replace(r'\s+', ' ', regex=True).str.strip()
+
+
+def prepare_listings(df):
+    """
+    Menambahkan kolom pencocokan: `match_name`, `pack_size` (ml/gram), dan `block`
+    (merek | ukuran kemasan | kata varian).
+    Ukuran kemasan diambil dari nama yang sudah dibersihkan (teks promo seperti
+    "[Gratis ... 300ml]" tidak ikut), dengan `detail` sebagai cadangan.
+    """
+    prepared = df.copy()
+    prepared['match_name'] = normalize_names(df['name']).values
+    pack = pack_size_to_base_units(extract_pack_size(prepared['match_name']))
+    if 'detail' in df.columns:
+        pack = pack.fillna(pack_size_to_base_units(df['detail']))
+    prepared['pack_size'] = pack.values
+    brand = prepared['match_name'].str.split(' ', n=1).str[0].fillna('')
+    pack_key = prepared['pack_size'].round(1).astype('string').fillna('')
+    variant = prepared['match_name'].str.findall(VARIANT_PATTERN).map(
+        lambda words: '+'.join(sorted(set(words))) if isinstance(words, list) else '')
+    prepared['block'] = (brand + '|' + pack_key + '|' + variant).values
+    return prepared
+
+
+def _similar_pairs(vectors, block_codes, threshold, window_rows=BLOCK_WINDOW_ROWS):
+    """Pasangan (i, j) dalam blok yang sama dengan cosine >= threshold."""
+    order = np.argsort(block_codes, kind='stable')
+    codes_sorted = block_codes[order]
+    starts = np.flatnonzero(np.r_[True, codes_sorted[1:] != codes_sorted[:-1]])
+
+    # Blok berurutan digabung ke jendela <= window_rows; blok besar berdiri sendiri
+    windows, window_start = [], 0
+    for start in starts[1:]:
+        if start - window_start >= window_rows:
+            windows.append((window_start, start))
+            window_start = start
+    windows.append((window_start, len(order)))
+
+    left, right = [], []
+    for lo, hi in windows:
+        rows = order[lo:hi]
+        codes = codes_sorted[lo:hi]
+        sub = vectors[rows]
+        for chunk_start in range(0, len(rows), window_rows):
+            sim = (sub[chunk_start:chunk_start + window_rows] @ sub.T).tocoo()
+            r = sim.row + chunk_start
+            c = sim.col
+            mask = (sim.data >= threshold) & (r < c) & (codes[r] == codes[c])
+            left.append(rows[r[mask]])
+            right.append(rows[c[mask]])
+    if not left:
+        return np.array([], dtype=int), np.array([], dtype=int)
+    return np.concatenate(left), np.concatenate(right)
+
+
+def _best_matches(query, query_codes, target, target_codes, threshold, window_rows=BLOCK_WINDOW_ROWS):
+    """
+    Untuk setiap baris `query`, indeks baris `target` di blok yang sama dengan
+    cosine tertinggi (>= threshold), atau -1. Query diurutkan per blok dan
+    dikalikan per jendela hanya dengan target di rentang blok jendela itu.
+    """
+    best = np.full(len(query_codes), -1, dtype=np.int64)
+    if len(query_codes) == 0 or len(target_codes) == 0:
+        return best
+    t_order = np.argsort(target_codes, kind='stable')
+    t_sorted = target_codes[t_order]
+    q_order = np.argsort(query_codes, kind='stable')
+    q_sorted = query_codes[q_order]
+    for lo in range(0, len(q_order), window_rows):
+        hi = min(lo + window_rows, len(q_order))
+        t_lo = np.searchsorted(t_sorted, q_sorted[lo], side='left')
+        t_hi = np.searchsorted(t_sorted, q_sorted[hi - 1], side='right')
+        if t_lo == t_hi:
+            continue
+        rows, cols = q_order[lo:hi], t_order[t_lo:t_hi]
+        sim = (query[rows] @ target[cols].T).tocoo()
+        mask = (sim.data >= threshold) & (query_codes[rows[sim.row]] == target_codes[cols[sim.col]])
+        r, c, d = sim.row[mask], sim.col[mask], sim.data[mask]
+        if len(r) == 0:
+            continue
+        order = np.lexsort((-d, r))      # Per baris query, kemiripan tertinggi lebih dulu
+        r, c = r[order], c[order]
+        first = np.r_[True, r[1:] != r[:-1]]
+        best[rows[r[first]]] = cols[c[first]]
+    return best
+
+
+def _star_clusters(left, right, n):
+    """
+    Cluster bintang dari pasangan mirip (i, j). Per putaran, setiap komponen
+    memilih medoid (node dengan tetangga terbanyak, seri -> indeks terkecil),
+    lalu hanya tetangga langsung medoid yang masuk cluster-nya; sisanya diproses
+    di putaran berikutnya. Node tanpa pasangan menjadi cluster sendiri.
+    """
+    labels = np.full(n, -1, dtype=np.int64)
+    active = np.ones(n, dtype=bool)
+    while True:
+        keep = active[left] & active[right]
+        left, right = left[keep], right[keep]
+        if len(left) == 0:
+            break
+        graph = coo_matrix((np.ones(len(left), dtype=np.int8), (left, right)), shape=(n, n))
+        _, component = connected_components(graph, directed=False)
+        degree = np.bincount(left, minlength=n) + np.bincount(right, minlength=n)
+        linked = np.flatnonzero(degree > 0)
+        order = linked[np.lexsort((linked, -degree[linked], component[linked]))]
+        medoids = order[np.r_[True, component[order[1:]] != component[order[:-1]]]]
+        is_medoid = np.zeros(n, dtype=bool)
+        is_medoid[medoids] = True
+        labels[medoids] = medoids
+        # Satu medoid per komponen, jadi setiap tetangga medoid hanya punya satu medoid
+        from_left = is_medoid[left] & ~is_medoid[right]
+        labels[right[from_left]] = left[from_left]
+        from_right = is_medoid[right] & ~is_medoid[left]
+        labels[left[from_right]] = right[from_right]
+        active &= labels < 0
+    unmatched = labels < 0
+    labels[unmatched] = np.flatnonzero(unmatched)
+    return labels
+
+
+def _vectorize(names):
+    """Matriks TF-IDF n-gram karakter (baris ter-normalisasi L2); None jika semua nama kosong."""
+    vectorizer = TfidfVectorizer(analyzer='char_wb', ngram_range=(3, 3), min_df=1, dtype=np.float32)
+    try:
+        return vectorizer.fit_transform(names).tocsr()
+    except ValueError:  # Semua nama kosong
+        return None
+
+
+def _cluster_vectors(vectors, block_codes, threshold):
+    left, right = _similar_pairs(vectors, block_codes, threshold)
+    return _star_clusters(left, right, vectors.shape[0])
+
+
+def match_clusters(prepared, threshold=DEFAULT_THRESHOLD):
+    """Label cluster (ndarray int) untuk setiap baris DataFrame hasil `prepare_listings`."""
+    n = len(prepared)
+    if n == 0:
+        return np.array([], dtype=int)
+    vectors = _vectorize(prepared['match_name'].fillna('').tolist())
+    if vectors is None:
+        return np.arange(n)
+    return _cluster_vectors(vectors, pd.factorize(prepared['block'])[0], threshold)
+
+
+def _master_centroids(vectors, master_ids, block_codes):
+    """Centroid TF-IDF (ter-normalisasi) per pasangan (master, blok) dari listing yang sudah punya id."""
+    keys = pd.MultiIndex.from_arrays([master_ids, block_codes])
+    group, uniques = pd.factorize(keys)
+    indicator = coo_matrix((np.ones(len(group), dtype=np.float32), (group, np.arange(len(group)))),
+                           shape=(len(uniques), len(group))).tocsr()
+    centroids = normalize(indicator @ vectors)
+    return centroids, uniques.get_level_values(0).to_numpy(), uniques.get_level_values(1).to_numpy()
+
+
+def _assign_prepared(prepared, existing, next_id, threshold):
+    """Inti `assign_master_ids` untuk DataFrame yang sudah melalui `prepare_listings` (index 0..n-1)."""
+    result = existing.copy()
+    missing = result.isna().to_numpy()
+    if not missing.any():
+        return result.astype('int64')
+    vectors = _vectorize(prepared['match_name'].fillna('').tolist())
+    block_codes = pd.factorize(prepared['block'])[0]
+    missing_rows = np.flatnonzero(missing)
+
+    # Listing baru ikut master lama yang centroid-nya paling mirip di blok yang sama
+    known_rows = np.flatnonzero(~missing)
+    if vectors is not None and len(known_rows):
+        centroids, centroid_master, centroid_block = _master_centroids(
+            vectors[known_rows], existing.to_numpy()[known_rows].astype('int64'), block_codes[known_rows])
+        best = _best_matches(vectors[missing_rows], block_codes[missing_rows],
+                             centroids, centroid_block, threshold)
+        hit = best >= 0
+        result.iloc[missing_rows[hit]] = centroid_master[best[hit]]
+        missing_rows = missing_rows[~hit]
+
+    # Sisanya: cluster bintang di antara listing yang belum punya master; tiap cluster id baru
+    if len(missing_rows):
+        if vectors is None:
+            labels = np.arange(len(missing_rows))
+        else:
+            labels = _cluster_vectors(vectors[missing_rows], block_codes[missing_rows], threshold)
+        if next_id is None:
+            next_id = int(existing.max()) + 1 if existing.notna().any() else 1
+        codes, _ = pd.factorize(labels)
+        result.iloc[missing_rows] = codes + next_id
+    return result.astype('int64')
+
+
+def assign_master_ids(df, next_id=None, threshold=DEFAULT_THRESHOLD, reassign=False):
+    """
+    Mengembalikan Series productmasterid (index sama dengan df).
+    Id yang sudah ada di kolom `productmasterid` dipertahankan kecuali reassign=True.
+    """
+    prepared = prepare_listings(df.reset_index(drop=True))
+    if 'productmasterid' in df.columns and not reassign:
+        existing = pd.to_numeric(prepared['productmasterid'], errors='coerce').astype('Int64')
+    else:
+        existing = pd.Series(pd.NA, index=prepared.index, dtype='Int64')
+    result = _assign_prepared(prepared, existing, next_id, threshold)
+    result.index = df.index
+    return result
+
+
+class MasterAssigner:
+    """
+    Menentukan productmasterid untuk listing baru dari database secara per batch.
+
+    Listing (platform, name) yang sudah pernah dimuat memakai master lamanya;
+    sisanya dicocokkan dengan listing referensi di blok yang sama (merek +
+    ukuran kemasan + varian) lewat `assign_master_ids`, dan jika tidak ada yang
+    mirip dibuat master baru.
+
+    Listing dibaca dari tabel `listing` (satu baris per listing, dipelihara
+    loader di kedua mode penyimpanan), bukan dari riwayat observasi `product`.
+    """
+
+    _REFERENCE_QUERY = """
+        SELECT DISTINCT ON (product_master_id, name) name, detail, product_master_id
+        FROM listing
+        WHERE product_master_id IS NOT NULL
+        UNION ALL
+        SELECT name, NULL, id FROM product_master;
+    """
+    _KNOWN_LISTING_QUERY = """
+        SELECT DISTINCT ON (platform, name) platform, name, product_master_id
+        FROM listing
+        WHERE name = ANY(%s) AND product_master_id IS NOT NULL
+        ORDER BY platform, name, last_seen_at DESC;
+    """
+
+    def __init__(self, conn, threshold=DEFAULT_THRESHOLD):
+        self.conn = conn
+        self.threshold = threshold
+        with conn.cursor() as cur:
+            cur.execute("SELECT COALESCE(MAX(id), 0) FROM product_master;")
+            self._next_id = cur.fetchone()[0] + 1
+            cur.execute(self._REFERENCE_QUERY)
+            reference = pd.DataFrame(cur.fetchall(), columns=['name', 'detail', 'productmasterid'])
+        self._reference = prepare_listings(reference) if not reference.empty else None
+
+    def assign(self, df):
+        """Mengembalikan Series productmasterid untuk DataFrame batch (kolom platform, name, detail)."""
+        with self.conn.cursor() as cur:
+            cur.execute(self._KNOWN_LISTING_QUERY, (df['name'].unique().tolist(),))
+            known_listings = {(platform, name): master_id for platform, name, master_id in cur.fetchall()}
+
+        result = pd.Series(
+            [known_listings.get(key) for key in zip(df['platform'], df['name'])], index=df.index, dtype='Int64'
+        )
+        unknown = df.loc[result.isna(), ['name'] + (['detail'] if 'detail' in df.columns else [])]
+        if unknown.empty:
+            return result.astype('int64')
+
+        batch = prepare_listings(unknown.assign(productmasterid=pd.NA))
+        reference = None
+        if self._reference is not None:
+            reference = self._reference[self._reference['block'].isin(batch['block'])]
+        combined = pd.concat([reference, batch], ignore_index=True) if reference is not None else batch
+        combined = combined.reset_index(drop=True)
+        existing = pd.to_numeric(combined['productmasterid'], errors='coerce').astype('Int64')
+        ids = _assign_prepared(combined, existing, self._next_id, self.threshold)
+        new_ids = ids.iloc[len(combined) - len(batch):].values
+        result[unknown.index] = new_ids
+        self._next_id = max(self._next_id, int(new_ids.max()) + 1)
+
+        assigned = batch.assign(productmasterid=new_ids)
+        self._reference = assigned if self._reference is None else pd.concat(
+            [self._reference, assigned], ignore_index=True)
+        return result.astype('int64')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cocokkan listing ke product master (tulis ulang productmasterid).")
+    parser.add_argument("files", nargs="+", help="File *_cleaned.csv")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument("--reassign", action="store_true", help="Abaikan productmasterid yang ada dan hitung ulang semua.")
+    parser.add_argument("--write", action="store_true", help="Tulis hasil kembali ke file CSV masing-masing.")
+    args = parser.parse_args()
+
+    frames = [pd.read_csv(f) for f in args.files]
+    combined = pd.concat(frames, ignore_index=True)
+    start = time.perf_counter()
+    ids = assign_master_ids(combined, threshold=args.threshold, reassign=args.reassign)
+    elapsed = time.perf_counter() - start
+    print(f"Matched {len(combined)} listings into {ids.nunique()} masters in {elapsed:.2f}s.")
+    for master_id, group in combined.assign(productmasterid=ids).groupby('productmasterid'):
+        if len(group) > 1:
+            print(f"  master {master_id}: " + " | ".join(group['name'].str.slice(0, 40)))
+
+    if args.write:
+        offset = 0
+        for path, frame in zip(args.files, frames):
+            frame['productmasterid'] = ids.iloc[offset:offset + len(frame)].values
+            offset += len(frame)
+            frame.to_csv(path, index=False, encoding='utf-8')
+            print(f"Updated {path}")
+
+
+if __name__ == "__main__":
+    main()
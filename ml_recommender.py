@@ -1,7 +1,18 @@
+import argparse
+import os
+import sys
 import pandas as pd
 import psycopg2
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import date
 
+import price_aggregates
+import pricing_model
+import schema
+from instrumentation import RunReport, TimedCursor
+from response_cache import notify_invalidation
+from bulk_load import bulk_insert
+
 # --- PENGATURAN KONEKSI DATABASE ---
 DB_NAME = "mydatabase"
 DB_USER = "myuser"
@@ -9,72 +20,281 @@ DB_PASS = "mypassword"
 DB_HOST = "localhost"
 DB_PORT = "5432"
 
-def fetch_product_data(conn):
-    """Mengambil data harga dari tabel product dan mengagregasinya."""
-    print("Fetching data from 'product' table...")
-    query = """
+RECOMMENDATION_COLUMNS = ['product_master_id', 'price', 'date']
+UNDERCUT_FACTOR = 0.95   # Rekomendasi sedikit di bawah harga acuan pasar
+DEFAULT_SHARDS = os.cpu_count() or 4
+
+def shard_filter(shard, column="product_master_id"):
+    """Kondisi SQL untuk shard=(index, count): mod(column, count) = index; string kosong jika None."""
+    if shard is None:
+        return ""
+    index, count = (int(v) for v in shard)
+    return f"AND mod({column}, {count}) = {index}"
+
+def fetch_product_data(conn, shard=None):
+    """
+    Mengambil rata-rata dan harga asli maksimum per master dari tabel agregat
+    product_price_stats (satu baris per master, dipelihara oleh loader).
+    shard=(index, count) membatasi ke sebagian ruang product_master_id.
+    """
+    print("Fetching data from 'product_price_stats' table...")
+    if shard is None:
+        price_aggregates.ensure_aggregates(conn)
+    query = f"""
         SELECT
             product_master_id,
-            AVG(price) AS avg_price,
-            MAX(
-                CASE
-                    WHEN original_price ~ '^[0-9]+$' THEN CAST(original_price AS INTEGER)
-                    ELSE price
-                END
-            ) AS max_original_price
+            price_sum::numeric / price_count AS avg_price,
+            max_original_price
         FROM
-            product -- Mengambil dari tabel 'product' yang baru
+            product_price_stats
         WHERE
-            price > 0
-        GROUP BY
-            product_master_id;
+            price_count > 0 {shard_filter(shard)};
     """
     df = pd.read_sql_query(query, conn)
+    df['avg_price'] = df['avg_price'].astype(float)
     print(f"Found {len(df)} unique master products to analyze.")
     return df
 
-def generate_recommendations(df):
-    """Menerapkan logika dummy model."""
+def generate_recommendations(df, predicted=None):
+    """
+    Harga rekomendasi = harga acuan x UNDERCUT_FACTOR, dibulatkan ke ratusan.
+    Harga acuan adalah prediksi model (Series per product_master_id) jika ada,
+    selain itu rata-rata harga historis.
+    """
     print("Generating price recommendations...")
     if df.empty: return df
 
-    df['recommended_price'] = (df['avg_price'] * 0.95).round(-2).astype(int)
+    base_price = df['avg_price']
+    if predicted is not None and not predicted.empty:
+        model_price = df['product_master_id'].map(predicted)
+        print(f"Model predictions available for {int(model_price.notna().sum())} of {len(df)} masters.")
+        base_price = model_price.fillna(base_price)
+    df['recommended_price'] = (base_price * UNDERCUT_FACTOR).round(-2).astype(int)
     return df
 
-def store_recommendations(conn, df):
-    """Menyimpan hasil rekomendasi ke dalam tabel price_recommendation."""
+def store_recommendations(conn, df, method="auto", shard=None):
+    """
+    Menyimpan hasil rekomendasi ke dalam tabel price_recommendation secara set-based:
+    DataFrame di-COPY ke tabel staging, lalu satu upsert ke primary key
+    (product_master_id, date). Rekomendasi hari ini tidak pernah kosong sesaat.
+    Dengan `shard`, pembersihan rekomendasi lama hanya menyentuh master milik shard itu.
+    """
     today = date.today()
     print(f"Storing {len(df)} recommendations for date: {today}...")
-    
+    if df.empty:
+        frame = pd.DataFrame(columns=RECOMMENDATION_COLUMNS)
+    else:
+        frame = pd.DataFrame({
+            'product_master_id': df['product_master_id'].astype('int64').values,
+            'price': df['recommended_price'].astype('int64').values,
+            'date': today,
+        })
+
+    with conn.cursor() as cur:
+        cur.execute("CREATE TEMP TABLE staging_price_recommendation (LIKE price_recommendation) ON COMMIT DROP;")
+    bulk_insert(conn, frame, 'staging_price_recommendation', RECOMMENDATION_COLUMNS, method=method)
+    with conn.cursor() as cur:
+        cur.execute("""
+            INSERT INTO price_recommendation (product_master_id, price, date)
+            SELECT product_master_id, price, date FROM staging_price_recommendation
+            ON CONFLICT (product_master_id, date) DO UPDATE SET price = EXCLUDED.price
+            WHERE price_recommendation.price IS DISTINCT FROM EXCLUDED.price;
+        """)
+        written = cur.rowcount
+        # Master yang tidak lagi mendapat rekomendasi hari ini
+        cur.execute(f"""
+            DELETE FROM price_recommendation pr
+            WHERE pr.date = %s {shard_filter(shard, "pr.product_master_id")}
+              AND NOT EXISTS (
+                  SELECT 1 FROM staging_price_recommendation s
+                  WHERE s.product_master_id = pr.product_master_id
+              );
+        """, (today,))
+        removed = cur.rowcount
+    print(f"Recommendations stored successfully ({written} written, {removed} stale removed).")
+    return len(frame)
+
+def _set_shard_status(conn, run_date, shard, status, row_count=None, error=None):
+    index, count = shard
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            INSERT INTO recommendation_shard_run (run_date, shard_count, shard_index, status, row_count, error, updated_at)
+            VALUES (%s, %s, %s, %s, %s, %s, now())
+            ON CONFLICT (run_date, shard_count, shard_index) DO UPDATE SET
+                status = EXCLUDED.status,
+                row_count = EXCLUDED.row_count,
+                error = EXCLUDED.error,
+                updated_at = EXCLUDED.updated_at;
+            """,
+            (run_date, count, index, status, row_count, error)
+        )
+
+def _record_shard_failure(conn, run_date, shard, error):
+    """
+    Best-effort mencatat status 'failed'. Transaksi shard di-rollback dulu; jika
+    koneksinya sendiri rusak, dipakai koneksi baru. Kegagalan di sini hanya
+    dicetak agar exception asli shard yang sampai ke pemanggil.
+    """
+    try:
+        conn.rollback()
+        _set_shard_status(conn, run_date, shard, "failed", error=str(error))
+        conn.commit()
+        return
+    except Exception:
+        pass
+    status_conn = None
+    try:
+        status_conn = psycopg2.connect(dbname=DB_NAME, user=DB_USER, password=DB_PASS, host=DB_HOST, port=DB_PORT)
+        _set_shard_status(status_conn, run_date, shard, "failed", error=str(error))
+        status_conn.commit()
+    except Exception as status_error:
+        print(f"Could not record failure of shard {shard[0]}/{shard[1]}: {status_error}")
+    finally:
+        if status_conn: status_conn.close()
+
+def run_shard(shard, model=None, method="auto"):
+    """
+    Fetch, skor, dan simpan satu shard di prosesnya sendiri dengan koneksi sendiri.
+    Rekomendasi dan status 'done' di-commit dalam satu transaksi; jika gagal,
+    status 'failed' dicatat agar shard bisa dilanjutkan dengan --resume.
+    """
+    run_date = date.today()
+    conn = psycopg2.connect(dbname=DB_NAME, user=DB_USER, password=DB_PASS, host=DB_HOST, port=DB_PORT)
+    try:
+        product_df = fetch_product_data(conn, shard=shard)
+        predicted = None
+        if model is not None:
+            predicted = pricing_model.score_masters(model, pricing_model.fetch_history(conn, shard=shard))
+        recommendations_df = generate_recommendations(product_df, predicted)
+        rows = store_recommendations(conn, recommendations_df, method=method, shard=shard)
+        _set_shard_status(conn, run_date, shard, "done", row_count=rows)
+        notify_invalidation(conn, "recommendations")
+        conn.commit()
+        return rows
+    except Exception as e:
+        _record_shard_failure(conn, run_date, shard, e)
+        raise
+    finally:
+        conn.close()
+
+def pending_shards(conn, shard_count, resume=False):
+    """Semua shard, atau dengan resume hanya shard yang belum 'done' hari ini."""
+    shards = list(range(shard_count))
+    if not resume:
+        return shards
     with conn.cursor() as cur:
-        cur.execute("DELETE FROM price_recommendation WHERE date = %s;", (today,))
-        for _, row in df.iterrows():
-            cur.execute(
-                """
-                INSERT INTO price_recommendation (product_master_id, price, date)
-                VALUES (%s, %s, %s)
-                """,
-                (int(row['product_master_id']), int(row['recommended_price']), today)
-            )
-    print("Recommendations stored successfully.")
-
-def main():
+        cur.execute(
+            """
+            SELECT shard_index FROM recommendation_shard_run
+            WHERE run_date = %s AND shard_count = %s AND status = 'done';
+            """,
+            (date.today(), shard_count)
+        )
+        done = {row[0] for row in cur.fetchall()}
+    return [index for index in shards if index not in done]
+
+def run_sharded(shard_count=DEFAULT_SHARDS, workers=None, model="linear", retrain=False,
+                resume=False, method="auto"):
+    """
+    Membagi ruang product_master_id menjadi `shard_count` shard (id % shard_count)
+    dan menjalankan tiap shard di process pool. Model dilatih/dimuat sekali di
+    proses induk lalu dikirim ke worker. Mengembalikan daftar shard yang gagal.
+    """
+    report = RunReport("ml_recommender_sharded")
+    conn = psycopg2.connect(dbname=DB_NAME, user=DB_USER, password=DB_PASS, host=DB_HOST, port=DB_PORT,
+                            cursor_factory=TimedCursor)
+    try:
+        with report.stage("prepare"):
+            schema.create_schema(conn)
+            price_aggregates.ensure_aggregates(conn)
+        with report.stage("model"):
+            trained = pricing_model.load_or_train(conn, retrain=retrain) if model == "linear" else None
+        shards = pending_shards(conn, shard_count, resume=resume)
+        conn.commit()
+    finally:
+        conn.close()
+
+    if not shards:
+        print(f"All {shard_count} shards already done for today.")
+        report.finish()
+        return []
+    print(f"Running {len(shards)} of {shard_count} shards with {workers or DEFAULT_SHARDS} workers...")
+    failed = []
+    total_rows = 0
+    with report.stage("shards"), ProcessPoolExecutor(max_workers=workers or DEFAULT_SHARDS) as executor:
+        futures = {
+            executor.submit(run_shard, (index, shard_count), trained, method): index
+            for index in shards
+        }
+        for future in as_completed(futures):
+            index = futures[future]
+            try:
+                rows = future.result()
+                total_rows += rows
+                print(f"Shard {index}/{shard_count} done: {rows} recommendations.")
+            except Exception as e:
+                failed.append(index)
+                print(f"Shard {index}/{shard_count} failed: {e}")
+    print(f"Sharded run finished: {total_rows} recommendations, {len(failed)} failed shards.")
+    if failed:
+        print("Re-run with --resume to retry only the failed shards.")
+    report.finish("failed" if failed else "ok")
+    return sorted(failed)
+
+def main(model="linear", retrain=False):
+    """
+    model: "linear" (model terlatih dari pricing_model.py) atau "average" (rata-rata harga saja).
+    retrain: latih ulang walaupun cache model untuk data ini sudah ada.
+    Mengembalikan status run ("ok" / "failed"), sama dengan yang dicatat di laporan run.
+    """
     conn = None
+    report = RunReport("ml_recommender")
+    status = "failed"
     try:
-        conn = psycopg2.connect(dbname=DB_NAME, user=DB_USER, password=DB_PASS, host=DB_HOST, port=DB_PORT)
+        with report.stage("connect"):
+            conn = psycopg2.connect(dbname=DB_NAME, user=DB_USER, password=DB_PASS, host=DB_HOST, port=DB_PORT,
+                                    cursor_factory=TimedCursor)
         print("Successfully connected to the database.")
 
-        product_df = fetch_product_data(conn)
-        recommendations_df = generate_recommendations(product_df)
-        store_recommendations(conn, recommendations_df)
+        # Sama dengan run_sharded: tabel agregat/status shard dibuat jika database masih berskema lama
+        with report.stage("prepare"):
+            schema.create_schema(conn)
+        with report.stage("fetch"):
+            product_df = fetch_product_data(conn)
+        with report.stage("model"):
+            predicted = pricing_model.predict_prices(conn, retrain=retrain) if model == "linear" else None
+            recommendations_df = generate_recommendations(product_df, predicted)
+        with report.stage("store"):
+            store_recommendations(conn, recommendations_df)
+            notify_invalidation(conn, "recommendations")
         
-        conn.commit()
+        with report.stage("commit"):
+            conn.commit()
         print("Transactions committed.")
+        status = "ok"
     except Exception as e:
         print(f"An error occurred: {e}")
         if conn: conn.rollback()
     finally:
         if conn: conn.close(); print("Database connection closed.")
+        report.finish(status)
+    return status
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Hasilkan rekomendasi harga harian per product master.")
+    parser.add_argument("--model", choices=["linear", "average"], default="linear",
+                        help="linear: model scikit-learn terlatih (default); average: rata-rata harga historis.")
+    parser.add_argument("--retrain", action="store_true", help="Abaikan cache model dan latih ulang.")
+    parser.add_argument("--shards", type=int, default=None,
+                        help="Jalankan paralel: bagi product_master_id menjadi N shard (id %% N).")
+    parser.add_argument("--workers", type=int, default=None, help="Jumlah proses (default: jumlah core).")
+    parser.add_argument("--resume", action="store_true", help="Hanya jalankan shard yang belum selesai hari ini.")
+    args = parser.parse_args()
+    if args.shards:
+        failed = run_sharded(args.shards, workers=args.workers, model=args.model,
+                             retrain=args.retrain, resume=args.resume)
+        if failed:
+            sys.exit(1)
+    elif main(model=args.model, retrain=args.retrain) != "ok":
+        sys.exit(1)
\ No newline at end of file
@@ -0,0 +1,96 @@
+"""
+Normalisasi harga dan diskon secara vektor (per kolom pandas, bukan per baris).
+
+Dipakai bersama oleh scraper (sebelum menulis CSV) dan loader (sebelum menulis
+ke database), sehingga harga selalu berupa integer rupiah dan diskon berupa
+angka persen, bukan string seperti "Rp72.400", "33%", "nan", atau "".
+"""
+import pandas as pd
+
+PRICE_COLUMNS = ['price', 'original_price']
+
+# Ukuran kemasan di nama produk, mis. "700ml", "35G", "1.5 L", "12X250mL" -> "250mL"
+PACK_SIZE_PATTERN = r'(?i)(\d+(?:[.,]\d+)?\s?(?:ml|l|liter|gr|gram|g|kg|pcs|sachet))\b'
+
+# Faktor konversi ukuran kemasan ke satuan dasar (ml untuk cairan, gram untuk padatan)
+PACK_UNIT_FACTORS = {'ml': 1, 'l': 1000, 'liter': 1000, 'gr': 1, 'gram': 1, 'g': 1,
+                     'kg': 1000, 'pcs': 1, 'sachet': 1}
+
+
+def parse_rupiah(values):
+    """
+    Mengubah harga ('Rp72.400', '72400', 72400.0, NaN, ...) menjadi Series Int64.
+    Titik dianggap pemisah ribuan (format rupiah); akhiran desimal '.0' dari
+    round-trip float dan ',00' dibuang lebih dulu.
+    """
+    series = pd.Series(values)
+    if pd.api.types.is_numeric_dtype(series):
+        return series.round().astype('Int64')
+    text = series.astype('string').str.strip()
+    text = text.str.replace(r'(?:\.0|,\d{1,2})$', '', regex=True).str.replace(r'\D', '', regex=True)
+    return pd.to_numeric(text.mask(text == ''), errors='coerce').astype('Int64')
+
+
+def parse_percentage(values):
+    """Mengubah '33%', '33', 33.0, '' menjadi Series Int64 (NA jika kosong)."""
+    series = pd.Series(values)
+    if pd.api.types.is_numeric_dtype(series):
+        return series.round().astype('Int64')
+    text = series.astype('string').str.replace(r'[^\d.]', '', regex=True)
+    return pd.to_numeric(text.mask(text == ''), errors='coerce').round().astype('Int64')
+
+
+def compute_discount_percentage(original_price, price):
+    """
+    Persentase diskon bulat dari dua Series harga integer.
+    0 jika tidak ada potongan, NA jika salah satu harga tidak diketahui.
+    """
+    original = original_price.astype('Float64')
+    current = price.astype('Float64')
+    discount = ((original - current) / original * 100).round()
+    has_discount = ((original > current) & (original > 0)).fillna(False).astype(bool)
+    discount = discount.where(has_discount, 0)
+    return discount.mask(original.isna() | current.isna()).astype('Int64')
+
+
+def normalize_price_columns(df):
+    """
+    Mengembalikan salinan DataFrame dengan `price`, `original_price`, dan
+    `discount_percentage` bertipe Int64. Diskon dihitung ulang dari harga jika
+    harga asli diketahui; jika tidak, nilai diskon yang ada (mis. "33%") di-parse.
+    """
+    df = df.copy()
+    df['price'] = parse_rupiah(df['price']).values
+    if 'original_price' in df.columns:
+        df['original_price'] = parse_rupiah(df['original_price']).values
+    else:
+        df['original_price'] = pd.array([pd.NA] * len(df), dtype='Int64')
+
+    computed = compute_discount_percentage(df['original_price'], df['price'])
+    if 'discount_percentage' in df.columns:
+        existing = parse_percentage(df['discount_percentage'])
+        computed = computed.fillna(existing)
+    df['discount_percentage'] = computed.values
+    return df
+
+
+def extract_pack_size(names):
+    """Mengambil ukuran kemasan pertama dari nama produk (kolom `detail`); NA jika tidak ada."""
+    return pd.Series(names).astype('string').str.extract(PACK_SIZE_PATTERN, expand=False)
+
+
+def pack_size_to_base_units(details):
+    """Mengubah `detail` seperti '1.5 L', '250mL', '35G' menjadi angka float (1500, 250, 35); NaN jika tidak dikenali."""
+    parts = pd.Series(details).astype('string').str.extract(r'(?i)^\s*(\d+(?:[.,]\d+)?)\s?([a-z]+)')
+    amount = pd.to_numeric(parts[0].str.replace(',', '.', regex=False), errors='coerce')
+    factor = parts[1].str.lower().map(PACK_UNIT_FACTORS).astype(float)
+    return (amount.astype(float) * factor).rename(None)
+
+
+def normalize_records(records):
+    """Versi untuk list of dict (hasil scraper): dinormalisasi sekaligus satu batch."""
+    if not records:
+        return []
+    df = normalize_price_columns(pd.DataFrame(records))
+    df = df.astype(object).where(df.notna(), None)
+    return df.to_dict('records')
@@ -0,0 +1,231 @@
+"""
+Pipeline streaming scrape -> database tanpa CSV perantara.
+
+Record hasil scraper mengalir lewat antrian berukuran tetap (backpressure: jika
+database lebih lambat, worker scraper tertahan), lalu diproses per micro-batch:
+normalisasi harga, ekstraksi `detail`, pencocokan product master
+(master_matching.py), dan upsert langsung ke PostgreSQL. Memori tetap datar berapa pun besar crawl-nya.
+Dump CSV (`--csv-dir`) dan dataset Parquet (`--dataset-dir`) tersedia sebagai sink opsional.
+
+Jalankan dari root proyek:
+    python pipeline.py --batch-size 500 --csv-dir stream_output
+"""
+import argparse
+import os
+import queue
+import threading
+import time
+
+import pandas as pd
+import psycopg2
+
+import dataset_store
+import load_to_db
+from master_matching import MasterAssigner
+from normalization import extract_pack_size, normalize_price_columns
+from response_cache import notify_invalidation
+from scraping.orchestrator import DEFAULT_POOL_SIZE, SCRAPERS, build_jobs, crawl
+
+# --- PENGATURAN KONEKSI DATABASE ---
+DB_NAME = "mydatabase"
+DB_USER = "myuser"
+DB_PASS = "mypassword"
+DB_HOST = "localhost"
+DB_PORT = "5432"
+
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_QUEUE_SIZE = 8          # Jumlah micro-batch maksimum yang menunggu di antrian
+DEFAULT_FLUSH_INTERVAL = 5.0    # Detik; batch yang belum penuh tetap ditulis setelah ini
+PUT_TIMEOUT = 1.0               # Detik; producer mengecek stop event di antara percobaan put()
+CLEANED_COLUMNS = ['id', 'name', 'price', 'original_price', 'discount_percentage',
+                   'detail', 'platform', 'productmasterid', 'createdat']
+
+_END_OF_STREAM = object()
+
+
+def prepare_batch(records, platform_of, assigner):
+    """Mengubah record mentah scraper menjadi DataFrame berformat *_cleaned.csv."""
+    df = pd.DataFrame(records)
+    df['platform'] = platform_of
+    df = normalize_price_columns(df)
+    df['detail'] = extract_pack_size(df['name']).values
+    df['productmasterid'] = assigner.assign(df).values
+    return df
+
+
+def last_csv_id(path):
+    """Id terbesar di file *_cleaned.csv yang sudah ada (0 jika file belum ada atau kosong)."""
+    if not os.path.exists(path):
+        return 0
+    ids = pd.to_numeric(pd.read_csv(path, usecols=['id'])['id'], errors='coerce')
+    return int(ids.max()) if ids.notna().any() else 0
+
+
+def write_csv_sink(df, csv_dir, row_counts):
+    """
+    Sink opsional: menambahkan batch ke <platform>_cleaned.csv di `csv_dir`.
+    Id melanjutkan id terakhir di file yang sudah ada, sehingga run berikutnya
+    tidak menulis id duplikat.
+    """
+    os.makedirs(csv_dir, exist_ok=True)
+    for platform, part in df.groupby('platform'):
+        path = os.path.join(csv_dir, f"{platform}_cleaned.csv")
+        header = not os.path.exists(path)
+        if platform not in row_counts:
+            row_counts[platform] = last_csv_id(path)
+        offset = row_counts[platform]
+        part = part.assign(id=range(offset + 1, offset + len(part) + 1))
+        row_counts[platform] = offset + len(part)
+        part[CLEANED_COLUMNS].to_csv(path, mode='a', header=header, index=False, encoding='utf-8')
+
+
+def stop_producer(thread, batches, stop):
+    """
+    Menghentikan crawl setelah consumer gagal: set stop event, lalu kosongkan
+    antrian sampai thread producer selesai (worker yang tertahan di put() bisa
+    lanjut, crawl() membatalkan job tersisa dan menutup pool driver Chrome).
+    """
+    stop.set()
+    print("Stopping crawl after pipeline failure...")
+    while thread.is_alive():
+        try:
+            while True:
+                batches.get_nowait()
+        except queue.Empty:
+            pass
+        thread.join(timeout=PUT_TIMEOUT)
+
+
+def run_pipeline(jobs=None, batch_size=DEFAULT_BATCH_SIZE, queue_size=DEFAULT_QUEUE_SIZE,
+                 flush_interval=DEFAULT_FLUSH_INTERVAL, csv_dir=None, method="auto",
+                 pool_size=DEFAULT_POOL_SIZE, mode="dom", dataset_dir=None, storage="rows"):
+    """Menjalankan crawl dan menulis hasilnya ke database per micro-batch."""
+    batches = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+    crawl_errors = []
+
+    def put(item):
+        """put() dengan timeout: menahan producer saat antrian penuh, tapi berhenti jika consumer gagal."""
+        while not stop.is_set():
+            try:
+                batches.put(item, timeout=PUT_TIMEOUT)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def on_result(platform, url, records):
+        # Dipecah per micro-batch; put() memblok saat antrian penuh (backpressure)
+        for start in range(0, len(records), batch_size):
+            if not put((platform, records[start:start + batch_size])):
+                return
+
+    def producer():
+        try:
+            crawl(jobs, pool_size=pool_size, on_result=on_result, mode=mode, collect=False, stop_event=stop)
+        except Exception as e:
+            crawl_errors.append(e)
+        finally:
+            put(_END_OF_STREAM)
+
+    conn = psycopg2.connect(dbname=DB_NAME, user=DB_USER, password=DB_PASS, host=DB_HOST, port=DB_PORT)
+    print("Successfully connected to the database.")
+    total_rows = 0
+    start_time = time.perf_counter()
+    thread = None
+    try:
+        load_to_db.create_tables(conn, drop_existing=False)
+        conn.commit()
+        assigner = MasterAssigner(conn)
+
+        thread = threading.Thread(target=producer, name="crawl-producer", daemon=True)
+        thread.start()
+
+        pending = {}      # platform -> list record yang belum ditulis
+        csv_rows = {}     # platform -> id terakhir di sink CSV
+        last_flush = time.monotonic()
+        finished = False
+        while not finished:
+            try:
+                item = batches.get(timeout=flush_interval)
+            except queue.Empty:
+                item = None
+            if item is _END_OF_STREAM:
+                finished = True
+            elif item is not None:
+                platform, records = item
+                pending.setdefault(platform, []).extend(records)
+
+            due = finished or time.monotonic() - last_flush >= flush_interval
+            for platform in list(pending):
+                records = pending[platform]
+                if not records or (len(records) < batch_size and not due):
+                    continue
+                df = prepare_batch(records, platform, assigner)
+                load_to_db.upsert_product_master_data(conn, df, method=method)
+                if storage == "changes":
+                    load_to_db.upsert_price_changes(conn, df, method=method)
+                else:
+                    load_to_db.upsert_product_data(conn, df, method=method)
+                notify_invalidation(conn)
+                conn.commit()
+                if csv_dir:
+                    write_csv_sink(df, csv_dir, csv_rows)
+                if dataset_dir:
+                    dataset_store.write_dataset(df, dataset_dir)
+                total_rows += len(df)
+                pending[platform] = []
+            if due:
+                last_flush = time.monotonic()
+
+        thread.join()
+        if crawl_errors:
+            raise crawl_errors[0]
+    except BaseException:
+        # Hentikan crawl lebih dulu: rollback bisa gagal jika koneksinya sendiri yang rusak
+        if thread is not None and thread.is_alive():
+            stop_producer(thread, batches, stop)
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+        print("Database connection closed.")
+
+    elapsed = time.perf_counter() - start_time
+    print(f"Pipeline finished: {total_rows} rows streamed in {elapsed:.1f}s.")
+    return total_rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scrape dan muat langsung ke PostgreSQL per micro-batch.")
+    parser.add_argument("--platforms", nargs="+", choices=list(SCRAPERS), default=None)
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--queue-size", type=int, default=DEFAULT_QUEUE_SIZE,
+                        help="Jumlah micro-batch yang boleh menunggu sebelum scraper ditahan.")
+    parser.add_argument("--flush-interval", type=float, default=DEFAULT_FLUSH_INTERVAL)
+    parser.add_argument("--csv-dir", default=None, help="Jika diisi, batch juga ditulis ke <platform>_cleaned.csv di folder ini.")
+    parser.add_argument("--dataset-dir", default=None,
+                        help="Jika diisi, batch juga ditulis ke dataset Parquet (partisi platform/tanggal) di folder ini.")
+    parser.add_argument("--method", choices=["auto", "copy", "values"], default="auto")
+    parser.add_argument("--storage", choices=load_to_db.STORAGE_MODES, default="rows",
+                        help="changes: hanya simpan perubahan harga per listing (price_history.py).")
+    parser.add_argument("--pool-size", type=int, default=DEFAULT_POOL_SIZE)
+    parser.add_argument("--mode", choices=["dom", "json"], default="dom")
+    args = parser.parse_args()
+
+    run_pipeline(
+        build_jobs(args.platforms),
+        batch_size=args.batch_size,
+        queue_size=args.queue_size,
+        flush_interval=args.flush_interval,
+        csv_dir=args.csv_dir,
+        method=args.method,
+        pool_size=args.pool_size,
+        mode=args.mode,
+        dataset_dir=args.dataset_dir,
+        storage=args.storage,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,258 @@
+"""
+Agregat harga per product master yang dipelihara secara incremental.
+
+`product_price_platform_daily` menyimpan sum/count/min/max harga dan diskon per
+(product_master_id, platform, hari WIB), `product_price_daily` ringkasannya per
+(master, hari), dan `product_price_stats` totalnya per master. Loader hanya
+menghitung ulang pasangan (master, hari) yang tersentuh delta, sehingga
+recommender dan fitur model harga cukup membaca agregat ini alih-alih memindai
+seluruh riwayat `product`.
+
+Perintah (dari root proyek):
+    python price_aggregates.py --rebuild   # hitung ulang semua agregat dari tabel product
+"""
+import argparse
+
+import psycopg2
+
+# --- PENGATURAN KONEKSI DATABASE ---
+DB_NAME = "mydatabase"
+DB_USER = "myuser"
+DB_PASS = "mypassword"
+DB_HOST = "localhost"
+DB_PORT = "5432"
+
+LOCAL_TZ = "Asia/Jakarta"
+
+PLATFORM_DAILY_COLUMNS = """
+    product_master_id, platform, day, price_sum, price_count, min_price, max_price,
+    discount_sum, max_discount, max_original_price, detail
+"""
+
+# Agregat per (master, platform, hari WIB) dari baris `product p` yang diberikan `{source}`.
+# Diskon tersimpan sebagai teks ("33" / "33%"); nilai yang tidak bisa di-parse dihitung 0.
+_PLATFORM_DAILY_SELECT = """
+    SELECT
+        p.product_master_id,
+        COALESCE(p.platform, ''),
+        (p.created_at AT TIME ZONE '{tz}')::date,
+        SUM(p.price),
+        COUNT(*),
+        MIN(p.price),
+        MAX(p.price),
+        SUM(d.discount),
+        MAX(d.discount),
+        MAX(CASE WHEN p.original_price ~ '^[0-9]+$' THEN CAST(p.original_price AS INTEGER) ELSE p.price END),
+        MIN(p.detail)
+    {source}
+    CROSS JOIN LATERAL (
+        SELECT CASE WHEN p.discount_percentage ~ '^[0-9]+%?$'
+                    THEN CAST(rtrim(p.discount_percentage, '%') AS INTEGER) ELSE 0 END AS discount
+    ) d
+    WHERE p.price > 0 AND p.product_master_id IS NOT NULL
+    GROUP BY 1, 2, 3
+"""
+
+# product_price_daily diturunkan dari rincian per platform (baris `pd` yang diberikan `{source}`)
+_DAILY_FROM_PLATFORM_SELECT = """
+    SELECT pd.product_master_id, pd.day, SUM(pd.price_sum), SUM(pd.price_count), MAX(pd.max_original_price)
+    {source}
+    GROUP BY 1, 2
+"""
+
+_TOUCHED_PRODUCT_ROWS = """
+    FROM touched_days t
+    JOIN product p
+      ON p.product_master_id = t.product_master_id
+     AND p.created_at >= (t.day::timestamp AT TIME ZONE '{tz}')
+     AND p.created_at < ((t.day + 1)::timestamp AT TIME ZONE '{tz}')
+"""
+
+_TOUCHED_PLATFORM_ROWS = """
+    FROM touched_days t
+    JOIN product_price_platform_daily pd
+      ON pd.product_master_id = t.product_master_id AND pd.day = t.day
+"""
+
+
+def rebuild_aggregates(conn):
+    """Menghitung ulang seluruh agregat dari tabel product (dipakai saat muat ulang penuh)."""
+    print("Rebuilding price aggregates from 'product'...")
+    with conn.cursor() as cur:
+        cur.execute("TRUNCATE product_price_platform_daily, product_price_daily, product_price_stats;")
+        cur.execute(f"""
+            INSERT INTO product_price_platform_daily ({PLATFORM_DAILY_COLUMNS})
+            {_PLATFORM_DAILY_SELECT.format(tz=LOCAL_TZ, source="FROM product p")};
+        """)
+        cur.execute(f"""
+            INSERT INTO product_price_daily (product_master_id, day, price_sum, price_count, max_original_price)
+            {_DAILY_FROM_PLATFORM_SELECT.format(source="FROM product_price_platform_daily pd")};
+        """)
+        cur.execute("""
+            INSERT INTO product_price_stats (product_master_id, price_sum, price_count, max_original_price, updated_at)
+            SELECT product_master_id, SUM(price_sum), SUM(price_count), MAX(max_original_price), now()
+            FROM product_price_daily
+            GROUP BY product_master_id;
+        """)
+        cur.execute("SELECT COUNT(*) FROM product_price_stats;")
+        print(f"Aggregates rebuilt for {cur.fetchone()[0]} product masters.")
+
+
+def collect_touched_keys(conn, staging_table):
+    """
+    Mencatat pasangan (master, hari) yang akan berubah oleh isi `staging_table`,
+    termasuk master lama dari baris yang sudah ada (jika listing pindah master).
+    Harus dipanggil SEBELUM upsert ke product.
+    """
+    with conn.cursor() as cur:
+        cur.execute("""
+            CREATE TEMP TABLE IF NOT EXISTS touched_price_keys (
+                product_master_id INT,
+                day DATE
+            ) ON COMMIT DROP;
+        """)
+        cur.execute(f"""
+            INSERT INTO touched_price_keys (product_master_id, day)
+            SELECT DISTINCT product_master_id, (created_at AT TIME ZONE '{LOCAL_TZ}')::date
+            FROM {staging_table};
+        """)
+        cur.execute(f"""
+            INSERT INTO touched_price_keys (product_master_id, day)
+            SELECT DISTINCT p.product_master_id, (p.created_at AT TIME ZONE '{LOCAL_TZ}')::date
+            FROM {staging_table} s
+            JOIN product p
+              ON p.platform = s.platform
+             AND p.name = s.name
+             AND p.detail IS NOT DISTINCT FROM s.detail
+             AND p.created_at = s.created_at
+            WHERE p.product_master_id IS DISTINCT FROM s.product_master_id;
+        """)
+
+
+def refresh_touched(conn):
+    """Menghitung ulang agregat harian & total hanya untuk pasangan yang tercatat di touched_price_keys."""
+    with conn.cursor() as cur:
+        cur.execute("SELECT to_regclass('pg_temp.touched_price_keys');")
+        if cur.fetchone()[0] is None:
+            return 0
+        cur.execute("""
+            CREATE TEMP TABLE touched_days ON COMMIT DROP AS
+            SELECT DISTINCT product_master_id, day FROM touched_price_keys
+            WHERE product_master_id IS NOT NULL;
+        """)
+        for table in ("product_price_platform_daily", "product_price_daily"):
+            cur.execute(f"""
+                DELETE FROM {table} d
+                USING touched_days t
+                WHERE d.product_master_id = t.product_master_id AND d.day = t.day;
+            """)
+        # Rentang satu hari WIB per pasangan -> memakai index (product_master_id, created_at).
+        # product hanya dibaca sekali; ringkasan harian diturunkan dari rincian per platform.
+        cur.execute(f"""
+            INSERT INTO product_price_platform_daily ({PLATFORM_DAILY_COLUMNS})
+            {_PLATFORM_DAILY_SELECT.format(tz=LOCAL_TZ, source=_TOUCHED_PRODUCT_ROWS.format(tz=LOCAL_TZ))};
+        """)
+        cur.execute(f"""
+            INSERT INTO product_price_daily (product_master_id, day, price_sum, price_count, max_original_price)
+            {_DAILY_FROM_PLATFORM_SELECT.format(source=_TOUCHED_PLATFORM_ROWS)};
+        """)
+        cur.execute("""
+            INSERT INTO product_price_stats (product_master_id, price_sum, price_count, max_original_price, updated_at)
+            SELECT d.product_master_id, SUM(d.price_sum), SUM(d.price_count), MAX(d.max_original_price), now()
+            FROM product_price_daily d
+            WHERE d.product_master_id IN (SELECT product_master_id FROM touched_days)
+            GROUP BY d.product_master_id
+            ON CONFLICT (product_master_id) DO UPDATE SET
+                price_sum = EXCLUDED.price_sum,
+                price_count = EXCLUDED.price_count,
+                max_original_price = EXCLUDED.max_original_price,
+                updated_at = EXCLUDED.updated_at;
+        """)
+        # Master yang tidak lagi punya observasi harga
+        cur.execute("""
+            DELETE FROM product_price_stats s
+            WHERE s.product_master_id IN (SELECT product_master_id FROM touched_days)
+              AND NOT EXISTS (SELECT 1 FROM product_price_daily d WHERE d.product_master_id = s.product_master_id);
+        """)
+        cur.execute("SELECT COUNT(DISTINCT product_master_id) FROM touched_days;")
+        refreshed = cur.fetchone()[0]
+        cur.execute("DROP TABLE touched_days;")
+        cur.execute("TRUNCATE touched_price_keys;")
+    print(f"Price aggregates refreshed for {refreshed} product masters.")
+    return refreshed
+
+
+def backfill_platform_daily_from_intervals(conn):
+    """
+    Mengisi product_price_platform_daily pada database mode `changes` yang dibuat
+    sebelum tabel ini ada. Observasi mentah tidak tersimpan, jadi setiap interval
+    diuraikan menjadi satu hitungan per hari WIB dari valid_from sampai observasi
+    terakhirnya. Observasi berikutnya ditambahkan secara tepat oleh price_history.py.
+    """
+    print("Backfilling per-platform daily aggregates from price intervals...")
+    with conn.cursor() as cur:
+        cur.execute(f"""
+            INSERT INTO product_price_platform_daily ({PLATFORM_DAILY_COLUMNS})
+            SELECT
+                l.product_master_id,
+                COALESCE(l.platform, ''),
+                d.day::date,
+                SUM(i.price),
+                COUNT(*),
+                MIN(i.price),
+                MAX(i.price),
+                SUM(COALESCE(i.discount_percentage, 0)),
+                MAX(COALESCE(i.discount_percentage, 0)),
+                MAX(COALESCE(i.original_price, i.price)),
+                MIN(l.detail)
+            FROM listing_price_interval i
+            JOIN listing l ON l.id = i.listing_id
+            CROSS JOIN LATERAL generate_series(
+                (i.valid_from AT TIME ZONE '{LOCAL_TZ}')::date,
+                (i.last_observed_at AT TIME ZONE '{LOCAL_TZ}')::date,
+                interval '1 day'
+            ) AS d(day)
+            WHERE i.price > 0 AND l.product_master_id IS NOT NULL
+            GROUP BY 1, 2, 3;
+        """)
+        print(f"Backfilled {cur.rowcount} (master, platform, day) rows.")
+
+
+def ensure_aggregates(conn):
+    """Membangun agregat sekali jika tabelnya masih kosong padahal riwayat harga sudah berisi data."""
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT EXISTS (SELECT 1 FROM product_price_stats),
+                   EXISTS (SELECT 1 FROM product_price_platform_daily),
+                   EXISTS (SELECT 1 FROM product),
+                   EXISTS (SELECT 1 FROM listing_price_interval);
+        """)
+        has_stats, has_platform_daily, has_products, has_intervals = cur.fetchone()
+    if has_products and not (has_stats and has_platform_daily):
+        rebuild_aggregates(conn)
+    elif has_intervals and not has_products and not has_platform_daily:
+        backfill_platform_daily_from_intervals(conn)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pemeliharaan agregat harga per product master.")
+    parser.add_argument("--rebuild", action="store_true", help="Hitung ulang semua agregat dari tabel product.")
+    args = parser.parse_args()
+
+    conn = None
+    try:
+        conn = psycopg2.connect(dbname=DB_NAME, user=DB_USER, password=DB_PASS, host=DB_HOST, port=DB_PORT)
+        if args.rebuild:
+            rebuild_aggregates(conn)
+        else:
+            ensure_aggregates(conn)
+        conn.commit()
+    except Exception as e:
+        print(f"An error occurred: {e}")
+        if conn: conn.rollback()
+    finally:
+        if conn: conn.close()
+
+
+if __name__ == "__main__":
+    main()
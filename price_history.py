@@ -0,0 +1,348 @@
+"""
+Penyimpanan riwayat harga yang hanya mencatat perubahan (mode `--storage changes`).
+
+Alih-alih satu baris `product` per listing per crawl, setiap listing
+(platform, name, detail) disimpan sekali di tabel `listing`, dan harganya di
+`listing_price_interval` sebagai interval [valid_from, valid_to): interval
+baru hanya dibuat jika price/original_price/discount_percentage berubah.
+Crawl dengan harga yang sama hanya menambah `observation_count` dan menggeser
+`last_observed_at` interval yang masih terbuka (valid_to NULL).
+
+- Harga pada waktu T: interval dengan valid_from <= T < valid_to (lihat `price_at`),
+  sama dengan "observasi terakhir sebelum T" pada mode baris.
+- Rata-rata: agregat `product_price_daily`/`product_price_stats` diperbarui
+  dengan delta setiap observasi yang masuk, jadi hasilnya sama dengan AVG(price)
+  atas semua baris walaupun barisnya tidak disimpan.
+
+Tabel `listing` juga dipelihara di mode baris (`upsert_listings`), sehingga
+pencocokan master dan pencarian selalu punya sumber satu-baris-per-listing.
+
+Observasi yang lebih lama dari `last_observed_at` listing-nya (file lama yang
+dimuat ulang) dilewati. Satu database sebaiknya memakai satu mode penyimpanan;
+untuk pindah dari mode baris jalankan `--backfill --truncate-product`.
+
+Perintah (dari root proyek):
+    python price_history.py --backfill --truncate-product   # pindahkan tabel product ke interval
+    python price_history.py --stats
+    python price_history.py --at 2025-09-15T12:00:00+07:00 --master-id 1
+"""
+import argparse
+
+import pandas as pd
+import psycopg2
+
+# --- PENGATURAN KONEKSI DATABASE ---
+DB_NAME = "mydatabase"
+DB_USER = "myuser"
+DB_PASS = "mypassword"
+DB_HOST = "localhost"
+DB_PORT = "5432"
+
+LOCAL_TZ = "Asia/Jakarta"
+
+
+def record_observations(conn, staging_table, update_aggregates=True):
+    """
+    Mencatat isi `staging_table` (kolom seperti tabel product tanpa id) sebagai
+    interval harga. Baris yang harganya sama dengan observasi sebelumnya hanya
+    memperpanjang interval. Mengembalikan dict jumlah observasi/interval.
+    """
+    # 1. Satu baris per listing; master mengikuti observasi terbaru
+    upsert_listings(conn, staging_table)
+    with conn.cursor() as cur:
+
+        # 2. Observasi baru (lebih baru dari interval terbuka listing-nya) dengan harga bertipe integer
+        cur.execute(f"""
+            CREATE TEMP TABLE price_observation_batch ON COMMIT DROP AS
+            SELECT
+                l.id AS listing_id,
+                l.platform,
+                l.detail,
+                s.product_master_id,
+                s.created_at,
+                s.price,
+                CASE WHEN s.original_price ~ '^[0-9]+$' THEN CAST(s.original_price AS INTEGER) END AS original_price,
+                CASE WHEN s.discount_percentage ~ '^[0-9]+%?$'
+                     THEN CAST(rtrim(s.discount_percentage, '%') AS INTEGER) END AS discount_percentage
+            FROM {staging_table} s
+            JOIN listing l
+              ON l.platform = s.platform
+             AND l.name = s.name
+             AND l.detail IS NOT DISTINCT FROM s.detail
+            LEFT JOIN listing_price_interval cur
+              ON cur.listing_id = l.id AND cur.valid_to IS NULL
+            WHERE cur.listing_id IS NULL OR s.created_at > cur.last_observed_at;
+        """)
+
+        # 3. Run = rangkaian observasi berurutan dengan harga sama. Run 0 melanjutkan
+        #    interval terbuka; run >= 1 menjadi interval baru.
+        cur.execute("""
+            CREATE TEMP TABLE price_observation_runs ON COMMIT DROP AS
+            WITH flagged AS (
+                SELECT
+                    b.*,
+                    CASE
+                        WHEN LAG(b.created_at) OVER w IS NULL THEN
+                            cur.listing_id IS NULL
+                            OR (cur.price, cur.original_price, cur.discount_percentage)
+                               IS DISTINCT FROM (b.price, b.original_price, b.discount_percentage)
+                        ELSE
+                            (LAG(b.price) OVER w, LAG(b.original_price) OVER w, LAG(b.discount_percentage) OVER w)
+                            IS DISTINCT FROM (b.price, b.original_price, b.discount_percentage)
+                    END AS changed
+                FROM price_observation_batch b
+                LEFT JOIN listing_price_interval cur
+                  ON cur.listing_id = b.listing_id AND cur.valid_to IS NULL
+                WINDOW w AS (PARTITION BY b.listing_id ORDER BY b.created_at)
+            ),
+            numbered AS (
+                SELECT *, SUM(changed::int) OVER (PARTITION BY listing_id ORDER BY created_at
+                                                  ROWS UNBOUNDED PRECEDING) AS run
+                FROM flagged
+            )
+            SELECT
+                listing_id, run,
+                MIN(created_at) AS valid_from,
+                MAX(created_at) AS last_observed_at,
+                COUNT(*) AS observation_count,
+                MIN(price) AS price,
+                MIN(original_price) AS original_price,
+                MIN(discount_percentage) AS discount_percentage
+            FROM numbered
+            GROUP BY listing_id, run;
+        """)
+
+        # 4. Harga tidak berubah: perpanjang interval terbuka
+        cur.execute("""
+            UPDATE listing_price_interval i
+            SET observation_count = i.observation_count + r.observation_count,
+                last_observed_at = r.last_observed_at
+            FROM price_observation_runs r
+            WHERE r.run = 0 AND i.listing_id = r.listing_id AND i.valid_to IS NULL;
+        """)
+        extended = cur.rowcount
+
+        # 5. Harga berubah: tutup interval terbuka pada observasi perubahan pertama, lalu tulis interval baru
+        cur.execute("""
+            UPDATE listing_price_interval i
+            SET valid_to = r.valid_from
+            FROM price_observation_runs r
+            WHERE r.run = 1 AND i.listing_id = r.listing_id AND i.valid_to IS NULL;
+        """)
+        cur.execute("""
+            INSERT INTO listing_price_interval (listing_id, valid_from, valid_to, price, original_price,
+                                                discount_percentage, observation_count, last_observed_at)
+            SELECT listing_id, valid_from,
+                   LEAD(valid_from) OVER (PARTITION BY listing_id ORDER BY run),
+                   price, original_price, discount_percentage, observation_count, last_observed_at
+            FROM price_observation_runs
+            WHERE run >= 1;
+        """)
+        created = cur.rowcount
+
+        cur.execute("SELECT COUNT(*) FROM price_observation_batch;")
+        observations = cur.fetchone()[0]
+        if update_aggregates:
+            _apply_aggregate_deltas(cur)
+        cur.execute("DROP TABLE price_observation_runs;")
+        cur.execute("DROP TABLE price_observation_batch;")
+
+    print(f"Price history: {observations} new observations -> {created} new intervals, "
+          f"{extended} intervals extended.")
+    return {"observations": observations, "intervals_created": created, "intervals_extended": extended}
+
+
+def upsert_listings(conn, source_table):
+    """
+    Menambahkan/memperbarui satu baris `listing` per (platform, name, detail) dari
+    `source_table` (kolom seperti tabel product). Master mengikuti observasi
+    terbaru; first/last_seen_at melebar. Dipakai di kedua mode penyimpanan.
+    """
+    with conn.cursor() as cur:
+        cur.execute(f"""
+            INSERT INTO listing (platform, name, detail, product_master_id, first_seen_at, last_seen_at)
+            SELECT platform, name, detail,
+                   (array_agg(product_master_id ORDER BY created_at DESC))[1],
+                   MIN(created_at), MAX(created_at)
+            FROM {source_table}
+            GROUP BY platform, name, detail
+            ON CONFLICT ON CONSTRAINT listing_natural_key DO UPDATE SET
+                product_master_id = CASE WHEN EXCLUDED.last_seen_at >= listing.last_seen_at
+                                         THEN EXCLUDED.product_master_id ELSE listing.product_master_id END,
+                first_seen_at = LEAST(listing.first_seen_at, EXCLUDED.first_seen_at),
+                last_seen_at = GREATEST(listing.last_seen_at, EXCLUDED.last_seen_at);
+        """)
+        return cur.rowcount
+
+
+def ensure_listings(conn):
+    """
+    Mengisi `listing` sekali dari tabel product pada database mode baris yang
+    dibuat sebelum listing dipelihara di mode itu (satu kali GROUP BY riwayat).
+    """
+    with conn.cursor() as cur:
+        cur.execute("SELECT EXISTS (SELECT 1 FROM listing), EXISTS (SELECT 1 FROM product);")
+        has_listings, has_products = cur.fetchone()
+    if has_products and not has_listings:
+        print("Backfilling 'listing' from 'product'...")
+        print(f"Backfilled {upsert_listings(conn, 'product')} listings.")
+
+
+def _apply_aggregate_deltas(cur):
+    """Menambahkan observasi di price_observation_batch ke agregat harian & total (tanpa memindai riwayat)."""
+    cur.execute(f"""
+        INSERT INTO product_price_platform_daily (product_master_id, platform, day, price_sum, price_count,
+                                                  min_price, max_price, discount_sum, max_discount,
+                                                  max_original_price, detail)
+        SELECT product_master_id, COALESCE(platform, ''), (created_at AT TIME ZONE '{LOCAL_TZ}')::date,
+               SUM(price), COUNT(*), MIN(price), MAX(price),
+               SUM(COALESCE(discount_percentage, 0)), MAX(COALESCE(discount_percentage, 0)),
+               MAX(COALESCE(original_price, price)), MIN(detail)
+        FROM price_observation_batch
+        WHERE price > 0 AND product_master_id IS NOT NULL
+        GROUP BY 1, 2, 3
+        ON CONFLICT (product_master_id, platform, day) DO UPDATE SET
+            price_sum = product_price_platform_daily.price_sum + EXCLUDED.price_sum,
+            price_count = product_price_platform_daily.price_count + EXCLUDED.price_count,
+            min_price = LEAST(product_price_platform_daily.min_price, EXCLUDED.min_price),
+            max_price = GREATEST(product_price_platform_daily.max_price, EXCLUDED.max_price),
+            discount_sum = product_price_platform_daily.discount_sum + EXCLUDED.discount_sum,
+            max_discount = GREATEST(product_price_platform_daily.max_discount, EXCLUDED.max_discount),
+            max_original_price = GREATEST(product_price_platform_daily.max_original_price,
+                                          EXCLUDED.max_original_price),
+            detail = LEAST(product_price_platform_daily.detail, EXCLUDED.detail);
+    """)
+    cur.execute(f"""
+        INSERT INTO product_price_daily (product_master_id, day, price_sum, price_count, max_original_price)
+        SELECT product_master_id, (created_at AT TIME ZONE '{LOCAL_TZ}')::date,
+               SUM(price), COUNT(*), MAX(COALESCE(original_price, price))
+        FROM price_observation_batch
+        WHERE price > 0 AND product_master_id IS NOT NULL
+        GROUP BY 1, 2
+        ON CONFLICT (product_master_id, day) DO UPDATE SET
+            price_sum = product_price_daily.price_sum + EXCLUDED.price_sum,
+            price_count = product_price_daily.price_count + EXCLUDED.price_count,
+            max_original_price = GREATEST(product_price_daily.max_original_price, EXCLUDED.max_original_price);
+    """)
+    cur.execute("""
+        INSERT INTO product_price_stats (product_master_id, price_sum, price_count, max_original_price, updated_at)
+        SELECT product_master_id, SUM(price), COUNT(*), MAX(COALESCE(original_price, price)), now()
+        FROM price_observation_batch
+        WHERE price > 0 AND product_master_id IS NOT NULL
+        GROUP BY product_master_id
+        ON CONFLICT (product_master_id) DO UPDATE SET
+            price_sum = product_price_stats.price_sum + EXCLUDED.price_sum,
+            price_count = product_price_stats.price_count + EXCLUDED.price_count,
+            max_original_price = GREATEST(product_price_stats.max_original_price, EXCLUDED.max_original_price),
+            updated_at = EXCLUDED.updated_at;
+    """)
+
+
+def storage_mode(conn):
+    """'changes' jika riwayat hanya ada di listing_price_interval (product kosong), selain itu 'rows'."""
+    with conn.cursor() as cur:
+        cur.execute("SELECT EXISTS (SELECT 1 FROM product);")
+        if cur.fetchone()[0]:
+            return "rows"
+        cur.execute("SELECT to_regclass('listing_price_interval');")
+        if cur.fetchone()[0] is None:
+            return "rows"
+        cur.execute("SELECT EXISTS (SELECT 1 FROM listing_price_interval);")
+        return "changes" if cur.fetchone()[0] else "rows"
+
+
+def price_at_query(at, master_ids=None, platforms=None):
+    """(query, params) untuk `price_at`; dipakai juga oleh pemeriksaan EXPLAIN di schema.py."""
+    conditions = ["i.valid_from <= %s", "(i.valid_to IS NULL OR i.valid_to > %s)"]
+    params = [at, at]
+    if master_ids:
+        conditions.append("l.product_master_id = ANY(%s)")
+        params.append(list(master_ids))
+    if platforms:
+        conditions.append("l.platform = ANY(%s)")
+        params.append(list(platforms))
+    query = f"""
+        SELECT l.id AS listing_id, l.platform, l.name, l.detail, l.product_master_id,
+               i.price, i.original_price, i.discount_percentage, i.valid_from, i.last_observed_at
+        FROM listing_price_interval i
+        JOIN listing l ON l.id = i.listing_id
+        WHERE {' AND '.join(conditions)}
+        ORDER BY l.product_master_id, l.platform, l.id;
+    """
+    return query, tuple(params)
+
+
+def price_at(conn, at, master_ids=None, platforms=None):
+    """
+    Harga setiap listing yang berlaku pada waktu `at` (interval valid_from <= at < valid_to).
+    `last_observed_at` menunjukkan kapan harga itu terakhir benar-benar terlihat.
+    """
+    with conn.cursor() as cur:
+        cur.execute(*price_at_query(at, master_ids, platforms))
+        columns = [desc[0] for desc in cur.description]
+        return pd.DataFrame(cur.fetchall(), columns=columns)
+
+
+def compression_stats(conn):
+    """Jumlah observasi vs interval yang disimpan (rasio = penghematan dibanding mode baris)."""
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT COUNT(DISTINCT listing_id), COUNT(*), COALESCE(SUM(observation_count), 0)
+            FROM listing_price_interval;
+        """)
+        listings, intervals, observations = cur.fetchone()
+    return {
+        "listings": listings,
+        "intervals": intervals,
+        "observations": int(observations),
+        "compression_ratio": round(observations / intervals, 2) if intervals else None,
+    }
+
+
+def backfill_from_product(conn, truncate_product=False):
+    """
+    Mengubah riwayat di tabel product menjadi interval. Agregat tidak disentuh
+    (sudah dihitung dari product). truncate_product=True mengosongkan product
+    setelahnya sehingga loader berikutnya cukup memakai `--storage changes`.
+    """
+    print("Backfilling price intervals from 'product'...")
+    result = record_observations(conn, "product", update_aggregates=False)
+    if truncate_product:
+        with conn.cursor() as cur:
+            cur.execute("TRUNCATE product;")
+        print("Table 'product' truncated; use --storage changes for future loads.")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Riwayat harga berbasis perubahan (listing_price_interval).")
+    parser.add_argument("--backfill", action="store_true", help="Isi interval dari tabel product yang ada.")
+    parser.add_argument("--truncate-product", action="store_true",
+                        help="Dengan --backfill: kosongkan product setelah dipindahkan.")
+    parser.add_argument("--stats", action="store_true", help="Tampilkan rasio observasi per interval.")
+    parser.add_argument("--at", default=None, help="Tampilkan harga yang berlaku pada waktu ini (ISO 8601).")
+    parser.add_argument("--master-id", type=int, nargs="+", default=None)
+    parser.add_argument("--platform", nargs="+", default=None)
+    args = parser.parse_args()
+
+    conn = None
+    try:
+        conn = psycopg2.connect(dbname=DB_NAME, user=DB_USER, password=DB_PASS, host=DB_HOST, port=DB_PORT)
+        if args.backfill:
+            backfill_from_product(conn, truncate_product=args.truncate_product)
+            conn.commit()
+        if args.stats:
+            for key, value in compression_stats(conn).items():
+                print(f"{key:<18} {value}")
+        if args.at:
+            df = price_at(conn, args.at, args.master_id, args.platform)
+            print(df.to_string(index=False) if not df.empty else "No prices valid at that time.")
+    except Exception as e:
+        print(f"An error occurred: {e}")
+        if conn: conn.rollback()
+    finally:
+        if conn: conn.close()
+
+
+if __name__ == "__main__":
+    main()
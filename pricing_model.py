@@ -0,0 +1,215 @@
+"""
+Model harga terlatih untuk ml_recommender.
+
+Fitur dibangun secara vektor (pandas groupby, bukan loop per master) dari
+agregat `product_price_platform_daily` (ringkasan per master, platform, hari):
+harga rata-rata per platform, kedalaman diskon, recency, dan ukuran kemasan
+dari `detail`. Modelnya scikit-learn (imputer + LinearRegression) yang
+dilatih memprediksi harga rata-rata hari observasi berikutnya dari riwayat
+sebelumnya, lalu seluruh master diskor dengan satu panggilan `predict`.
+
+Model disimpan di cache on-disk (`model_cache/`) dengan nama berisi versi
+fitur dan fingerprint data, sehingga run harian tanpa data baru tidak
+melatih ulang.
+"""
+import glob
+import hashlib
+import os
+from datetime import date
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.impute import SimpleImputer
+from sklearn.linear_model import LinearRegression
+from sklearn.pipeline import Pipeline
+
+from normalization import pack_size_to_base_units
+
+MODEL_CACHE_DIR = os.environ.get("PRICING_MODEL_CACHE_DIR", "model_cache")
+MODEL_VERSION = 2          # Naikkan jika daftar/definisi fitur berubah agar cache lama tidak dipakai
+MIN_TRAINING_ROWS = 20     # Di bawah ini model tidak dilatih; recommender memakai rata-rata harga
+
+PLATFORMS = ['tokopedia', 'blibli', 'indomaret']
+FEATURE_COLUMNS = [
+    'avg_price', 'min_price', 'max_price', 'last_price',
+    *[f'price_{platform}' for platform in PLATFORMS],
+    'avg_discount', 'max_discount',
+    'observations', 'active_days', 'days_since_seen',
+    'pack_size',
+]
+
+# Riwayat dibaca dari agregat per (master, platform, hari WIB) yang dipelihara
+# loader (price_aggregates.py / price_history.py), sehingga yang ditarik ke Python
+# sebanding dengan jumlah master x hari tanpa memindai observasi mentah `product`.
+HISTORY_QUERY = """
+    SELECT
+        product_master_id,
+        platform,
+        day,
+        price_sum,
+        price_count,
+        min_price,
+        max_price,
+        discount_sum,
+        max_discount,
+        detail
+    FROM product_price_platform_daily
+    WHERE price_count > 0 {shard_filter};
+"""
+
+
+def fetch_history(conn, shard=None):
+    """
+    Mengambil riwayat harga harian per (master, platform) dari product_price_platform_daily;
+    sama untuk mode penyimpanan `rows` maupun `changes`.
+    shard=(index, count) membatasi ke master dengan product_master_id % count = index.
+    """
+    print("Fetching daily price history for model features...")
+    shard_filter = ""
+    if shard is not None:
+        index, count = (int(v) for v in shard)
+        shard_filter = f"AND mod(product_master_id, {count}) = {index}"
+    daily = pd.read_sql_query(HISTORY_QUERY.format(shard_filter=shard_filter), conn)
+    daily['day'] = pd.to_datetime(daily['day'])
+    for col in ['price_sum', 'price_count', 'min_price', 'max_price', 'discount_sum', 'max_discount']:
+        daily[col] = daily[col].astype(float)
+    return daily
+
+
+def _weighted_price(frame, by):
+    grouped = frame.groupby(by)[['price_sum', 'price_count']].sum()
+    return grouped['price_sum'] / grouped['price_count']
+
+
+def build_features(daily, as_of):
+    """
+    Membangun matriks fitur per product_master_id dari riwayat harian.
+    `as_of` adalah Timestamp (atau Series per master) acuan perhitungan recency.
+    """
+    if daily.empty:
+        return pd.DataFrame(columns=FEATURE_COLUMNS, dtype=float)
+    daily = daily.assign(pack_size=pack_size_to_base_units(daily['detail']).values)
+    grouped = daily.groupby('product_master_id')
+    price_count = grouped['price_count'].sum()
+    last_day = grouped['day'].max()
+    if isinstance(as_of, pd.Series):
+        as_of = as_of.reindex(last_day.index)
+
+    on_last_day = daily[daily['day'] == daily['product_master_id'].map(last_day)]
+    per_platform = _weighted_price(daily, ['product_master_id', 'platform']).unstack('platform')
+    per_platform = per_platform.reindex(columns=PLATFORMS)
+
+    features = pd.DataFrame({
+        'avg_price': grouped['price_sum'].sum() / price_count,
+        'min_price': grouped['min_price'].min(),
+        'max_price': grouped['max_price'].max(),
+        'last_price': _weighted_price(on_last_day, 'product_master_id'),
+        'avg_discount': grouped['discount_sum'].sum() / price_count,
+        'max_discount': grouped['max_discount'].max(),
+        'observations': price_count,
+        'active_days': grouped['day'].nunique(),
+        'days_since_seen': (as_of - last_day).dt.days,
+        'pack_size': grouped['pack_size'].median(),
+    })
+    for platform in PLATFORMS:
+        features[f'price_{platform}'] = per_platform[platform]
+    return features[FEATURE_COLUMNS].astype(float)
+
+
+def build_training_set(daily):
+    """
+    Contoh latih per master: fitur dari riwayat sebelum hari observasi terakhir,
+    target = harga rata-rata pada hari terakhir itu. Master yang baru terlihat
+    satu hari tidak punya contoh.
+    """
+    if daily.empty:
+        return pd.DataFrame(columns=FEATURE_COLUMNS, dtype=float), pd.Series(dtype=float)
+    last_day = daily.groupby('product_master_id')['day'].max()
+    is_target = daily['day'] == daily['product_master_id'].map(last_day)
+    prior, target_rows = daily[~is_target], daily[is_target]
+    if prior.empty:
+        return pd.DataFrame(columns=FEATURE_COLUMNS, dtype=float), pd.Series(dtype=float)
+
+    features = build_features(prior, as_of=last_day)
+    target = _weighted_price(target_rows, 'product_master_id').reindex(features.index)
+    return features, target
+
+
+def train_model(features, target):
+    """Melatih pipeline scikit-learn pada matriks fitur."""
+    model = Pipeline([
+        ('impute', SimpleImputer(strategy='median')),
+        ('regress', LinearRegression()),
+    ])
+    model.fit(features[FEATURE_COLUMNS].values, target.values)
+    return model
+
+
+def data_fingerprint(conn):
+    """
+    Fingerprint murah dari isi data: diambil dari tabel agregat product_price_stats
+    (satu baris per master), berubah setiap kali loader menulis harga baru.
+    """
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT COUNT(*), COALESCE(SUM(price_count), 0), COALESCE(SUM(price_sum), 0), MAX(updated_at)
+            FROM product_price_stats;
+        """)
+        row = cur.fetchone()
+    return hashlib.sha256(repr((MODEL_VERSION, *row)).encode("utf-8")).hexdigest()[:16]
+
+
+def _cache_path(cache_dir, fingerprint):
+    return os.path.join(cache_dir, f"pricing_model_v{MODEL_VERSION}_{fingerprint}.joblib")
+
+
+def load_or_train(conn, daily=None, cache_dir=MODEL_CACHE_DIR, retrain=False):
+    """
+    Mengembalikan model dari cache jika fingerprint datanya sama; jika tidak,
+    melatih ulang dan menyimpannya. None jika data latih belum cukup.
+    Riwayat (`daily`) hanya diambil dari database bila memang perlu melatih.
+    """
+    path = _cache_path(cache_dir, data_fingerprint(conn))
+    if not retrain and os.path.exists(path):
+        print(f"Using cached pricing model {path}")
+        return joblib.load(path)
+
+    if daily is None:
+        daily = fetch_history(conn)
+    features, target = build_training_set(daily)
+    if len(features) < MIN_TRAINING_ROWS:
+        print(f"Only {len(features)} training examples (< {MIN_TRAINING_ROWS}); falling back to average price.")
+        return None
+
+    print(f"Training pricing model on {len(features)} examples...")
+    model = train_model(features, target)
+    os.makedirs(cache_dir, exist_ok=True)
+    for old in glob.glob(os.path.join(cache_dir, f"pricing_model_v{MODEL_VERSION}_*.joblib")):
+        os.remove(old)
+    joblib.dump(model, path)
+    print(f"Pricing model saved to {path}")
+    return model
+
+
+def score_masters(model, daily, as_of=None):
+    """
+    Memprediksi harga untuk semua master di `daily` dalam satu panggilan `predict`.
+    Mengembalikan Series product_master_id -> harga prediksi (NaN jika tidak valid).
+    """
+    features = build_features(daily, as_of=pd.Timestamp(as_of or date.today()))
+    if features.empty:
+        return pd.Series(dtype=float)
+    predicted = pd.Series(model.predict(features[FEATURE_COLUMNS].values), index=features.index)
+    return predicted.where(np.isfinite(predicted) & (predicted > 0))
+
+
+def predict_prices(conn, cache_dir=MODEL_CACHE_DIR, retrain=False, as_of=None):
+    """
+    Memuat/melatih model lalu men-skor semua master; Series kosong jika model tidak tersedia.
+    Cache diperiksa lebih dulu, sehingga riwayat hanya dibaca jika memang ada yang perlu diskor.
+    """
+    model = load_or_train(conn, cache_dir=cache_dir, retrain=retrain)
+    if model is None:
+        return pd.Series(dtype=float)
+    return score_masters(model, fetch_history(conn), as_of=as_of)
@@ -1,8 +1,15 @@
+import argparse
+import sys
+
 import pandas as pd
 import psycopg2
 from psycopg2 import sql
 import glob
 
+import dataset_store
+from instrumentation import RunReport, TimedCursor
+from normalization import normalize_price_columns
+
 # --- PENGATURAN KONEKSI DATABASE ---
 DB_NAME = "mydatabase"
 DB_USER = "myuser"
@@ -10,6 +17,10 @@ DB_PASS = "mypassword"
 DB_HOST = "localhost"
 DB_PORT = "5432"
 
+# Kolom yang dibaca dari dataset Parquet (id dibuat ulang di bawah)
+SOURCE_COLUMNS = ['name', 'price', 'original_price', 'discount_percentage',
+                  'detail', 'platform', 'productmasterid', 'createdat']
+
 def create_table(conn):
     """
     Fungsi untuk membuat tabel 'products' dengan skema kolom yang baru dan lengkap.
@@ -51,22 +62,32 @@ def insert_data(conn, df):
             
     print("Insertion complete.")
 
-def main():
-    """Fungsi utama untuk menjalankan seluruh proses."""
+def main(dataset_dir=None, platforms=None):
+    """
+    Fungsi utama untuk menjalankan seluruh proses.
+    dataset_dir: baca dari dataset Parquet (dataset_store.py) alih-alih '*_cleaned.csv'.
+    Mengembalikan status run ("ok" / "failed"), sama dengan yang dicatat di laporan run.
+    """
     conn = None
+    report = RunReport("process_data")
+    status = "failed"
     try:
         # Menggunakan nama file yang lebih spesifik
-        processed_files = glob.glob('*_cleaned.csv') 
+        processed_files = (dataset_store.dataset_files(dataset_dir, platforms) if dataset_dir
+                           else glob.glob('*_cleaned.csv'))
         if not processed_files:
-            print("Error: Tidak ada file '*_cleaned.csv' yang ditemukan.")
-            return
+            print(f"Error: Tidak ada file sumber yang ditemukan ({dataset_dir or '*_cleaned.csv'}).")
+            return status
 
         print(f"Ditemukan {len(processed_files)} file yang sudah diproses: {', '.join(processed_files)}")
         
-        df_combined = pd.concat(
-            [pd.read_csv(f) for f in processed_files], 
-            ignore_index=True
-        )
+        with report.stage("read_source"):
+            if dataset_dir:
+                # Satu kali baca untuk semua partisi terpilih; tipe sudah sesuai skema dataset
+                frames = [dataset_store.read_dataset(processed_files, columns=SOURCE_COLUMNS, root=dataset_dir)]
+            else:
+                frames = [pd.read_csv(f) for f in processed_files]
+            df_combined = normalize_price_columns(pd.concat(frames, ignore_index=True))
         print(f"Data gabungan dari semua file. Total baris: {len(df_combined)}")
 
         # --- PERBAIKAN DI SINI ---
@@ -82,16 +103,22 @@ def main():
         # Ganti nama kolom lain agar cocok dengan skema database
         df_combined.rename(columns={'productmasterid': 'product_master_id', 'createdat': 'created_at'}, inplace=True)
 
-        conn = psycopg2.connect(
-            dbname=DB_NAME, user=DB_USER, password=DB_PASS, host=DB_HOST, port=DB_PORT
-        )
+        with report.stage("connect"):
+            conn = psycopg2.connect(
+                dbname=DB_NAME, user=DB_USER, password=DB_PASS, host=DB_HOST, port=DB_PORT,
+                cursor_factory=TimedCursor
+            )
         print("Successfully connected to the database.")
 
-        create_table(conn)
-        insert_data(conn, df_combined)
+        with report.stage("create_table"):
+            create_table(conn)
+        with report.stage("insert"):
+            insert_data(conn, df_combined)
 
-        conn.commit()
+        with report.stage("commit"):
+            conn.commit()
         print("Transactions committed to the database.")
+        status = "ok"
 
     except Exception as e:
         print(f"An error occurred: {e}")
@@ -101,6 +128,14 @@ def main():
         if conn:
             conn.close()
             print("Database connection closed.")
+        report.finish(status)
+    return status
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Muat file *_cleaned.csv ke tabel products.")
+    parser.add_argument("--dataset-dir", default=None,
+                        help="Baca dari dataset Parquet (lihat dataset_store.py) alih-alih '*_cleaned.csv'.")
+    parser.add_argument("--platform", nargs="+", default=None, help="Filter partisi platform (dengan --dataset-dir).")
+    args = parser.parse_args()
+    if main(dataset_dir=args.dataset_dir, platforms=args.platform) != "ok":
+        sys.exit(1)
\ No newline at end of file
@@ -0,0 +1,171 @@
+"""
+Cache respons API di dalam proses.
+
+Menyimpan body JSON yang sudah diserialisasi per kunci (path + query params)
+dengan TTL dan batas jumlah entri (LRU), ETag untuk `If-None-Match` -> 304,
+serta invalidasi yang dipicu penulis data lewat PostgreSQL LISTEN/NOTIFY:
+loader dan recommender memanggil `notify_invalidation` di transaksinya, dan
+NOTIFY baru terkirim saat transaksi itu di-commit.
+"""
+import hashlib
+import select
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+import psycopg2
+
+CACHE_CHANNEL = "api_cache_invalidate"
+SCOPE_ALL = "all"
+
+CachedResponse = namedtuple("CachedResponse", ["body", "etag", "media_type", "headers", "expires_at"])
+
+
+def make_etag(body):
+    """ETag kuat dari isi body."""
+    return '"' + hashlib.sha1(body).hexdigest() + '"'
+
+
+def etag_matches(if_none_match, etag):
+    """Mencocokkan header If-None-Match (bisa berisi beberapa ETag atau '*')."""
+    if not if_none_match:
+        return False
+    candidates = [value.strip() for value in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+class ResponseCache:
+    """Cache LRU thread-safe dengan TTL; kunci diawali path endpoint agar bisa diinvalidasi per scope."""
+
+    def __init__(self, max_entries, ttl_seconds):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._not_modified = 0
+        self._evictions = 0
+        self._invalidations = 0
+
+    @property
+    def enabled(self):
+        return self.max_entries > 0 and self.ttl_seconds > 0
+
+    def get(self, key):
+        """Mengembalikan entri yang masih berlaku atau None (dihitung sebagai miss)."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at > now:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return entry
+            if entry is not None:
+                del self._entries[key]
+            self._misses += 1
+            return None
+
+    def set(self, key, body, media_type="application/json", headers=None):
+        """Menyimpan body dan mengembalikan entrinya (tetap dibuat walau cache nonaktif, untuk ETag)."""
+        entry = CachedResponse(body, make_etag(body), media_type, dict(headers or {}),
+                               time.monotonic() + self.ttl_seconds)
+        if not self.enabled:
+            return entry
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+        return entry
+
+    def record_not_modified(self):
+        with self._lock:
+            self._not_modified += 1
+
+    def invalidate(self, scope=SCOPE_ALL):
+        """Menghapus entri untuk satu scope (prefix path, mis. 'recommendations') atau semua."""
+        with self._lock:
+            if not scope or scope == SCOPE_ALL:
+                removed = len(self._entries)
+                self._entries.clear()
+            else:
+                prefix = "/" + scope.strip("/")
+                keys = [key for key in self._entries if key.startswith(prefix)]
+                for key in keys:
+                    del self._entries[key]
+                removed = len(keys)
+            self._invalidations += 1
+        return removed
+
+    def stats(self):
+        """Counter hit/miss untuk monitoring."""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "enabled": self.enabled,
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "entries": len(self._entries),
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_ratio": round(self._hits / lookups, 4) if lookups else None,
+                "not_modified": self._not_modified,
+                "evictions": self._evictions,
+                "invalidations": self._invalidations,
+            }
+
+
+def notify_invalidation(conn, scope=SCOPE_ALL):
+    """Mengirim NOTIFY invalidasi di transaksi `conn`; diterima API setelah commit."""
+    with conn.cursor() as cur:
+        cur.execute("SELECT pg_notify(%s, %s);", (CACHE_CHANNEL, scope))
+
+
+class InvalidationListener(threading.Thread):
+    """
+    Thread latar yang LISTEN ke CACHE_CHANNEL dengan koneksi khusus (di luar
+    pool) dan menginvalidasi cache sesuai payload NOTIFY. Jika koneksi putus,
+    seluruh cache dikosongkan (notifikasi bisa terlewat) lalu tersambung ulang.
+    """
+
+    def __init__(self, cache, connect, poll_timeout=5.0, retry_delay=5.0):
+        super().__init__(name="cache-invalidation-listener", daemon=True)
+        self.cache = cache
+        self._connect = connect
+        self._poll_timeout = poll_timeout
+        self._retry_delay = retry_delay
+        self._stop_event = threading.Event()
+        self.connected = False
+        self.notifications_total = 0
+
+    def stop(self):
+        self._stop_event.set()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            conn = None
+            try:
+                conn = self._connect()
+                conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+                with conn.cursor() as cur:
+                    cur.execute(f"LISTEN {CACHE_CHANNEL};")
+                self.connected = True
+                while not self._stop_event.is_set():
+                    if select.select([conn], [], [], self._poll_timeout) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        notify = conn.notifies.pop(0)
+                        self.notifications_total += 1
+                        self.cache.invalidate(notify.payload or SCOPE_ALL)
+            except Exception as e:
+                if not self._stop_event.is_set():
+                    print(f"Cache invalidation listener error: {e}")
+                    self.cache.invalidate(SCOPE_ALL)
+            finally:
+                self.connected = False
+                if conn is not None:
+                    conn.close()
+            self._stop_event.wait(self._retry_delay)
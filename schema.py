@@ -0,0 +1,437 @@
+"""
+Skema database dan migrasi.
+
+Semua DDL ada di sini: tabel, index sekunder untuk pola query API, dan tabel
+`product` yang dipartisi per bulan berdasarkan `created_at` (riwayat harga
+adalah time series, jadi query per rentang waktu hanya menyentuh partisi
+yang relevan).
+
+Perintah (dari root proyek):
+    python schema.py --migrate    # buat/upgrade skema tanpa menghapus data
+    python schema.py --explain    # cek rencana query API memakai index scan
+"""
+import argparse
+import json
+import sys
+from datetime import date, datetime, timedelta, timezone
+
+import pandas as pd
+import psycopg2
+
+import api_queries
+import price_history
+
+# --- PENGATURAN KONEKSI DATABASE ---
+DB_NAME = "mydatabase"
+DB_USER = "myuser"
+DB_PASS = "mypassword"
+DB_HOST = "localhost"
+DB_PORT = "5432"
+
+# Batas bulan partisi dihitung dalam WIB agar satu partisi = satu bulan kalender lokal
+PARTITION_TZ_OFFSET = "+07"
+
+INDEXES = [
+    # GET /products?master_id= dan query time series per master
+    "CREATE INDEX IF NOT EXISTS idx_product_master_created ON product (product_master_id, created_at);",
+    # Filter per platform dalam rentang waktu
+    "CREATE INDEX IF NOT EXISTS idx_product_platform_created ON product (platform, created_at);",
+    # GET /recommendations/today: index-only scan per tanggal, urut product_master_id
+    """CREATE INDEX IF NOT EXISTS idx_price_recommendation_date_covering
+           ON price_recommendation (date, product_master_id) INCLUDE (price);""",
+    # Mode penyimpanan perubahan: tepat satu interval terbuka per listing, dan listing per master
+    """CREATE UNIQUE INDEX IF NOT EXISTS idx_listing_price_interval_open
+           ON listing_price_interval (listing_id) WHERE valid_to IS NULL;""",
+    "CREATE INDEX IF NOT EXISTS idx_listing_master ON listing (product_master_id);",
+    # Pencocokan master mencari listing yang sudah dikenal per nama (name = ANY(...))
+    "CREATE INDEX IF NOT EXISTS idx_listing_name ON listing (name);",
+    # GET /products/search dan /product-masters/search: index trigram untuk `<%` / word_similarity
+    "CREATE INDEX IF NOT EXISTS idx_product_master_name_trgm ON product_master USING gin (name gin_trgm_ops);",
+    "CREATE INDEX IF NOT EXISTS idx_listing_name_trgm ON listing USING gin (name gin_trgm_ops);",
+]
+
+
+def _month_start(value):
+    return date(value.year, value.month, 1)
+
+
+def _next_month(value):
+    return date(value.year + (value.month == 12), value.month % 12 + 1, 1)
+
+
+def partition_name(month_start):
+    """Nama partisi bulanan, mis. product_y2025m09."""
+    return f"product_y{month_start.year}m{month_start.month:02d}"
+
+
+def ensure_month_partitions(conn, start, end):
+    """Membuat partisi bulanan `product` yang belum ada untuk rentang [start, end]."""
+    month = _month_start(start)
+    last = _month_start(end)
+    created = []
+    with conn.cursor() as cur:
+        while month <= last:
+            name = partition_name(month)
+            cur.execute("SELECT to_regclass(%s);", (name,))
+            if cur.fetchone()[0] is None:
+                upper = _next_month(month)
+                cur.execute(
+                    f"""
+                    CREATE TABLE {name} PARTITION OF product
+                    FOR VALUES FROM ('{month.isoformat()} 00:00:00{PARTITION_TZ_OFFSET}')
+                                 TO ('{upper.isoformat()} 00:00:00{PARTITION_TZ_OFFSET}');
+                    """
+                )
+                created.append(name)
+            month = _next_month(month)
+    if created:
+        print(f"Created partitions: {', '.join(created)}")
+    return created
+
+
+def ensure_partitions_for(conn, timestamps):
+    """Memastikan partisi ada untuk semua bulan yang muncul di kolom timestamp (Series/list)."""
+    ts = pd.to_datetime(pd.Series(timestamps), utc=True).dropna()
+    if ts.empty:
+        return []
+    ts = ts.dt.tz_convert("Asia/Jakarta")
+    return ensure_month_partitions(conn, ts.min().date(), ts.max().date())
+
+
+def _create_product_table(cur, if_not_exists=""):
+    # Natural key (platform, name, detail, created_at) mengidentifikasi satu observasi
+    # listing; NULLS NOT DISTINCT agar detail kosong tetap dianggap kunci yang sama.
+    # Primary key & unique constraint wajib memuat kolom partisi (created_at).
+    cur.execute(f"""
+        CREATE TABLE {if_not_exists}product (
+            id INT NOT NULL,
+            name VARCHAR(255),
+            price INT,
+            original_price VARCHAR(50),
+            discount_percentage VARCHAR(50),
+            detail VARCHAR(100),
+            platform VARCHAR(50),
+            product_master_id INT,
+            created_at TIMESTAMPTZ NOT NULL,
+            PRIMARY KEY (id, created_at),
+            FOREIGN KEY (product_master_id) REFERENCES product_master (id),
+            CONSTRAINT product_natural_key UNIQUE NULLS NOT DISTINCT (platform, name, detail, created_at)
+        ) PARTITION BY RANGE (created_at);
+    """)
+    # Baris di luar partisi bulanan yang ada tidak pernah ditolak
+    cur.execute("CREATE TABLE IF NOT EXISTS product_default PARTITION OF product DEFAULT;")
+
+
+def create_schema(conn, drop_existing=False):
+    """
+    Membuat semua tabel dan index. drop_existing=True menghapus tabel lama lebih
+    dulu (mode muat ulang penuh); False hanya membuat yang belum ada.
+    """
+    if_not_exists = "" if drop_existing else "IF NOT EXISTS "
+    with conn.cursor() as cur:
+        if drop_existing:
+            # Hapus tabel lama dengan urutan yang benar untuk menghindari error foreign key
+            cur.execute("DROP TABLE IF EXISTS price_recommendation;")
+            cur.execute("DROP TABLE IF EXISTS product_price_daily;")
+            cur.execute("DROP TABLE IF EXISTS product_price_platform_daily;")
+            cur.execute("DROP TABLE IF EXISTS product_price_stats;")
+            cur.execute("DROP TABLE IF EXISTS recommendation_shard_run;")
+            cur.execute("DROP TABLE IF EXISTS listing_price_interval;")
+            cur.execute("DROP TABLE IF EXISTS listing;")
+            cur.execute("DROP TABLE IF EXISTS product;")
+            cur.execute("DROP TABLE IF EXISTS product_master;")
+            cur.execute("DROP TABLE IF EXISTS load_manifest;")
+
+        # 1. Tabel product_master
+        cur.execute(f"""
+            CREATE TABLE {if_not_exists}product_master (
+                id INT PRIMARY KEY,
+                type VARCHAR(100),
+                name VARCHAR(255),
+                detail TEXT
+            );
+        """)
+
+        # 2. Tabel product (dipartisi per bulan created_at)
+        _create_product_table(cur, if_not_exists)
+
+        # 3. Tabel price_recommendation
+        cur.execute(f"""
+            CREATE TABLE {if_not_exists}price_recommendation (
+                product_master_id INT,
+                price INT,
+                date DATE,
+                PRIMARY KEY (product_master_id, date),
+                FOREIGN KEY (product_master_id) REFERENCES product_master (id)
+            );
+        """)
+
+        # 4. Manifest file CSV yang sudah dimuat (dikenali dari checksum isinya)
+        cur.execute(f"""
+            CREATE TABLE {if_not_exists}load_manifest (
+                checksum CHAR(64) PRIMARY KEY,
+                file_name TEXT NOT NULL,
+                row_count INT NOT NULL,
+                loaded_at TIMESTAMPTZ NOT NULL DEFAULT now()
+            );
+        """)
+
+        # 5. Agregat harga per master per hari WIB dan totalnya (dipelihara oleh price_aggregates.py)
+        cur.execute(f"""
+            CREATE TABLE {if_not_exists}product_price_daily (
+                product_master_id INT NOT NULL,
+                day DATE NOT NULL,
+                price_sum BIGINT NOT NULL,
+                price_count INT NOT NULL,
+                max_original_price INT,
+                PRIMARY KEY (product_master_id, day)
+            );
+        """)
+        # Rincian per platform untuk fitur model harga (pricing_model.py), tanpa membaca product
+        cur.execute(f"""
+            CREATE TABLE {if_not_exists}product_price_platform_daily (
+                product_master_id INT NOT NULL,
+                platform VARCHAR(50) NOT NULL,
+                day DATE NOT NULL,
+                price_sum BIGINT NOT NULL,
+                price_count INT NOT NULL,
+                min_price INT,
+                max_price INT,
+                discount_sum BIGINT NOT NULL,
+                max_discount INT,
+                max_original_price INT,
+                detail VARCHAR(100),
+                PRIMARY KEY (product_master_id, platform, day)
+            );
+        """)
+        cur.execute(f"""
+            CREATE TABLE {if_not_exists}product_price_stats (
+                product_master_id INT PRIMARY KEY,
+                price_sum BIGINT NOT NULL,
+                price_count BIGINT NOT NULL,
+                max_original_price INT,
+                updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+            );
+        """)
+
+        # 6. Status per shard job rekomendasi (untuk melanjutkan shard yang gagal)
+        cur.execute(f"""
+            CREATE TABLE {if_not_exists}recommendation_shard_run (
+                run_date DATE NOT NULL,
+                shard_count INT NOT NULL,
+                shard_index INT NOT NULL,
+                status VARCHAR(20) NOT NULL,
+                row_count INT,
+                error TEXT,
+                updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+                PRIMARY KEY (run_date, shard_count, shard_index)
+            );
+        """)
+
+        # 7. Mode penyimpanan perubahan (price_history.py): satu baris per listing dan
+        #    satu interval per harga yang berbeda, bukan satu baris per crawl
+        cur.execute(f"""
+            CREATE TABLE {if_not_exists}listing (
+                id SERIAL PRIMARY KEY,
+                platform VARCHAR(50),
+                name VARCHAR(255),
+                detail VARCHAR(100),
+                product_master_id INT,
+                first_seen_at TIMESTAMPTZ NOT NULL,
+                last_seen_at TIMESTAMPTZ NOT NULL,
+                FOREIGN KEY (product_master_id) REFERENCES product_master (id),
+                CONSTRAINT listing_natural_key UNIQUE NULLS NOT DISTINCT (platform, name, detail)
+            );
+        """)
+        cur.execute(f"""
+            CREATE TABLE {if_not_exists}listing_price_interval (
+                listing_id INT NOT NULL,
+                valid_from TIMESTAMPTZ NOT NULL,
+                valid_to TIMESTAMPTZ,
+                price INT,
+                original_price INT,
+                discount_percentage INT,
+                observation_count INT NOT NULL,
+                last_observed_at TIMESTAMPTZ NOT NULL,
+                PRIMARY KEY (listing_id, valid_from),
+                FOREIGN KEY (listing_id) REFERENCES listing (id) ON DELETE CASCADE
+            );
+        """)
+
+        # Ekstensi trigram untuk index pencarian nama (trusted sejak PostgreSQL 13)
+        cur.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm;")
+        for ddl in INDEXES:
+            cur.execute(ddl)
+
+
+def _product_is_partitioned(cur):
+    cur.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass('product');")
+    row = cur.fetchone()
+    return row is not None and row[0] == 'p'
+
+
+def migrate(conn):
+    """
+    Meng-upgrade database lama tanpa kehilangan data: tabel yang belum ada dibuat,
+    index ditambahkan, dan tabel `product` biasa dipindah ke tabel berpartisi.
+    """
+    with conn.cursor() as cur:
+        cur.execute("SELECT to_regclass('product');")
+        has_product = cur.fetchone()[0] is not None
+        if has_product and not _product_is_partitioned(cur):
+            print("Converting 'product' into a monthly partitioned table...")
+            cur.execute("ALTER SEQUENCE IF EXISTS product_id_seq OWNED BY NONE;")
+            cur.execute("ALTER TABLE product RENAME TO product_legacy;")
+            cur.execute("ALTER TABLE product_legacy RENAME CONSTRAINT product_pkey TO product_legacy_pkey;")
+            cur.execute("""
+                DO $$
+                BEGIN
+                    IF EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'product_natural_key') THEN
+                        ALTER TABLE product_legacy RENAME CONSTRAINT product_natural_key TO product_legacy_natural_key;
+                    END IF;
+                END $$;
+            """)
+            _create_product_table(cur)
+            cur.execute("SELECT MIN(created_at), MAX(created_at) FROM product_legacy;")
+            min_ts, max_ts = cur.fetchone()
+            if min_ts is not None:
+                ensure_partitions_for(conn, [min_ts, max_ts])
+            cur.execute("""
+                INSERT INTO product (id, name, price, original_price, discount_percentage,
+                                     detail, platform, product_master_id, created_at)
+                SELECT id, name, price, original_price, discount_percentage,
+                       detail, platform, product_master_id, created_at
+                FROM product_legacy
+                WHERE created_at IS NOT NULL
+                ON CONFLICT DO NOTHING;
+            """)
+            print(f"Moved {cur.rowcount} rows into partitioned 'product'.")
+            cur.execute("DROP TABLE product_legacy;")
+            cur.execute("""
+                DO $$
+                BEGIN
+                    IF to_regclass('product_id_seq') IS NOT NULL THEN
+                        ALTER SEQUENCE product_id_seq OWNED BY product.id;
+                    END IF;
+                END $$;
+            """)
+        # /products/search kini mencari di tabel listing; index trigram di product tidak terpakai
+        cur.execute("DROP INDEX IF EXISTS idx_product_name_trgm;")
+    create_schema(conn, drop_existing=False)
+    print("Schema is up to date.")
+
+
+SAMPLE_SEARCH_TEXT = "rinso micellar 700ml"
+
+
+def api_query_samples(master_ids=(1, 2, 3), today=None):
+    """
+    Query API dengan parameter contoh untuk EXPLAIN, dibangun dari fungsi yang
+    sama dengan yang dipakai endpoint (api_queries.py), jadi rencana yang
+    diperiksa adalah rencana query yang benar-benar dijalankan.
+    """
+    today = today or date.today()
+    master_ids = list(master_ids)
+    return {
+        "products_by_master": api_queries.products_page(master_ids[0], None, 100),
+        "products_page": api_queries.products_page(None, 0, 100),
+        "product_masters_page": api_queries.product_masters_page(0, 100),
+        "products_batch": api_queries.products_batch(master_ids, today - timedelta(days=30), today, 500),
+        "recommendations_batch": api_queries.recommendations_batch(master_ids, today - timedelta(days=7), today),
+        "price_series": api_queries.price_series(master_ids[0], today - timedelta(days=30), today, None, "day"),
+        "price_series_platform": api_queries.price_series(
+            master_ids[0], today - timedelta(days=30), today, "tokopedia", "hour"
+        ),
+        "recommendation_history": api_queries.recommendation_history(
+            master_ids[0], today - timedelta(days=90), today, "week"
+        ),
+        "price_at": price_history.price_at_query(datetime.now(timezone.utc), master_ids),
+        "products_search": api_queries.products_search(SAMPLE_SEARCH_TEXT, None, 20),
+        "products_search_platform": api_queries.products_search(SAMPLE_SEARCH_TEXT, "tokopedia", 20),
+        "product_masters_search": api_queries.product_masters_search(SAMPLE_SEARCH_TEXT, 20),
+        "recommendations_today": api_queries.recommendations_today(),
+        # Mode penyimpanan `changes` (listing + listing_price_interval)
+        "products_by_master_changes": api_queries.products_page(master_ids[0], None, 100, "changes"),
+        "products_page_changes": api_queries.products_page(None, 0, 100, "changes"),
+        "products_batch_changes": api_queries.products_batch(
+            master_ids, today - timedelta(days=30), today, 500, "changes"
+        ),
+        "price_series_changes": api_queries.price_series(
+            master_ids[0], today - timedelta(days=30), today, None, "day", "changes"
+        ),
+        "products_search_changes": api_queries.products_search(SAMPLE_SEARCH_TEXT, None, 20, "changes"),
+    }
+
+
+def _plan_scans(plan, found=None):
+    """Mengumpulkan (node type, relation) semua node scan di rencana EXPLAIN JSON."""
+    found = [] if found is None else found
+    if "Scan" in plan.get("Node Type", ""):
+        found.append((plan["Node Type"], plan.get("Relation Name")))
+    for child in plan.get("Plans", []):
+        _plan_scans(child, found)
+    return found
+
+
+DEFAULT_MIN_ROWS = 10000   # Seq scan pada tabel lebih kecil dari ini wajar dan tidak dianggap masalah
+
+
+def explain_api_queries(conn, queries=None, min_rows=DEFAULT_MIN_ROWS):
+    """
+    Menjalankan EXPLAIN untuk query API dan mengembalikan
+    {nama: {"scans": [...], "seq_scans": [...]}}. `seq_scans` hanya berisi
+    tabel dengan estimasi >= min_rows baris: di sana seq scan berarti index tidak terpakai.
+    """
+    queries = queries or api_query_samples()
+    report = {}
+    with conn.cursor() as cur:
+        cur.execute("SELECT relname, reltuples FROM pg_class WHERE relkind IN ('r', 'p');")
+        table_rows = dict(cur.fetchall())
+        for name, (query, params) in queries.items():
+            cur.execute("EXPLAIN (FORMAT JSON) " + query, params)
+            plan = cur.fetchone()[0]
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            scans = _plan_scans(plan[0]["Plan"])
+            report[name] = {
+                "scans": scans,
+                "seq_scans": [
+                    relation for node, relation in scans
+                    if node == "Seq Scan" and table_rows.get(relation, 0) >= min_rows
+                ],
+            }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Migrasi skema dan pemeriksaan rencana query.")
+    parser.add_argument("--migrate", action="store_true", help="Buat/upgrade skema tanpa menghapus data.")
+    parser.add_argument("--explain", action="store_true",
+                        help="Gagal (exit 1) jika ada query API yang memakai seq scan pada tabel besar.")
+    parser.add_argument("--min-rows", type=int, default=DEFAULT_MIN_ROWS,
+                        help="Seq scan pada tabel yang lebih kecil dari ini diabaikan.")
+    args = parser.parse_args()
+
+    conn = psycopg2.connect(dbname=DB_NAME, user=DB_USER, password=DB_PASS, host=DB_HOST, port=DB_PORT)
+    try:
+        if args.migrate:
+            migrate(conn)
+            conn.commit()
+        if args.explain:
+            with conn.cursor() as cur:
+                cur.execute("ANALYZE;")
+            report = explain_api_queries(conn, min_rows=args.min_rows)
+            failed = False
+            for name, result in report.items():
+                status = "OK" if not result["seq_scans"] else f"SEQ SCAN on {', '.join(result['seq_scans'])}"
+                failed = failed or bool(result["seq_scans"])
+                print(f"{name:<24} {status:<40} {result['scans']}")
+            conn.rollback()
+            if failed:
+                sys.exit(1)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
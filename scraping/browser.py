@@ -0,0 +1,115 @@
+"""
+Pembuatan driver Chrome dan pool driver yang bisa dipakai ulang oleh scraper.
+"""
+import queue
+import threading
+import time
+
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+
+
+def build_chrome_options(headless=True, capture_network=False):
+    """
+    Opsi Chrome standar yang dipakai semua scraper.
+    capture_network=True mengaktifkan performance log DevTools (untuk mode capture JSON).
+    """
+    chrome_options = Options()
+    chrome_options.add_argument("--no-sandbox")
+    chrome_options.add_argument("--disable-dev-shm-usage")
+    if headless:
+        chrome_options.add_argument("--headless=new")
+        chrome_options.add_argument("--window-size=1920,1080")
+    else:
+        chrome_options.add_argument("--start-maximized")
+    if capture_network:
+        chrome_options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+    return chrome_options
+
+
+def create_driver(headless=True, capture_network=False):
+    """Membuat instance Chrome baru dengan penyamaran flag navigator.webdriver."""
+    driver = webdriver.Chrome(options=build_chrome_options(headless, capture_network))
+    driver.execute_cdp_cmd(
+        "Page.addScriptToEvaluateOnNewDocument",
+        {"source": "Object.defineProperty(navigator, 'webdriver', {get: () => undefined})"},
+    )
+    return driver
+
+
+class DriverPool:
+    """
+    Pool driver Chrome berukuran tetap. Driver dibuat saat pertama dibutuhkan,
+    dipakai ulang antar job, dan diganti baru jika rusak.
+    """
+
+    def __init__(self, size, factory=create_driver):
+        if size < 1:
+            raise ValueError("Ukuran pool driver minimal 1.")
+        self.size = size
+        self._factory = factory
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+        self._created = 0
+        self._closed = False
+
+    def acquire(self, timeout=None):
+        """Mengambil driver menganggur, atau membuat baru selama kuota belum penuh."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            if self._closed:
+                raise RuntimeError("Pool driver sudah ditutup.")
+            try:
+                return self._idle.get_nowait()
+            except queue.Empty:
+                pass
+            with self._lock:
+                can_create = self._created < self.size
+                if can_create:
+                    self._created += 1
+            if can_create:
+                try:
+                    return self._factory()
+                except Exception:
+                    with self._lock:
+                        self._created -= 1
+                    raise
+            # Tunggu sebentar lalu cek ulang: slot bisa kosong karena driver lain dibuang
+            wait = 0.5
+            if deadline is not None:
+                wait = min(wait, deadline - time.monotonic())
+                if wait <= 0:
+                    raise TimeoutError("Tidak ada driver yang tersedia dalam batas waktu.")
+            try:
+                return self._idle.get(timeout=wait)
+            except queue.Empty:
+                continue
+
+    def release(self, driver):
+        """Mengembalikan driver sehat ke pool."""
+        if self._closed:
+            driver.quit()
+            return
+        self._idle.put(driver)
+
+    def discard(self, driver):
+        """Menutup driver yang rusak; slotnya dipakai untuk membuat driver baru nanti."""
+        try:
+            driver.quit()
+        except Exception:
+            pass
+        with self._lock:
+            self._created -= 1
+
+    def close(self):
+        """Menutup semua driver yang sedang menganggur."""
+        self._closed = True
+        while True:
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                driver.quit()
+            except Exception:
+                pass
@@ -0,0 +1,313 @@
+"""
+Mode capture JSON/XHR untuk scraper.
+
+Tokopedia, Blibli, dan KlikIndomaret memuat listing lewat endpoint JSON. Mode
+ini membaca response tersebut dari performance log Chrome DevTools (driver
+dibuat dengan `capture_network=True`) lalu memetakannya langsung ke record
+`name/price/original_price/discount_percentage/createdat` yang sama dengan
+scraper DOM, tanpa menunggu layout, scroll penuh, atau parsing HTML.
+
+Response mentah bisa direkam ke file (`--record`) dan diputar ulang tanpa
+jaringan (`--replay`) untuk memeriksa mapper.
+
+Contoh (dari root proyek):
+    python -m scraping.capture tokopedia --record tokopedia_capture.json
+    python -m scraping.capture tokopedia --replay tokopedia_capture.json
+"""
+import argparse
+import base64
+import json
+import re
+import time
+from datetime import datetime, timezone, timedelta
+
+import pandas as pd
+
+from normalization import normalize_records
+from scraping import blibli, indomaret, tokped
+from scraping.browser import create_driver
+
+wib_timezone = timezone(timedelta(hours=7))
+
+DEFAULT_CAPTURE_TIMEOUT = 15   # Detik maksimum menunggu response JSON pertama
+DEFAULT_IDLE_TIMEOUT = 2       # Berhenti jika tidak ada response baru selama ini
+MAX_BODY_ATTEMPTS = 3          # Percobaan getResponseBody per request sebelum menyerah
+
+
+def _get(obj, path, default=None):
+    """Mengambil nilai bersarang dengan path bertitik, mis. 'price.text_idr'."""
+    for key in path.split("."):
+        if isinstance(obj, dict) and key in obj:
+            obj = obj[key]
+        else:
+            return default
+    return obj
+
+
+def _first(obj, *paths):
+    """
+    Nilai skalar pertama yang tidak kosong dari beberapa kemungkinan path.
+    Objek/list dilewati, mis. `price` yang berupa dict {"text": ...} pada
+    sebagian response tidak boleh terbawa sebagai harga.
+    """
+    for path in paths:
+        value = _get(obj, path)
+        if isinstance(value, (dict, list)):
+            continue
+        if value not in (None, "", 0, "0"):
+            return value
+    return None
+
+
+def _make_record(name, price, original_price, captured_at):
+    """Menyusun record mentah; harga & diskon dinormalisasi per batch di `map_responses`."""
+    if not name or price is None:
+        return None
+    return {
+        "name": str(name).strip(),
+        "price": price,
+        "original_price": original_price if original_price is not None else price,
+        "createdat": captured_at,
+    }
+
+
+def _iter_graphql_payloads(payload):
+    """Response GraphQL Tokopedia bisa berupa list (batched query) atau satu objek."""
+    return payload if isinstance(payload, list) else [payload]
+
+
+def map_tokopedia(payload, captured_at):
+    """Memetakan response GraphQL Tokopedia (ShopProducts / SearchProduct) ke record."""
+    records = []
+    for item in _iter_graphql_payloads(payload):
+        products = (
+            _get(item, "data.GetShopProduct.data")
+            or _get(item, "data.searchProductV5.data.products")
+            or _get(item, "data.ace_search_product_v4.data.products")
+            or []
+        )
+        for p in products:
+            record = _make_record(
+                p.get("name"),
+                _first(p, "campaign.discounted_price", "price.text_idr", "price.text", "price", "priceInt"),
+                _first(p, "campaign.original_price", "price.original", "originalPrice"),
+                captured_at,
+            )
+            if record:
+                records.append(record)
+    return records
+
+
+def map_blibli(payload, captured_at):
+    """Memetakan response `backend/search/products` Blibli ke record."""
+    records = []
+    for p in _get(payload, "data.products") or []:
+        record = _make_record(
+            p.get("name"),
+            _first(p, "price.priceDisplay", "price.minPrice", "price.offerPrice"),
+            _first(p, "price.strikeThroughPriceDisplay", "price.listPrice"),
+            captured_at,
+        )
+        if record:
+            records.append(record)
+    return records
+
+
+def map_indomaret(payload, captured_at):
+    """Memetakan response pencarian katalog KlikIndomaret ke record."""
+    records = []
+    products = (
+        _get(payload, "data.content")
+        or _get(payload, "data.products")
+        or _get(payload, "data.items")
+        or []
+    )
+    for p in products:
+        record = _make_record(
+            _first(p, "productName", "name"),
+            _first(p, "finalPrice", "price", "sellingPrice"),
+            _first(p, "price", "normalPrice", "originalPrice"),
+            captured_at,
+        )
+        if record:
+            records.append(record)
+    return records
+
+
+# Pola URL endpoint JSON listing dan mapper-nya per platform
+CAPTURE_CONFIG = {
+    "tokopedia": {
+        "url_patterns": [r"gql\.tokopedia\.com/graphql/(ShopProducts|SearchProduct)"],
+        "mapper": map_tokopedia,
+    },
+    "blibli": {
+        "url_patterns": [r"blibli\.com/backend/search/products"],
+        "mapper": map_blibli,
+    },
+    "indomaret": {
+        "url_patterns": [r"klikindomaret\.com/.*/search", r"klikindomaret\.com/.*/catalog"],
+        "mapper": map_indomaret,
+    },
+}
+
+
+def _network_events(driver, url_patterns):
+    """
+    Event Network DevTools dari performance log sejak pemanggilan terakhir, sebagai
+    (jenis, requestId, url): "response" untuk response JSON yang URL-nya cocok,
+    "finished"/"failed" untuk Network.loadingFinished/loadingFailed (url None).
+    """
+    compiled = [re.compile(p) for p in url_patterns]
+    events = []
+    for entry in driver.get_log("performance"):
+        message = json.loads(entry["message"])["message"]
+        method = message.get("method")
+        params = message.get("params", {})
+        if method == "Network.responseReceived":
+            response = params["response"]
+            if "json" in response.get("mimeType", "") and any(p.search(response["url"]) for p in compiled):
+                events.append(("response", params["requestId"], response["url"]))
+        elif method == "Network.loadingFinished":
+            events.append(("finished", params["requestId"], None))
+        elif method == "Network.loadingFailed":
+            events.append(("failed", params["requestId"], None))
+    return events
+
+
+def _response_body(driver, request_id):
+    """Mengambil body response dari DevTools dan mem-parse JSON-nya."""
+    body = driver.execute_cdp_cmd("Network.getResponseBody", {"requestId": request_id})
+    text = body["body"]
+    if body.get("base64Encoded"):
+        text = base64.b64decode(text).decode("utf-8")
+    return json.loads(text)
+
+
+def collect_json_responses(driver, url_patterns, timeout=DEFAULT_CAPTURE_TIMEOUT,
+                           idle_timeout=DEFAULT_IDLE_TIMEOUT, poll_interval=0.25):
+    """
+    Mengumpulkan response JSON yang cocok sampai tidak ada response baru selama
+    `idle_timeout` detik (atau `timeout` habis tanpa satu pun response).
+    Body baru dibaca setelah `Network.loadingFinished` untuk requestId tersebut
+    (body besar/streamed belum lengkap saat `responseReceived`); request baru
+    dianggap selesai setelah body berhasil dibaca, pembacaan yang gagal dicoba
+    lagi sampai MAX_BODY_ATTEMPTS kali.
+    Mengembalikan list {"url": ..., "payload": ...}.
+    """
+    captured = []
+    pending = {}     # requestId -> url: response diterima, body belum berhasil dibaca
+    finished = set() # requestId di `pending` yang sudah loadingFinished
+    attempts = {}
+    done = set()
+    last_hit = time.monotonic()
+    while True:
+        for kind, request_id, url in _network_events(driver, url_patterns):
+            if kind == "response":
+                if request_id not in done:
+                    pending[request_id] = url
+            elif request_id in pending:
+                if kind == "finished":
+                    finished.add(request_id)
+                else:
+                    print(f"Request failed before its body was loaded: {pending.pop(request_id)}")
+                    done.add(request_id)
+
+        for request_id in [r for r in pending if r in finished]:
+            url = pending[request_id]
+            try:
+                payload = _response_body(driver, request_id)
+            except Exception as e:
+                attempts[request_id] = attempts.get(request_id, 0) + 1
+                if attempts[request_id] < MAX_BODY_ATTEMPTS:
+                    continue
+                print(f"Could not read response body for {url} after {MAX_BODY_ATTEMPTS} attempts: {e}")
+            else:
+                captured.append({"url": url, "payload": payload})
+                last_hit = time.monotonic()
+            del pending[request_id]
+            finished.discard(request_id)
+            done.add(request_id)
+
+        now = time.monotonic()
+        # Selama masih ada body yang belum selesai dimuat, tunggu sampai `timeout`, bukan `idle_timeout`
+        if captured and not pending and now - last_hit >= idle_timeout:
+            break
+        if now - last_hit >= timeout:
+            break
+        time.sleep(poll_interval)
+    if pending:
+        print(f"Gave up on {len(pending)} JSON responses that did not finish loading within {timeout}s.")
+    return captured
+
+
+def map_responses(platform, responses, captured_at=None):
+    """Memetakan response JSON yang sudah direkam menjadi record produk."""
+    captured_at = captured_at or datetime.now(wib_timezone).isoformat()
+    mapper = CAPTURE_CONFIG[platform]["mapper"]
+    records = []
+    for response in responses:
+        records.extend(mapper(response["payload"], captured_at))
+    return normalize_records(records)
+
+
+def scrape_json(driver, platform, url, max_scrolls=0, responses_out=None):
+    """
+    Memuat URL dan membangun record dari response JSON listing, bukan dari DOM.
+    max_scrolls > 0 memicu halaman berikutnya (infinite scroll) tanpa menunggu render.
+    Driver harus dibuat dengan `create_driver(capture_network=True)`.
+    """
+    url_patterns = CAPTURE_CONFIG[platform]["url_patterns"]
+    driver.get_log("performance")  # Buang log lama dari halaman sebelumnya
+    print(f"Loading page {url} (JSON capture)...")
+    driver.get(url)
+    responses = collect_json_responses(driver, url_patterns)
+    for _ in range(max_scrolls):
+        driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+        more = collect_json_responses(driver, url_patterns, timeout=DEFAULT_IDLE_TIMEOUT)
+        if not more:
+            break
+        responses.extend(more)
+    if responses_out is not None:
+        responses_out.extend(responses)
+    records = map_responses(platform, responses)
+    print(f"Captured {len(responses)} JSON responses, {len(records)} products.")
+    return records
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scrape listing lewat response JSON (tanpa parsing DOM).")
+    parser.add_argument("platform", choices=list(CAPTURE_CONFIG))
+    parser.add_argument("--url", default=None, help="Default: SEARCH_URLS pertama milik scraper platform.")
+    parser.add_argument("--max-scrolls", type=int, default=0)
+    parser.add_argument("--record", default=None, help="Simpan response JSON mentah ke file ini.")
+    parser.add_argument("--replay", default=None, help="Petakan response dari file rekaman, tanpa browser.")
+    parser.add_argument("--output", default=None, help="Simpan record hasil mapping ke CSV.")
+    args = parser.parse_args()
+
+    if args.replay:
+        with open(args.replay, encoding="utf-8") as f:
+            records = map_responses(args.platform, json.load(f))
+    else:
+        scrapers = {m.PLATFORM: m for m in (tokped, indomaret, blibli)}
+        url = args.url or scrapers[args.platform].SEARCH_URLS[0]
+        driver = create_driver(headless=True, capture_network=True)
+        responses = []
+        try:
+            records = scrape_json(driver, args.platform, url, args.max_scrolls, responses_out=responses)
+        finally:
+            driver.quit()
+        if args.record:
+            with open(args.record, "w", encoding="utf-8") as f:
+                json.dump(responses, f, ensure_ascii=False)
+            print(f"Raw responses saved to {args.record}")
+
+    for record in records[:5]:
+        print(record)
+    print(f"Total records: {len(records)}")
+    if args.output and records:
+        pd.DataFrame(records).to_csv(args.output, index=False, encoding="utf-8")
+        print(f"Data saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""
+Orkestrator scraping multi-platform.
+
+Menjalankan Tokopedia, KlikIndomaret, dan Blibli (serta beberapa URL per
+platform) secara paralel memakai pool driver Chrome headless yang dipakai ulang,
+dengan batas konkurensi per situs dan retry dengan exponential backoff.
+
+Jalankan dari root proyek:
+    python -m scraping.orchestrator --pool-size 4
+    python -m scraping.orchestrator --mode json   # ambil listing dari response JSON
+    python -m scraping.orchestrator --dataset-dir dataset   # tulis ke dataset Parquet
+"""
+import argparse
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from itertools import zip_longest
+
+import dataset_store
+from scraping import blibli, indomaret, tokped
+from scraping.browser import DriverPool, create_driver
+from scraping.capture import scrape_json
+
+SCRAPERS = {
+    tokped.PLATFORM: tokped,
+    indomaret.PLATFORM: indomaret,
+    blibli.PLATFORM: blibli,
+}
+
+# Jumlah maksimum halaman yang dibuka bersamaan per situs (hindari rate limit/blokir)
+SITE_CONCURRENCY = {
+    tokped.PLATFORM: 2,
+    indomaret.PLATFORM: 2,
+    blibli.PLATFORM: 1,
+}
+
+DEFAULT_POOL_SIZE = 4
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BACKOFF_BASE = 2.0   # Detik; jeda retry ke-n = base * 2^(n-1) + jitter
+DRIVER_ACQUIRE_TIMEOUT = 300
+
+
+def build_jobs(platforms=None):
+    """
+    Menyusun daftar job (platform, url) dari SEARCH_URLS tiap scraper.
+    Job disusun bergiliran antar platform agar worker tidak menumpuk di satu situs.
+    """
+    platforms = platforms or list(SCRAPERS)
+    per_platform = [[(p, url) for url in SCRAPERS[p].SEARCH_URLS] for p in platforms]
+    return [job for group in zip_longest(*per_platform) for job in group if job is not None]
+
+
+def _run_job(pool, site_limits, platform, url, max_retries, backoff_base, mode="dom", on_result=None,
+             stop_event=None):
+    """Menjalankan satu job dengan batas konkurensi situs dan retry + backoff."""
+    scraper = SCRAPERS[platform]
+    with site_limits[platform]:
+        for attempt in range(1, max_retries + 1):
+            if stop_event is not None and stop_event.is_set():
+                return []
+            driver = pool.acquire(timeout=DRIVER_ACQUIRE_TIMEOUT)
+            try:
+                if mode == "json":
+                    records = scrape_json(driver, platform, url)
+                else:
+                    records = scraper.scrape(driver, url)
+            except Exception as e:
+                # Driver yang gagal di tengah halaman bisa dalam state rusak: ganti baru
+                pool.discard(driver)
+                if attempt == max_retries:
+                    raise
+                delay = backoff_base * (2 ** (attempt - 1)) + random.uniform(0, 1)
+                print(f"[{platform}] Attempt {attempt}/{max_retries} for {url} failed ({e}); retrying in {delay:.1f}s.")
+                time.sleep(delay)
+                continue
+            pool.release(driver)
+            if on_result is not None:
+                # Dipanggil di thread worker: callback yang memblok (mis. queue penuh)
+                # menahan worker ini mengambil job baru -> backpressure ke scraper
+                on_result(platform, url, records)
+            return records
+
+
+def crawl(jobs=None, pool_size=DEFAULT_POOL_SIZE, max_retries=DEFAULT_MAX_RETRIES,
+          backoff_base=DEFAULT_BACKOFF_BASE, site_concurrency=None, on_result=None, headless=True,
+          mode="dom", collect=True, stop_event=None):
+    """
+    Menjalankan semua job secara paralel dan mengembalikan {platform: [records]}.
+
+    mode: "dom" (render + parse kartu produk) atau "json" (capture response XHR).
+
+    on_result(platform, url, records) dipanggil dari thread worker setiap kali satu
+    job selesai (harus thread-safe), sehingga pemanggil bisa memproses hasil tanpa
+    menunggu seluruh crawl. collect=False tidak menyimpan hasil di memori
+    (dict yang dikembalikan kosong), cocok untuk mode streaming.
+
+    stop_event (threading.Event) opsional: jika di-set, job yang belum mulai
+    dibatalkan, job yang sedang berjalan tidak di-retry, lalu semua driver ditutup.
+    """
+    jobs = jobs if jobs is not None else build_jobs()
+    limits = dict(SITE_CONCURRENCY, **(site_concurrency or {}))
+    site_limits = {p: threading.BoundedSemaphore(limits.get(p, 1)) for p in SCRAPERS}
+    pool = DriverPool(pool_size, factory=lambda: create_driver(headless=headless, capture_network=(mode == "json")))
+    results = {platform: [] for platform, _ in jobs}
+    failures = []
+
+    start = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=pool_size) as executor:
+            futures = {
+                executor.submit(_run_job, pool, site_limits, platform, url, max_retries, backoff_base,
+                                mode, on_result, stop_event): (platform, url)
+                for platform, url in jobs
+            }
+            for future in as_completed(futures):
+                platform, url = futures[future]
+                if stop_event is not None and stop_event.is_set():
+                    for pending in futures:
+                        pending.cancel()
+                    continue
+                try:
+                    records = future.result()
+                except Exception as e:
+                    print(f"[{platform}] Giving up on {url}: {e}")
+                    failures.append((platform, url))
+                    continue
+                print(f"[{platform}] {len(records)} products from {url}")
+                if collect:
+                    results[platform].extend(records)
+    finally:
+        pool.close()
+
+    elapsed = time.perf_counter() - start
+    if stop_event is not None and stop_event.is_set():
+        print(f"\nCrawl stopped after {elapsed:.1f}s.")
+        return results
+    print(f"\nCrawl finished in {elapsed:.1f}s: {len(jobs) - len(failures)}/{len(jobs)} jobs succeeded.")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scrape semua platform secara paralel.")
+    parser.add_argument("--platforms", nargs="+", choices=list(SCRAPERS), default=None,
+                        help="Platform yang di-scrape (default: semua).")
+    parser.add_argument("--pool-size", type=int, default=DEFAULT_POOL_SIZE,
+                        help="Jumlah maksimum driver Chrome yang berjalan bersamaan.")
+    parser.add_argument("--max-retries", type=int, default=DEFAULT_MAX_RETRIES)
+    parser.add_argument("--backoff-base", type=float, default=DEFAULT_BACKOFF_BASE)
+    parser.add_argument("--no-headless", action="store_true", help="Tampilkan jendela browser.")
+    parser.add_argument("--mode", choices=["dom", "json"], default="dom",
+                        help="dom: render dan parse HTML; json: ambil listing dari response XHR.")
+    parser.add_argument("--dataset-dir", default=None,
+                        help="Tulis hasil ke dataset Parquet (partisi platform/tanggal) alih-alih CSV per platform.")
+    args = parser.parse_args()
+
+    results = crawl(
+        build_jobs(args.platforms),
+        pool_size=args.pool_size,
+        max_retries=args.max_retries,
+        backoff_base=args.backoff_base,
+        headless=not args.no_headless,
+        mode=args.mode,
+    )
+    for platform, records in results.items():
+        if args.dataset_dir:
+            written = dataset_store.write_records(records, platform, args.dataset_dir)
+            print(f"[{platform}] {len(records)} records written to {len(written)} Parquet files under {args.dataset_dir}")
+        else:
+            SCRAPERS[platform].save_records(records)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Lapisan parser kartu produk yang bisa diganti backend-nya.
+
+Setiap platform punya konfigurasi selector CSS (kartu + field di dalamnya).
+Backend yang tersedia:
+- "selectolax" : parser C (Lexbor), paling cepat; opsional (`pip install selectolax`)
+- "lxml"       : BeautifulSoup dengan parser lxml; opsional (`pip install lxml`)
+- "html.parser": BeautifulSoup dengan parser bawaan Python (selalu tersedia)
+- "js"         : tanpa parsing di Python; kartu diambil lewat satu `execute_script`
+                 di browser (hanya untuk driver yang masih hidup)
+"""
+import os
+
+from bs4 import BeautifulSoup
+
+try:
+    from selectolax.parser import HTMLParser
+except ImportError:
+    HTMLParser = None
+
+try:
+    import lxml  # noqa: F401
+    HAS_LXML = True
+except ImportError:
+    HAS_LXML = False
+
+# Selector CSS per platform. Kelas hash Tokopedia memakai selector atribut
+# (`[class~=...]`) karena mengandung karakter seperti '+' dan '=='.
+PLATFORM_SELECTORS = {
+    "tokopedia": {
+        "card": 'div[class~="y-oybT3IAd310DVdH3OwVg=="]',
+        "fields": {
+            "name": 'span[class~="+tnoqZhn89+NHUA43BpiJg=="]',
+            "price": 'div[class~="urMOIDHH7I0Iy1Dv2oFaNw=="][class~="HJhoi0tEIlowsgSNDNWVXg=="]',
+            "original_price": 'span[class~="hC1B8wTAoPszbEZj80w6Qw=="]',
+        },
+    },
+    "indomaret": {
+        "card": "div.card-product",
+        "fields": {
+            "name": "h2.line-clamp-2",
+            "price": "div.wrp-price",
+        },
+    },
+    "blibli": {
+        "card": "div.elf-product-card__container",
+        "fields": {
+            "name": "span.els-product__title",
+            "price": "div.els-product__fixed-price",
+            "original_price": "span.els-product__discount-price",
+        },
+    },
+}
+
+_EXTRACT_CARDS_SCRIPT = """
+const [cardSelector, fields] = arguments;
+return Array.from(document.querySelectorAll(cardSelector), card => {
+    const row = {};
+    for (const [field, selector] of Object.entries(fields)) {
+        const el = card.querySelector(selector);
+        row[field] = el ? el.textContent.trim() : null;
+    }
+    return row;
+});
+"""
+
+
+def available_backends():
+    """Daftar backend parsing HTML yang bisa dipakai di environment ini (urut tercepat dulu)."""
+    backends = []
+    if HTMLParser is not None:
+        backends.append("selectolax")
+    if HAS_LXML:
+        backends.append("lxml")
+    backends.append("html.parser")
+    return backends
+
+
+DEFAULT_BACKEND = os.getenv("SCRAPER_PARSER_BACKEND", available_backends()[0])
+
+
+def _parse_bs4(html, config, features):
+    soup = BeautifulSoup(html, features)
+    rows = []
+    for card in soup.select(config["card"]):
+        row = {}
+        for field, selector in config["fields"].items():
+            el = card.select_one(selector)
+            row[field] = el.get_text().strip() if el else None
+        rows.append(row)
+    return rows
+
+
+def _parse_selectolax(html, config):
+    tree = HTMLParser(html)
+    rows = []
+    for card in tree.css(config["card"]):
+        row = {}
+        for field, selector in config["fields"].items():
+            el = card.css_first(selector)
+            row[field] = el.text().strip() if el is not None else None
+        rows.append(row)
+    return rows
+
+
+def parse_cards(html, platform, backend=None):
+    """
+    Mem-parse HTML halaman dan mengembalikan list dict field kartu produk
+    (nilai None jika elemen tidak ditemukan).
+    """
+    config = PLATFORM_SELECTORS[platform]
+    backend = backend or DEFAULT_BACKEND
+    if backend == "selectolax":
+        if HTMLParser is None:
+            raise ImportError("Backend 'selectolax' membutuhkan paket selectolax.")
+        return _parse_selectolax(html, config)
+    if backend in ("lxml", "html.parser"):
+        return _parse_bs4(html, config, backend)
+    raise ValueError(f"Backend parser tidak dikenal: {backend}")
+
+
+def extract_cards_js(driver, platform):
+    """Mengambil field kartu produk langsung dari DOM browser dalam satu round trip."""
+    config = PLATFORM_SELECTORS[platform]
+    return driver.execute_script(_EXTRACT_CARDS_SCRIPT, config["card"], config["fields"])
+
+
+def extract_cards(driver, platform, backend=None):
+    """Mengambil kartu produk dari driver memakai backend yang dipilih (termasuk "js")."""
+    backend = backend or DEFAULT_BACKEND
+    if backend == "js":
+        return extract_cards_js(driver, platform)
+    return parse_cards(driver.page_source, platform, backend)
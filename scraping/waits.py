@@ -0,0 +1,65 @@
+"""
+Helper tunggu berbasis kondisi untuk scraper (pengganti time.sleep tetap).
+
+Halaman ditunggu hanya selama kartu produk belum muncul / masih bertambah,
+bukan selama waktu terburuk yang di-hardcode.
+"""
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+DEFAULT_LOAD_TIMEOUT = 20     # Detik maksimum menunggu kartu produk pertama muncul
+DEFAULT_SETTLE_TIMEOUT = 4    # Detik maksimum menunggu kartu baru setelah satu scroll
+DEFAULT_POLL_FREQUENCY = 0.25
+
+_COUNT_SCRIPT = "return document.querySelectorAll(arguments[0]).length;"
+
+
+def count_cards(driver, card_selector):
+    """Menghitung kartu produk di DOM dengan satu panggilan JavaScript."""
+    return driver.execute_script(_COUNT_SCRIPT, card_selector)
+
+
+class card_count_exceeds:
+    """Expected condition: jumlah kartu lebih besar dari `count` (mengembalikan jumlah baru)."""
+
+    def __init__(self, card_selector, count):
+        self.card_selector = card_selector
+        self.count = count
+
+    def __call__(self, driver):
+        current = count_cards(driver, self.card_selector)
+        return current if current > self.count else False
+
+
+def wait_for_cards(driver, card_selector, timeout=DEFAULT_LOAD_TIMEOUT):
+    """Menunggu sampai kartu produk pertama ada di DOM. Mengembalikan False jika timeout."""
+    try:
+        WebDriverWait(driver, timeout, poll_frequency=DEFAULT_POLL_FREQUENCY).until(
+            EC.presence_of_element_located((By.CSS_SELECTOR, card_selector))
+        )
+        return True
+    except TimeoutException:
+        return False
+
+
+def scroll_until_stable(driver, card_selector, target_count=None, max_scrolls=30,
+                        settle_timeout=DEFAULT_SETTLE_TIMEOUT, poll_frequency=DEFAULT_POLL_FREQUENCY):
+    """
+    Scroll ke bawah berulang kali sampai jumlah kartu berhenti bertambah,
+    `target_count` tercapai, atau `max_scrolls` habis. Mengembalikan jumlah kartu akhir.
+    """
+    count = count_cards(driver, card_selector)
+    for _ in range(max_scrolls):
+        if target_count is not None and count >= target_count:
+            break
+        driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+        try:
+            count = WebDriverWait(driver, settle_timeout, poll_frequency=poll_frequency).until(
+                card_count_exceeds(card_selector, count)
+            )
+        except TimeoutException:
+            # Tidak ada kartu baru setelah scroll: halaman sudah habis dimuat
+            break
+    return count
@@ -0,0 +1,62 @@
+"""Test query API terhadap PostgreSQL (dilewati jika database schema.py tidak bisa dihubungi)."""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+psycopg2 = pytest.importorskip("psycopg2")
+
+import api_queries
+import price_history
+import schema
+
+SEARCH_TEXT = "rinso cair 700ml"
+
+
+@pytest.fixture
+def conn():
+    try:
+        connection = psycopg2.connect(dbname=schema.DB_NAME, user=schema.DB_USER, password=schema.DB_PASS,
+                                      host=schema.DB_HOST, port=schema.DB_PORT)
+    except psycopg2.OperationalError as e:
+        pytest.skip(f"PostgreSQL tidak tersedia: {e}")
+    # Schema sementara dalam satu transaksi; di-rollback setelah test
+    with connection.cursor() as cur:
+        cur.execute("CREATE SCHEMA api_queries_test;")
+        cur.execute("SET LOCAL search_path TO api_queries_test, public;")
+    schema.create_schema(connection)
+    yield connection
+    connection.rollback()
+    connection.close()
+
+
+def seed_listings(conn, observations):
+    """observations: daftar (nama listing, jumlah observasi); satu observasi per jam."""
+    start = datetime(2025, 9, 1, tzinfo=timezone.utc)
+    rows = []
+    for name, count in observations:
+        rows += [(name, 10000 + hour, "tokopedia", 1, start + timedelta(hours=hour)) for hour in range(count)]
+    with conn.cursor() as cur:
+        cur.execute("INSERT INTO product_master (id, type, name) VALUES (1, 'detergent', 'Rinso');")
+        cur.executemany("""
+            INSERT INTO product (id, name, price, detail, platform, product_master_id, created_at)
+            VALUES (%s, %s, %s, NULL, %s, %s, %s);
+        """, [(i, *row) for i, row in enumerate(rows, start=1)])
+    price_history.upsert_listings(conn, "product")
+
+
+def test_products_search_returns_limit_distinct_listings(conn):
+    # Skor ketiganya sama, tetapi satu listing punya 200 observasi yang lebih baru:
+    # membatasi kandidat per observasi sebelum dedupe hanya menyisakan listing itu
+    seed_listings(conn, [
+        ("Rinso Cair 700ml", 200),
+        ("Rinso Cair 700ml Refill", 1),
+        ("Rinso Cair 700ml Botol", 1),
+    ])
+    query, params = api_queries.products_search(SEARCH_TEXT, None, 3)
+    with conn.cursor() as cur:
+        cur.execute(query, params)
+        result = cur.fetchall()
+    assert len(result) == 3
+    assert len({row[1] for row in result}) == 3
+    latest = next(row for row in result if row[1] == "Rinso Cair 700ml")
+    assert latest[2] == 10199
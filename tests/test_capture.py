@@ -0,0 +1,138 @@
+"""Test mapper capture JSON terhadap response rekaman dan urutan event DevTools."""
+import json
+import os
+import re
+
+import pytest
+
+from scraping import capture
+
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), "fixtures", "capture")
+CAPTURED_AT = "2025-09-01T10:00:00+07:00"
+
+
+def load_fixture(platform):
+    with open(os.path.join(FIXTURE_DIR, f"{platform}.json"), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def summarize(records):
+    return [(r["name"], r["price"], r["original_price"], r["discount_percentage"]) for r in records]
+
+
+@pytest.mark.parametrize("platform, expected", [
+    ("tokopedia", [
+        ("Rinso Deterjen Cair Molto 700ml", 72400, 90500, 20),
+        ("Sunlight Jeruk Nipis 755ml", 18900, 18900, 0),
+        ("Pepsodent Pasta Gigi 190g", 15500, 19000, 18),
+        ("Lifebuoy Sabun Cair 450ml", 32000, 32000, 0),
+    ]),
+    ("blibli", [
+        ("Dove Shampoo Total Hair Fall 340ml", 48500, 62000, 22),
+        ("Royco Bumbu Kaldu Sapi 230g", 11200, 11200, 0),
+    ]),
+    ("indomaret", [
+        ("Molto Pewangi Pakaian Blue 780ml", 21500, 24900, 14),
+        ("Sariwangi Teh Celup Asli 25s", 7800, 7800, 0),
+    ]),
+])
+def test_map_responses_from_recorded_fixture(platform, expected):
+    records = capture.map_responses(platform, load_fixture(platform), CAPTURED_AT)
+    assert summarize(records) == expected
+    assert all(r["createdat"] == CAPTURED_AT for r in records)
+
+
+def test_recorded_urls_match_capture_patterns():
+    for platform in capture.CAPTURE_CONFIG:
+        patterns = capture.CAPTURE_CONFIG[platform]["url_patterns"]
+        for response in load_fixture(platform):
+            assert any(re.search(p, response["url"]) for p in patterns), response["url"]
+
+
+def test_first_skips_object_values():
+    product = {"price": {"number": 32000}, "priceInt": 32000}
+    assert capture._first(product, "price.text", "price", "priceInt") == 32000
+    assert capture._first({"price": {"number": 1}}, "price") is None
+
+
+class FakeDriver:
+    """Driver palsu: performance log per poll dan body yang baru tersedia setelah loadingFinished."""
+
+    def __init__(self, batches, bodies, failures=None):
+        self.batches = list(batches)
+        self.bodies = bodies
+        self.failures = dict(failures or {})
+        self.finished = set()
+        self.body_calls = []
+
+    def get_log(self, log_type):
+        assert log_type == "performance"
+        batch = self.batches.pop(0) if self.batches else []
+        entries = []
+        for method, params in batch:
+            if method == "Network.loadingFinished":
+                self.finished.add(params["requestId"])
+            entries.append({"message": json.dumps({"message": {"method": method, "params": params}})})
+        return entries
+
+    def execute_cdp_cmd(self, command, params):
+        assert command == "Network.getResponseBody"
+        request_id = params["requestId"]
+        self.body_calls.append(request_id)
+        if request_id not in self.finished:
+            raise RuntimeError("No data found for resource with given identifier")
+        if self.failures.get(request_id):
+            self.failures[request_id] -= 1
+            raise RuntimeError("transient")
+        return {"body": json.dumps(self.bodies[request_id]), "base64Encoded": False}
+
+
+def response_event(request_id, url, mime_type="application/json"):
+    return ("Network.responseReceived",
+            {"requestId": request_id, "response": {"url": url, "mimeType": mime_type}})
+
+
+def finished_event(request_id):
+    return ("Network.loadingFinished", {"requestId": request_id})
+
+
+URL = "https://www.blibli.com/backend/search/products?page=1"
+PATTERNS = capture.CAPTURE_CONFIG["blibli"]["url_patterns"]
+
+
+def test_body_is_read_only_after_loading_finished():
+    driver = FakeDriver(
+        batches=[[response_event("1", URL)], [], [finished_event("1")]],
+        bodies={"1": {"data": {"products": []}}},
+    )
+    captured = capture.collect_json_responses(driver, PATTERNS, timeout=5, idle_timeout=0, poll_interval=0)
+    assert captured == [{"url": URL, "payload": {"data": {"products": []}}}]
+    assert driver.body_calls == ["1"]
+
+
+def test_failed_body_read_is_retried():
+    driver = FakeDriver(
+        batches=[[response_event("1", URL), finished_event("1")]],
+        bodies={"1": {"ok": True}},
+        failures={"1": 1},
+    )
+    captured = capture.collect_json_responses(driver, PATTERNS, timeout=5, idle_timeout=0, poll_interval=0)
+    assert [c["payload"] for c in captured] == [{"ok": True}]
+    assert driver.body_calls == ["1", "1"]
+
+
+def test_non_matching_and_failed_requests_are_ignored():
+    driver = FakeDriver(
+        batches=[[
+            response_event("1", "https://www.blibli.com/backend/other"),
+            response_event("2", URL, mime_type="text/html"),
+            response_event("3", URL),
+            ("Network.loadingFailed", {"requestId": "3"}),
+            response_event("4", URL),
+            finished_event("4"),
+        ]],
+        bodies={"4": {"ok": True}},
+    )
+    captured = capture.collect_json_responses(driver, PATTERNS, timeout=5, idle_timeout=0, poll_interval=0)
+    assert [c["payload"] for c in captured] == [{"ok": True}]
+    assert driver.body_calls == ["4"]